@@ -1,7 +1,40 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
+import numpy as np
 import re
+import io
+import os
+import json
+import hashlib
+import threading
+import time
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared HTTP modules
+from http_cache import HTTPCache
+from http_helpers import HostRateLimiter, create_session
+
+try:
+    from lxml import etree  # streaming table extraction
+except ImportError:
+    etree = None  # fall back to BeautifulSoup
+
+# Concurrent fetch settings
+CONCURRENT = True          # Set to False to fetch chapters one at a time
+MAX_WORKERS = 8            # Number of chapter pages fetched at the same time
+REQUESTS_PER_SECOND = 4    # Cap on new requests per host (0 disables the cap)
+
+# Per-chapter checkpoints, a rerun only re-parses chapters whose page changed
+CHECKPOINT_DIR = "checkpoints"
+MANIFEST_FILE = os.path.join(CHECKPOINT_DIR, "manifest.json")
+CHECKPOINT_VERSION = 1     # Bump when parse_page or clean_data change their output, so old checkpoints are rebuilt
+manifest_lock = threading.Lock()
+
+# Consistent headers for every table on every page
+HEADERS = ['StatisticalCode', 'Unit', 'Goods', 'Rate#', 'ReferenceNumber', 'Tariffconcessionorders']
 
 # Function to generate URLs for all sections and chapters- URL sequencing
 def generate_urls():
@@ -37,18 +70,105 @@ def generate_urls():
             urls.append(url)
     return urls
 
+# Function to download a single page
+def fetch_page(url, session=None, rate_limiter=None):
+    if rate_limiter:
+        rate_limiter.wait(url)
+    response = http_cache.get(url, session=session)
+    return response.content
+
 # Function to scrape a single page
-def scrape_page(url):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'html.parser')
+def scrape_page(url, session=None, rate_limiter=None):
+    content = fetch_page(url, session, rate_limiter)
+    return parse_page(content, url)
+
+# Rows and cells left open: html.parser nests the next one inside them, lxml closes them
+OPEN_TAG_PATTERNS = [
+    (re.compile(rb'<tr[\s/>]', re.IGNORECASE), re.compile(rb'</tr\s*>', re.IGNORECASE)),
+    (re.compile(rb'<td[\s/>]', re.IGNORECASE), re.compile(rb'</td\s*>', re.IGNORECASE)),
+]
+
+# Raised by iter_table_rows for a table inside a table, whose rows BeautifulSoup's
+# find_all returns for the outer table as well
+class NestedTableError(Exception):
+    pass
+
+# Function to check whether the streaming parser would read the page like parse_page_soup
+def streams_like_soup(content):
+    return all(len(start.findall(content)) == len(end.findall(content))
+               for start, end in OPEN_TAG_PATTERNS)
+
+# Function to extract the tariff rows from a downloaded page
+def parse_page(content, url):
+    if etree is None or not streams_like_soup(content):
+        return parse_page_soup(content, url)
+
+    page_data = []
+    table_count = 0
+    try:
+        for row_data in iter_table_rows(content):
+            if row_data is None:  # marks the start of a new table
+                table_count += 1
+                continue
+            page_data.append(row_data)
+    except NestedTableError:
+        return parse_page_soup(content, url)
+    print(f"Found {table_count} tables on {url}")
+    return page_data
+
+# Function to stream the 6-column rows out of the page without building the full tree
+def iter_table_rows(content):
+    row_counts = []  # rows seen so far in each open table (innermost last)
+    cells = []
+    for event, elem in etree.iterparse(io.BytesIO(content), events=('start', 'end'),
+                                       tag=('table', 'tr', 'td'), html=True):
+        if elem.tag == 'table':
+            if event == 'start':
+                if row_counts:
+                    raise NestedTableError
+                row_counts.append(0)
+                yield None
+            else:
+                row_counts.pop()
+                elem.clear()
+        elif event == 'start':
+            if elem.tag == 'tr':
+                cells = []
+        elif elem.tag == 'td':
+            # Same text as BeautifulSoup's col.text, comments are skipped by itertext
+            cells.append(''.join(elem.itertext()).strip().replace('\n', ' ').replace('\r', ''))
+        elif row_counts:
+            row_counts[-1] += 1
+            # Skip the header row for each table, then free the rows already handled
+            if row_counts[-1] > 1:
+                row_data = normalise_row(cells)
+                if row_data:
+                    yield row_data
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+# Function to pad/trim a row to the headers, returns None for empty rows
+def normalise_row(row_data):
+    # Skip empty and completely empty rows
+    if not row_data or not any(row_data):
+        return None
+
+    # Ensure row_data has the same length as headers
+    if len(row_data) < len(HEADERS):
+        row_data = row_data + [''] * (len(HEADERS) - len(row_data))
+    elif len(row_data) > len(HEADERS):
+        row_data = row_data[:len(HEADERS)]
+    return row_data
+
+# Function to extract the tariff rows with BeautifulSoup (used when lxml is not installed)
+def parse_page_soup(content, url):
+    soup = BeautifulSoup(content, 'html.parser')
     
     # Find all tables on the page
     all_tables = soup.find_all('table')
     print(f"Found {len(all_tables)} tables on {url}")
     
-    # Define consistent headers based on the first table
-    headers = ['StatisticalCode', 'Unit', 'Goods', 'Rate#', 'ReferenceNumber', 'Tariffconcessionorders']
-    
     # Process and combine all tables
     page_data = []
     for table in all_tables:
@@ -58,122 +178,173 @@ def scrape_page(url):
         for row in rows[1:]:
             cols = row.find_all('td')
             
-            # Skip empty rows
-            if not cols:
-                continue
-            
             # Extract data from each column
-            row_data = [col.text.strip().replace('\n', ' ').replace('\r', '') for col in cols]
-            
-            # Skip completely empty rows
-            if not any(row_data):
-                continue
-            
-            # Ensure row_data has the same length as headers
-            if len(row_data) < len(headers):
-                row_data += [''] * (len(headers) - len(row_data))
-            elif len(row_data) > len(headers):
-                row_data = row_data[:len(headers)]
-            
-            page_data.append(row_data)
+            row_data = normalise_row([col.text.strip().replace('\n', ' ').replace('\r', '') for col in cols])
+            if row_data:
+                page_data.append(row_data)
     
     return page_data
 
-# Function to clean the combined DataFrame
+# Function to scrape many pages concurrently, results come back in the order of urls
+def scrape_pages_concurrently(urls, process=None, max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND):
+    process = process or scrape_page
+    rate_limiter = HostRateLimiter(requests_per_second)
+    with create_session(max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # executor.map keeps input order, so rows match the sequential run exactly
+            return list(executor.map(lambda url: process(url, session, rate_limiter), urls))
+
+# Function to load the checkpoint manifest ({url: {"version", "source_hash", "file", "rows"}})
+def load_manifest():
+    if os.path.exists(MANIFEST_FILE):
+        with open(MANIFEST_FILE, 'r') as f:
+            return json.load(f)
+    return {}
+
+# Function to save the manifest without ever leaving a half-written file behind
+def save_manifest(manifest):
+    with open(MANIFEST_FILE + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(MANIFEST_FILE + '.tmp', MANIFEST_FILE)
+
+# Function to name the checkpoint file of a chapter url, e.g. section-i_chapter-1.csv
+def checkpoint_path(url):
+    section, chapter = url.rstrip('/').split('/')[-2:]
+    return os.path.join(CHECKPOINT_DIR, f"{section}_{chapter}.csv")
+
+# Function to scrape and clean one chapter, reusing its checkpoint when the page is unchanged
+def process_chapter(url, session=None, rate_limiter=None, manifest=None):
+    content = fetch_page(url, session, rate_limiter)
+    source_hash = hashlib.sha256(content).hexdigest()
+    path = checkpoint_path(url)
+
+    # A checkpoint is reused only for the same page cleaned by the same version of the code
+    entry = manifest.get(url)
+    if (entry and entry.get('version') == CHECKPOINT_VERSION and entry['source_hash'] == source_hash
+            and os.path.exists(path)):
+        print(f"Unchanged, using checkpoint for {url}")
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+    # Cleaning only looks at one row at a time, so a chapter can be cleaned on its own
+    chapter_df = clean_data(pd.DataFrame(parse_page(content, url), columns=HEADERS))
+    chapter_df.to_csv(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+
+    with manifest_lock:
+        manifest[url] = {'version': CHECKPOINT_VERSION, 'source_hash': source_hash, 'file': path, 'rows': len(chapter_df)}
+        save_manifest(manifest)
+    return chapter_df
+
+# Precompiled patterns used by clean_data
+WHITESPACE_PATTERN = re.compile(r'\s+')
+DASH_PATTERN = re.compile(r'\s*-\s*')
+# Reference number patterns, tried in this priority order
+REFERENCE_PATTERNS = [
+    re.compile(r'(\d{4}\.\d{2}\.\d{2})'),  # xxxx.xx.xx
+    re.compile(r'\b(\d{4})\b'),             # xxxx
+    re.compile(r'\b(\d{4}\.\d{1})\b'),      # xxxx.x
+    re.compile(r'\b(\d{4}\.\d{2})\b'),      # xxxx.xx
+]
+
+# Clean the Reference Number column: first pattern that matches wins
+def extract_reference_numbers(series):
+    result = pd.Series(None, index=series.index, dtype=object)
+    for pattern in REFERENCE_PATTERNS:
+        missing = result.isna()
+        if not missing.any():
+            break
+        result[missing] = series[missing].str.extract(pattern, expand=False)
+
+    # If no specific pattern is found, keep the original text
+    return result.where(result.notna(), series)
+
+# Clean the Goods column
+def clean_goods_text(series):
+    return (
+        series
+        # Replace '=-' with just '-', then other special character combinations
+        .str.replace('=-', '-', regex=False)
+        .str.replace('=', '', regex=False)
+        .str.replace('--', '-', regex=False)
+        # Remove leading/trailing dashes and whitespace
+        .str.strip('- \t')
+        # Normalize spaces around dashes
+        .str.replace(DASH_PATTERN, ' - ', regex=True)
+        # Fix any double spaces created
+        .str.replace(WHITESPACE_PATTERN, ' ', regex=True)
+        .str.strip()
+    )
+
+# Function to run column cleaners once per distinct value and broadcast the result back
+def clean_distinct(series, steps):
+    codes, uniques = pd.factorize(series)
+    cleaned = pd.Series(uniques, dtype=object)
+    for step in steps:
+        cleaned = step(cleaned)
+    values = np.append(cleaned.to_numpy(dtype=object), None)[codes]
+    # Missing values have code -1; they stay as they were (None or NaN)
+    missing = codes == -1
+    values[missing] = series.to_numpy(dtype=object)[missing]
+    return pd.Series(values, index=series.index, dtype=object)
+
+# Function to clean the combined DataFrame, every step works on whole columns
 def clean_data(df):
-    # Clean up general data: replace multiple spaces with a single space
     for col in df.columns:
-        df[col] = df[col].str.replace(r'\s+', ' ', regex=True)
-    
-    # Clean the Reference Number column
-    def extract_reference_number(text):
-        if pd.isna(text) or text == '':
-            return text
-        
-        # Try to find a pattern like xxxx.xx.xx
-        match = re.search(r'\d{4}\.\d{2}\.\d{2}', text)
-        if match:
-            return match.group(0)
-        
-        # Try to find a pattern like xxxx
-        match = re.search(r'\b\d{4}\b', text)
-        if match:
-            return match.group(0)
-        
-        # Try to find a pattern like xxxx.x
-        match = re.search(r'\b\d{4}\.\d{1}\b', text)
-        if match:
-            return match.group(0)
-        
-        # Try to find a pattern like xxxx.xx
-        match = re.search(r'\b\d{4}\.\d{2}\b', text)
-        if match:
-            return match.group(0)
-        
-        # If no specific pattern is found, return the original text
-        return text
-    
-    # Clean the Goods column
-    def clean_goods_text(text):
-        if pd.isna(text) or text == '':
-            return text
-        
-        # Replace '=-' with just '-'
-        text = text.replace('=-', '-')
+        # Clean up general data: replace multiple spaces with a single space
+        steps = [lambda s: s.str.replace(WHITESPACE_PATTERN, ' ', regex=True)]
         
-        # Replace other special character combinations that might appear
-        text = text.replace('=', '')
-        text = text.replace('--', '-')
+        # Apply the cleaning functions to the respective columns
+        if col == 'ReferenceNumber':
+            steps.append(extract_reference_numbers)
+        elif col == 'Goods':
+            steps.append(clean_goods_text)
         
-        # Remove leading/trailing dashes and whitespace
-        text = text.strip('- \t')
-        
-        # Normalize spaces around dashes
-        text = re.sub(r'\s*-\s*', ' - ', text)
-        
-        # Fix any double spaces created
-        text = re.sub(r'\s+', ' ', text).strip()
+        # Trim all string values in the DataFrame
+        if df[col].dtype == 'object':
+            steps.append(lambda s: s.str.strip())
         
-        return text
-    
-    # Apply the cleaning functions to the respective columns
-    df['ReferenceNumber'] = df['ReferenceNumber'].apply(extract_reference_number)
-    df['Goods'] = df['Goods'].apply(clean_goods_text)
+        df[col] = clean_distinct(df[col], steps)
     
     # Remove empty rows without any data across the columns
     df = df.dropna(how='all')
     
-    # Trim all string values in the DataFrame
-    for col in df.columns:
-        if df[col].dtype == 'object':
-            df[col] = df[col].str.strip()
-    
     return df
 
-# Step 1: Generate URLs for all sections and chapters
-urls = generate_urls()
-print(f"Generated {len(urls)} URLs to scrape")
-
-# Step 2: Scrape all pages and combine data
-all_data = []
-for url in urls:
-    print(f"Scraping {url}")
-    page_data = scrape_page(url)
-    all_data.extend(page_data)
-
-# Step 3: Create DataFrame and clean data
-combined_df = pd.DataFrame(all_data, columns=[
-    'StatisticalCode', 'Unit', 'Goods', 'Rate#', 'ReferenceNumber', 'Tariffconcessionorders'
-])
-combined_df = clean_data(combined_df)
-
-# Step 4: Save to CSV
-output_file = "tariff_classification_all_section_found_all_ref.csv"
-combined_df.to_csv(output_file, index=False)
-
-print(f"Combined data from all sections saved to '{output_file}'")
-print(f"Total rows in combined table: {len(combined_df)}")
-
-# Display first 5 rows
-print("\nFirst 5 rows of combined table:")
-print(combined_df.head())
\ No newline at end of file
+if __name__ == "__main__":
+    # Unchanged chapter pages are revalidated with conditional GETs and served from disk
+    http_cache = HTTPCache()
+
+    # Step 1: Generate URLs for all sections and chapters
+    urls = generate_urls()
+    print(f"Generated {len(urls)} URLs to scrape")
+
+    # Step 2: Scrape, clean and checkpoint every chapter
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    manifest = load_manifest()
+    process = partial(process_chapter, manifest=manifest)
+    if CONCURRENT:
+        print(f"Scraping with {MAX_WORKERS} workers, max {REQUESTS_PER_SECOND} requests/s per host")
+        start = time.perf_counter()
+        chapter_frames = scrape_pages_concurrently(urls, process)
+        print(f"Fetched {len(urls)} pages in {time.perf_counter() - start:.1f}s")
+    else:
+        chapter_frames = []
+        for url in urls:
+            print(f"Scraping {url}")
+            chapter_frames.append(process(url))
+
+    print(http_cache.summary())
+
+    # Step 3: Reassemble the chapters in url order
+    combined_df = pd.concat(chapter_frames, ignore_index=True)
+
+    # Step 4: Save to CSV
+    output_file = "tariff_classification_all_section_found_all_ref.csv"
+    combined_df.to_csv(output_file, index=False)
+
+    print(f"Combined data from all sections saved to '{output_file}'")
+    print(f"Total rows in combined table: {len(combined_df)}")
+
+    # Display first 5 rows
+    print("\nFirst 5 rows of combined table:")
+    print(combined_df.head())
\ No newline at end of file
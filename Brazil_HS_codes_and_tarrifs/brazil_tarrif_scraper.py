@@ -1,23 +1,121 @@
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
 import tabula
 import pandas as pd
 import requests
+from pypdf import PdfReader
+
+# Parallel extraction settings
+PARALLEL = True                    # Set to False to extract the page ranges one after another
+MAX_WORKERS = os.cpu_count() or 1  # Number of page ranges extracted at the same time
+PAGES_PER_CHUNK = 25               # Pages handed to each tabula call (bounds tables held in memory)
+USE_JVM_WORKER = True              # tabula's in-process JVM (jpype), started once per process; False starts java per call
 
 # URL of the PDF
 pdf_url = "https://www.gov.br/receitafederal/pt-br/acesso-a-informacao/legislacao/documentos-e-arquivos/tipi.pdf/@@download/file"
-
-# Download the PDF
 pdf_path = "tipi.pdf"
-response = requests.get(pdf_url)
-with open(pdf_path, "wb") as f:
-    f.write(response.content)
+output_csv = "brazil_tarrif.csv"
+
+# Stream the PDF to disk in chunks instead of holding it all in memory
+def download_pdf(url, path, chunk_size=1024 * 1024):
+    with requests.get(url, stream=True) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+
+# Split the document into page ranges like "1-25", "26-50", ...
+def page_ranges(page_count, pages_per_chunk=PAGES_PER_CHUNK):
+    return [
+        f"{start}-{min(start + pages_per_chunk - 1, page_count)}"
+        for start in range(1, page_count + 1, pages_per_chunk)
+    ]
+
+# Extract all tables from one page range (runs in a worker process)
+def extract_page_range(pdf_path, pages):
+    return tabula.read_pdf(pdf_path, pages=pages, multiple_tables=True, force_subprocess=not USE_JVM_WORKER)
+
+# Yield the tables page range by page range, keeping page order
+def iter_tables(pdf_path, parallel=PARALLEL, max_workers=MAX_WORKERS, pages_per_chunk=PAGES_PER_CHUNK):
+    page_count = len(PdfReader(pdf_path).pages)
+    ranges = page_ranges(page_count, pages_per_chunk)
+
+    if not parallel:
+        print(f"Extracting {page_count} pages in {len(ranges)} ranges")
+        for pages in ranges:
+            yield from extract_page_range(pdf_path, pages)
+        return
+
+    print(f"Extracting {page_count} pages in {len(ranges)} ranges with {max_workers} workers")
+    # With USE_JVM_WORKER each worker starts its JVM on its first range and reuses it for the rest
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Only max_workers ranges are submitted at a time, so finished ranges cannot pile up
+        # in memory while the caller is still writing an earlier one. The oldest range is
+        # collected first, so tables keep the same order as pages="all"
+        remaining = iter(ranges)
+        pending = deque(executor.submit(extract_page_range, pdf_path, pages)
+                        for pages in islice(remaining, max_workers))
+        while pending:
+            chunk = pending.popleft().result()
+            for pages in islice(remaining, 1):
+                pending.append(executor.submit(extract_page_range, pdf_path, pages))
+            yield from chunk
+
+# Function to shrink a table to one row that pd.concat treats the same way: concat only
+# looks at each column's dtype and whether the column is empty or all missing, so keep the
+# first non-missing value of every column (or a missing one), or no row for an empty table
+def dtype_sample(table):
+    if table.empty:
+        return table.head(0)
+    columns = {}
+    for i, col in enumerate(table.columns):
+        column = table.iloc[:, i]
+        present = column.notna().to_numpy()
+        position = present.argmax() if present.any() else 0
+        columns[col] = column.iloc[[position]].reset_index(drop=True)
+    return pd.DataFrame(columns, columns=table.columns)
+
+# Work out the columns and dtypes pd.concat would give all tables from their samples
+def combined_dtypes(samples):
+    return pd.concat(samples, ignore_index=True).dtypes
+
+# Write the tables to one CSV while only holding one page range of tables in memory.
+# Tables are spooled to disk first, because the header is the union of every
+# table's columns and is only known once the last page has been extracted.
+def write_tables_to_csv(tables, csv_path):
+    samples = []  # one row per table, see dtype_sample
+    table_count = 0
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        for table in tables:
+            table.to_pickle(os.path.join(spool_dir, f"{table_count}.pkl"))
+            samples.append(dtype_sample(table))
+            table_count += 1
+
+        if not table_count:
+            raise ValueError("No tables found in the PDF")  # pd.concat([]) raised here too
+        dtypes = combined_dtypes(samples)
+        columns = dtypes.index  # union of columns in order of first appearance, like pd.concat
+        pd.DataFrame(columns=columns).to_csv(csv_path, index=False)
+        for i in range(table_count):
+            table = pd.read_pickle(os.path.join(spool_dir, f"{i}.pkl"))
+            table = table.reindex(columns=columns).astype(dtypes)
+            table.to_csv(csv_path, mode="a", header=False, index=False)
 
-# Extract all tables from the PDF
-tables = tabula.read_pdf(pdf_path, pages="all", multiple_tables=True)
+    return table_count
 
-# Combine all tables into a single DataFrame
-combined_df = pd.concat(tables, ignore_index=True)
+if __name__ == "__main__":
+    # Download the PDF
+    download_pdf(pdf_url, pdf_path)
 
-# Save the combined DataFrame to a CSV file
-combined_df.to_csv("brazil_tarrif.csv", index=False)
+    # Extract all tables from the PDF and append them to the CSV as they come in
+    start = time.perf_counter()
+    table_count = write_tables_to_csv(iter_tables(pdf_path), output_csv)
+    print(f"Extracted {table_count} tables in {time.perf_counter() - start:.1f}s")
 
-print("Tables extracted and saved to 'brazil_tarrif.csv'")
\ No newline at end of file
+    print(f"Tables extracted and saved to '{output_csv}'")
@@ -14,12 +14,33 @@ import asyncio
 import nest_asyncio
 from pathlib import Path
 
-# Apply nest_asyncio to allow running async code in environments with existing event loops
-nest_asyncio.apply()
-
 # Constants
 RESULTS_FILE = "tax_id_VAT.json"
+JOURNAL_FILE = "tax_id_VAT.journal.jsonl"  # Results appended since RESULTS_FILE was last rewritten
 LOG_FILE = "scrape_progress.log"
+FLUSH_EVERY = 50            # Append new results to the journal after this many ...
+FLUSH_SECONDS = 10          # ... or after this many seconds, whichever comes first
+COMPACT_EVERY = 1000        # Rewrite RESULTS_FILE and empty the journal after this many journal lines
+POOL_SIZE = 4               # Browser contexts querying tax IDs at the same time
+REQUESTS_PER_SECOND = 2     # Page loads per second across all contexts (0 disables the cap)
+DETAIL_BASE_URL = "https://online.customs.gov.cn/ociswebserver/pages/jckspsl/detail.html"
+QUERY_URL = "https://online.customs.gov.cn/ociswebserver/pages/jckspsl/"
+
+class AsyncRateLimiter:
+    """Space out page loads from all workers to at most requests_per_second"""
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0
+        self.next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        # Reserve the next free slot, then sleep until it comes. Workers share one
+        # event loop, so nothing runs between reading and updating next_slot
+        now = time.monotonic()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        await asyncio.sleep(slot - now)
 
 def setup_logging():
     """Set up logging to file"""
@@ -34,23 +55,118 @@ def log_message(message):
     with open(LOG_FILE, 'a') as f:
         f.write(log_entry)
 
-def load_existing_results():
+def load_existing_results(results_file=RESULTS_FILE):
     """Load existing results from file if it exists"""
-    if os.path.exists(RESULTS_FILE):
+    if os.path.exists(results_file):
         try:
-            with open(RESULTS_FILE, 'r') as f:
+            with open(results_file, 'r') as f:
                 return json.load(f)
         except Exception as e:
             log_message(f"Error loading existing results: {e}")
     return {}
 
-def save_results(results):
-    """Save results to file"""
+def save_results(results, results_file=RESULTS_FILE):
+    """Save results to file, replacing it atomically so a crash never leaves half a file.
+
+    Returns True when the new file is in place, False when saving failed.
+    """
     try:
-        with open(RESULTS_FILE, 'w') as f:
+        with open(results_file + '.tmp', 'w') as f:
             json.dump(results, f, indent=2)
+        os.replace(results_file + '.tmp', results_file)
+        return True
     except Exception as e:
         log_message(f"Error saving results: {e}")
+        return False
+
+class ResultsStore:
+    """Tax ID -> VAT rate results, loaded once and kept in memory.
+
+    New results are appended to a JSON Lines journal in batches (every FLUSH_EVERY
+    results or FLUSH_SECONDS seconds) instead of rewriting RESULTS_FILE each time.
+    A result already recorded with the same value is not journaled again.
+    Every COMPACT_EVERY journal lines, and on close, RESULTS_FILE is rewritten
+    atomically and the journal emptied.
+    """
+    def __init__(self, results_file=RESULTS_FILE, journal_file=JOURNAL_FILE,
+                 flush_every=FLUSH_EVERY, flush_seconds=FLUSH_SECONDS, compact_every=COMPACT_EVERY):
+        self.results_file = results_file
+        self.journal_file = journal_file
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.compact_every = compact_every
+        self.pending = {}
+        self.journal_lines = 0
+        self.last_flush = time.monotonic()
+
+        self.results = load_existing_results(results_file)
+        if os.path.exists(journal_file):
+            # Replay the results saved after the last compaction
+            with open(journal_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # last line cut short by a crash
+                    self.results[entry["tax_id"]] = entry["vat_rate"]
+                    self.journal_lines += 1
+            # Start from a clean journal, with no partial line at the end
+            self.compact()
+
+    def update(self, results):
+        """Add results in memory and flush them once enough are pending"""
+        new_results = {tax_id: vat_rate for tax_id, vat_rate in results.items()
+                       if tax_id not in self.results or self.results[tax_id] != vat_rate}
+        self.results.update(new_results)
+        self.pending.update(new_results)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flush when FLUSH_SECONDS have passed since the last flush"""
+        if time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Append the pending results to the journal"""
+        if self.pending:
+            try:
+                with open(self.journal_file, 'a') as f:
+                    for tax_id, vat_rate in self.pending.items():
+                        f.write(json.dumps({"tax_id": tax_id, "vat_rate": vat_rate}) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.journal_lines += len(self.pending)
+                self.pending = {}
+            except Exception as e:
+                log_message(f"Error saving results: {e}")
+        self.last_flush = time.monotonic()
+        if self.journal_lines >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Rewrite RESULTS_FILE with every result and empty the journal"""
+        if not save_results(self.results, self.results_file):
+            # Keep the journal: it still holds the results RESULTS_FILE is missing
+            return
+        # The journal is only emptied after the new RESULTS_FILE is in place; a crash
+        # in between replays entries that are already in it, which is harmless
+        if os.path.exists(self.journal_file):
+            open(self.journal_file, 'w').close()
+        self.journal_lines = 0
+
+    def close(self):
+        """Flush what is pending and leave everything in RESULTS_FILE"""
+        self.flush()
+        self.compact()
+
+async def flush_periodically(results_store):
+    """Flush the pending results on time while no new results come in (e.g. every worker waits on a page)"""
+    while True:
+        await asyncio.sleep(max(0.0, results_store.last_flush + results_store.flush_seconds - time.monotonic()))
+        results_store.flush_if_due()
 
 def extract_tax_id(hs_code):
     if not isinstance(hs_code, str):
@@ -110,10 +226,11 @@ async def scrape_vat_rates_from_detail_page(page, tax_id, debug_mode=False):
 
     return vat_rate
 
-async def process_results_table(page, original_tax_id, debug_mode=False):
+async def process_results_table(page, original_tax_id, debug_mode=False, detail_page=None, rate_limiter=None, results_store=None):
     results = {}
     results_table_selector = "div#result[style*='display: block'] table#listData"
-    existing_results = load_existing_results()  # Load existing results before processing
+    # Results already known, from the store's in-memory copy or from file
+    existing_results = results_store.results if results_store else load_existing_results()
 
     try:
         # Get all rows in the results table
@@ -148,13 +265,13 @@ async def process_results_table(page, original_tax_id, debug_mode=False):
 
                 if name_attribute:
                     log_message(f"Found name attribute for {tax_id}")
-                    base_detail_url = "https://online.customs.gov.cn/ociswebserver/pages/jckspsl/detail.html"
-                    detail_url = f"{base_detail_url}?id={name_attribute}"
+                    detail_url = f"{DETAIL_BASE_URL}?id={name_attribute}"
                     log_message(f"Navigating to detail URL for {tax_id}")
 
-                    # Open detail page in new tab
-                    context = page.context
-                    new_page = await context.new_page()
+                    # Reuse the worker's detail tab, or open a new tab when there is none
+                    new_page = detail_page or await page.context.new_page()
+                    if rate_limiter:
+                        await rate_limiter.wait()
                     await new_page.goto(detail_url, wait_until="networkidle", timeout=60000)
 
                     # Scrape VAT rate from detail page
@@ -163,13 +280,19 @@ async def process_results_table(page, original_tax_id, debug_mode=False):
                     # Only update results if we got a valid VAT rate
                     if vat_rate not in ["N/A", "Error"]:
                         results[tax_id] = vat_rate
-                        existing_results[tax_id] = vat_rate  # Update in-memory cache
-                        save_results(existing_results)  # Immediate save
+                        if results_store:
+                            # Saved with the next batch; the worker's update of the
+                            # whole query's results does not journal it again
+                            results_store.update({tax_id: vat_rate})
+                        else:
+                            existing_results[tax_id] = vat_rate  # Update in-memory cache
+                            save_results(existing_results)  # Immediate save
                     else:
                         log_message(f"Invalid VAT rate for {tax_id}: {vat_rate}")
 
-                    # Close the detail tab
-                    await new_page.close()
+                    # Close the detail tab unless it is reused for the next row
+                    if new_page is not detail_page:
+                        await new_page.close()
                 else:
                     log_message(f"No detail link found for {tax_id}")
                     results[tax_id] = "Error: No detail link"
@@ -189,14 +312,16 @@ async def process_results_table(page, original_tax_id, debug_mode=False):
 
     return results
 
-async def scrape_vat_rates(page, tax_id, debug_mode=False):
+async def scrape_vat_rates(page, tax_id, debug_mode=False, detail_page=None, rate_limiter=None, results_store=None):
     results_page_html_path = f'results_page_{tax_id}.html'
     screenshot_path = f'error_{tax_id}.png'
     results = {}
 
     try:
         log_message(f"Querying Tax ID: {tax_id}")
-        await page.goto("https://online.customs.gov.cn/ociswebserver/pages/jckspsl/", wait_until="networkidle", timeout=60000)
+        if rate_limiter:
+            await rate_limiter.wait()
+        await page.goto(QUERY_URL, wait_until="networkidle", timeout=60000)
 
         # Input Tax ID
         tax_id_input_selector = "input#dutySpa"
@@ -230,7 +355,7 @@ async def scrape_vat_rates(page, tax_id, debug_mode=False):
             results[tax_id] = "No data found"
         elif await page.locator(results_table_selector).is_visible():
             log_message("Results table found, processing...")
-            results = await process_results_table(page, tax_id, debug_mode)
+            results = await process_results_table(page, tax_id, debug_mode, detail_page, rate_limiter, results_store)
         else:
             raise Exception("Could not determine results status")
 
@@ -246,54 +371,77 @@ async def scrape_vat_rates(page, tax_id, debug_mode=False):
     return results
 
 async def process_tax_ids(valid_tax_ids, run_in_debug_mode=False):
-    all_results = load_existing_results()
+    results_store = ResultsStore()
+    all_results = results_store.results
     processed_ids = set(all_results.keys())
     remaining_ids = [tid for tid in valid_tax_ids if tid not in processed_ids]
 
     log_message(f"Resuming scraping. Already processed: {len(processed_ids)}, Remaining: {len(remaining_ids)}")
 
-    async with async_playwright() as p:
-        browser = None
-        try:
-            browser = await p.chromium.launch(headless=True)
-            log_message("Launched Chromium browser")
-        except Exception as e_chromium:
-            log_message(f"Failed to launch Chromium: {e_chromium}. Trying Firefox.")
+    # Whatever happens to the browser or the workers, leave every result in RESULTS_FILE
+    try:
+        async with async_playwright() as p:
+            browser = None
             try:
-                browser = await p.firefox.launch(headless=True)
-                log_message("Launched Firefox browser")
-            except Exception as e_firefox:
-                log_message(f"Failed to launch Firefox: {e_firefox}. Exiting.")
-                return all_results
-
-        if browser:
-            context = await browser.new_context()
-            page = await context.new_page()
-
-            for i, tax_id in enumerate(remaining_ids, 1):
+                browser = await p.chromium.launch(headless=True)
+                log_message("Launched Chromium browser")
+            except Exception as e_chromium:
+                log_message(f"Failed to launch Chromium: {e_chromium}. Trying Firefox.")
                 try:
-                    log_message(f"Processing {i}/{len(remaining_ids)}: {tax_id}")
-                    results = await scrape_vat_rates(page, tax_id, run_in_debug_mode)
-                    all_results.update(results)
-
-                    # Save progress after each tax ID
-                    save_results(all_results)
-
-                    # Add delay between requests
-                    await asyncio.sleep(2)
-
-                except Exception as e:
-                    log_message(f"Fatal error processing {tax_id}: {e}")
-                    # Save what we have before exiting
-                    save_results(all_results)
-                    break
+                    browser = await p.firefox.launch(headless=True)
+                    log_message("Launched Firefox browser")
+                except Exception as e_firefox:
+                    log_message(f"Failed to launch Firefox: {e_firefox}. Exiting.")
+                    return all_results
+
+            if browser:
+                # Every worker takes the next tax ID from the queue until it is empty
+                queue = asyncio.Queue()
+                for i, tax_id in enumerate(remaining_ids, 1):
+                    queue.put_nowait((i, tax_id))
+                rate_limiter = AsyncRateLimiter(REQUESTS_PER_SECOND)
+                stop = asyncio.Event()
+
+                async def worker(number):
+                    # Own context per worker: one query page and one detail tab, reused for every tax ID
+                    context = await browser.new_context()
+                    page = await context.new_page()
+                    detail_page = await context.new_page()
+                    try:
+                        while not stop.is_set():
+                            try:
+                                i, tax_id = queue.get_nowait()
+                            except asyncio.QueueEmpty:
+                                break
+                            try:
+                                log_message(f"[worker {number}] Processing {i}/{len(remaining_ids)}: {tax_id}")
+                                results = await scrape_vat_rates(page, tax_id, run_in_debug_mode, detail_page,
+                                                                 rate_limiter, results_store)
+
+                                # Save progress (batched, see ResultsStore)
+                                results_store.update(results)
+
+                            except Exception as e:
+                                log_message(f"Fatal error processing {tax_id}: {e}")
+                                # Save what we have and stop the other workers too
+                                results_store.flush()
+                                stop.set()
+                    finally:
+                        await context.close()
+
+                flusher = asyncio.create_task(flush_periodically(results_store))
+                try:
+                    await asyncio.gather(*(worker(number) for number in range(1, min(POOL_SIZE, len(remaining_ids)) + 1)))
+                finally:
+                    flusher.cancel()
 
-            await context.close()
-            await browser.close()
-            log_message("Browser closed.")
-        else:
-            log_message("Failed to launch any browser.")
+                await browser.close()
+                log_message("Browser closed.")
+            else:
+                log_message("Failed to launch any browser.")
 
+    finally:
+        results_store.close()
     return all_results
 
 def run_async_code(valid_tax_ids, run_in_debug_mode=False):
@@ -304,6 +452,8 @@ def run_async_code(valid_tax_ids, run_in_debug_mode=False):
 
     if loop:
         log_message("Running in existing event loop")
+        # Apply nest_asyncio to allow running async code in environments with existing event loops
+        nest_asyncio.apply()
         return loop.run_until_complete(process_tax_ids(valid_tax_ids, run_in_debug_mode))
     else:
         log_message("Running in new event loop")
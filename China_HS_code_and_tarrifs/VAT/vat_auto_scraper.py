@@ -5,45 +5,56 @@ Original file is located at
     https://colab.research.google.com/drive/1LXG71q8ptzfoGsl7ALfENWQG7KPx2GSS
 """
 
-import requests
 from bs4 import BeautifulSoup
 import re
+import html
 from time import sleep
 import pandas as pd
-
-
-url = "https://www.transcustoms.com/HS_tree.htm"
-
-# Fetch the webpage
-response = requests.get(url)
-response.raise_for_status()  # Check for HTTP errors
-
-# Parse HTML
-soup = BeautifulSoup(response.text, 'html.parser')
-
-# Extract all text from the page
-text = soup.get_text()
-
-# Use regex to find all "Heading XXXX" patterns
-hs_headings = re.findall(r'Heading (\d{4}):', text)
-
-# Remove duplicates (if any) and sort
-unique_hs_headings = sorted(list(set(hs_headings)))
-
-print(f"Extracted {len(unique_hs_headings)} unique HS Headings:", unique_hs_headings)
-
-
-
-def scrape_hs_codes_for_heading(heading, max_pages=4):
+import sys
+import os
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for the shared HTTP modules
+from http_cache import HTTPCache
+from http_helpers import HostRateLimiter, create_session, get_with_retries
+
+# Concurrent heading crawl settings
+CONCURRENT = True          # Set to False to crawl the headings one at a time
+MAX_WORKERS = 8            # Number of headings crawled at the same time
+REQUESTS_PER_SECOND = 8    # Cap on new requests to transcustoms.com (0 disables the cap)
+
+# VAT lookup settings
+MAX_RETRIES = 4            # Retries of a VAT page after a 429/5xx answer or a connection error
+BACKOFF_SECONDS = 1.0      # First retry delay, doubled on every further retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REQUEST_TIMEOUT = 30       # Seconds, so a stuck connection cannot hold a worker forever
+OUTPUT_FILE = "hs_codes_vat_rates.csv"
+PARTIAL_FILE = OUTPUT_FILE + ".partial"  # Rows are streamed here, OUTPUT_FILE is only replaced at the end
+PROGRESS_LOG = "vat_progress.jsonl"  # One line per finished code, a rerun after a crash skips them
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# The VAT label cell and the cell after it, searched for directly in the page bytes
+VAT_LABEL_PATTERN = re.compile(rb'<(?i:td)\b[^>]*>Import VAT \(Value-Added Tax\)</(?i:td)\s*>')
+NEXT_CELL_PATTERN = re.compile(rb'<(?i:td)\b[^>]*>(.*?)</(?i:td)\s*>', re.DOTALL)
+TAG_PATTERN = re.compile(rb'<[^>]*>')
+
+
+def scrape_hs_codes_for_heading(heading, max_pages=4, session=None, rate_limiter=None):
     """Scrape HS codes for a given heading across paginated results (pages 0-4)."""
     all_hs_codes = set()
 
     for page in range(max_pages):
         url = f"https://www.transcustoms.com/Hscode/HScode_search.asp?word={heading}&selectT=&page={page}"
-        headers = {"User-Agent": "Mozilla/5.0"}
 
         try:
-            response = requests.get(url, headers=headers)
+            if rate_limiter:
+                rate_limiter.wait(url)
+            response = http_cache.get(url, headers=HEADERS, session=session)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
             page_text = soup.get_text()
@@ -63,47 +74,174 @@ def scrape_hs_codes_for_heading(heading, max_pages=4):
 
     return sorted(all_hs_codes)
 
-# Scrape all HS codes for each heading
-all_hs_codes = []
-for heading in unique_hs_headings:
-    codes = scrape_hs_codes_for_heading(heading)
-    print(f"Heading {heading}: Found {len(codes)} HS codes")
-    all_hs_codes.extend(codes)
-
-# Remove duplicates (optional, if headings overlap)
-final_hs_codes = sorted(list(set(all_hs_codes)))
-print("\nTotal unique HS codes:", len(final_hs_codes))
+# Function to crawl many headings at once; the pages of one heading stay sequential,
+# so a heading still stops at its first empty page
+def scrape_headings_concurrently(headings, max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND):
+    rate_limiter = HostRateLimiter(requests_per_second)
+    with create_session(max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # executor.map keeps input order, so the output matches the sequential run
+            return list(executor.map(
+                lambda heading: scrape_hs_codes_for_heading(heading, session=session, rate_limiter=rate_limiter),
+                headings))
 
 
-
-def fetch_vat_rate(hs_code):
+def fetch_vat_rate(hs_code, session=None, rate_limiter=None):
     """Fetch VAT rate for a single HS code."""
     url = f"https://www.transcustoms.com/China_HS_Code/China_Tariff.asp?HS_Code={hs_code}"
-    headers = {"User-Agent": "Mozilla/5.0"}
 
     try:
-        response = requests.get(url, headers=headers)
+        response = get_with_retries(http_cache.get, url, rate_limiter=rate_limiter, max_retries=MAX_RETRIES,
+                                    backoff_seconds=BACKOFF_SECONDS, retry_statuses=RETRY_STATUSES,
+                                    headers=HEADERS, session=session, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
 
-        vat_label = soup.find("td", text="Import VAT (Value-Added Tax)")
-        if vat_label:
-            return vat_label.find_next("td").text.strip()
-        return "Not Found"
+        # Read the cell straight from the bytes, parse the whole page only when that misses
+        vat_rate = extract_vat_rate_fast(response.content, response.encoding)
+        if vat_rate is None:
+            vat_rate = extract_vat_rate_soup(response.text)
+        return vat_rate
 
     except Exception as e:
         return f"Error: {e}"
 
-# Scrape VAT rates for all HS codes
-results = []
-for i, code in enumerate(final_hs_codes):
-    vat_rate = fetch_vat_rate(code)
-    results.append({"HS_Code": code, "VAT_Rate": vat_rate})
-    print(f"Processed {i+1}/{len(final_hs_codes)}: {code} → {vat_rate}")
-    #sleep(1)  # Avoid rate-limiting
-
-# Export to CSV
-df = pd.DataFrame(results)
-df.to_csv("hs_codes_vat_rates.csv", index=False)
-print("Data saved to 'hs_codes_vat_rates.csv'")
-
+# Function to find the VAT cell with two regex searches on the raw page; returns None
+# when the label is not a plain <td> or the next cell holds a nested table
+def extract_vat_rate_fast(content, encoding=None):
+    label = VAT_LABEL_PATTERN.search(content)
+    if not label:
+        return None
+    cell = NEXT_CELL_PATTERN.search(content, label.end())
+    if not cell or b'<td' in cell.group(1).lower():
+        return None
+    text = TAG_PATTERN.sub(b'', cell.group(1)).decode(encoding or 'utf-8', errors='replace')
+    return html.unescape(text).strip()
+
+# Function to find the VAT cell by parsing the whole page
+def extract_vat_rate_soup(page_text):
+    soup = BeautifulSoup(page_text, 'html.parser')
+
+    vat_label = soup.find("td", text="Import VAT (Value-Added Tax)")
+    if vat_label:
+        return vat_label.find_next("td").text.strip()
+    return "Not Found"
+
+# Function to load the finished codes from the progress log ({hs_code: vat_rate});
+# codes that ended in an error are left out so a rerun tries them again
+def load_progress(path=PROGRESS_LOG):
+    done = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # last line cut short by a crash
+                done[entry["HS_Code"]] = entry["VAT_Rate"]
+    return {code: rate for code, rate in done.items() if not rate.startswith("Error")}
+
+# Function to open the progress log for appending, starting on a fresh line after a crash
+def open_progress_log(path=PROGRESS_LOG):
+    log = open(path, 'a+', encoding='utf-8')
+    if log.tell() > 0:
+        log.seek(log.tell() - 1)
+        if log.read(1) != "\n":
+            log.write("\n")
+    return log
+
+# Function to fetch the VAT rates on a worker pool. Every finished code goes to the
+# progress log and PARTIAL_FILE right away, so a crash loses at most the requests in
+# flight and never touches the OUTPUT_FILE from the last finished run
+def fetch_vat_rates(hs_codes, max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND):
+    results = load_progress()
+    todo = [code for code in hs_codes if code not in results]
+    if results:
+        print(f"Resuming: {len(hs_codes) - len(todo)} codes already done, {len(todo)} left")
+
+    rate_limiter = HostRateLimiter(requests_per_second)
+    start = time.perf_counter()
+    with create_session(max_workers) as session, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open_progress_log() as log, \
+            open(PARTIAL_FILE, 'a' if results else 'w', newline='', encoding='utf-8') as out:
+        writer = csv.DictWriter(out, fieldnames=["HS_Code", "VAT_Rate"])
+        if out.tell() == 0:
+            writer.writeheader()
+
+        futures = {executor.submit(fetch_vat_rate, code, session, rate_limiter): code for code in todo}
+        for i, future in enumerate(as_completed(futures), start=1):
+            code = futures[future]
+            vat_rate = future.result()
+            results[code] = vat_rate
+
+            log.write(json.dumps({"HS_Code": code, "VAT_Rate": vat_rate}) + "\n")
+            log.flush()
+            writer.writerow({"HS_Code": code, "VAT_Rate": vat_rate})
+            out.flush()
+
+            codes_per_second = i / max(time.perf_counter() - start, 1e-9)
+            print(f"Processed {i}/{len(todo)}: {code} → {vat_rate} ({codes_per_second:.1f} codes/s)")
+
+    # Back in the order of hs_codes, the way the sequential loop returned them
+    return [{"HS_Code": code, "VAT_Rate": results[code]} for code in hs_codes]
+
+if __name__ == "__main__":
+    # Pages that have not changed since the last run are served from disk after a 304
+    http_cache = HTTPCache()
+
+    url = "https://www.transcustoms.com/HS_tree.htm"
+
+    # Fetch the webpage
+    response = http_cache.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()  # Check for HTTP errors
+
+    # Parse HTML
+    soup = BeautifulSoup(response.text, 'html.parser')
+
+    # Extract all text from the page
+    text = soup.get_text()
+
+    # Use regex to find all "Heading XXXX" patterns
+    hs_headings = re.findall(r'Heading (\d{4}):', text)
+
+    # Remove duplicates (if any) and sort
+    unique_hs_headings = sorted(list(set(hs_headings)))
+
+    print(f"Extracted {len(unique_hs_headings)} unique HS Headings:", unique_hs_headings)
+
+    # Scrape all HS codes for each heading
+    start = time.perf_counter()
+    if CONCURRENT:
+        codes_per_heading = scrape_headings_concurrently(unique_hs_headings)
+    else:
+        codes_per_heading = [scrape_hs_codes_for_heading(heading) for heading in unique_hs_headings]
+    elapsed = time.perf_counter() - start
+
+    all_hs_codes = []
+    for heading, codes in zip(unique_hs_headings, codes_per_heading):
+        print(f"Heading {heading}: Found {len(codes)} HS codes")
+        all_hs_codes.extend(codes)
+    print(f"Crawled {len(unique_hs_headings)} headings in {elapsed:.1f}s "
+          f"({len(unique_hs_headings) / max(elapsed, 1e-9):.1f} headings/s)")
+
+    # Remove duplicates (optional, if headings overlap)
+    final_hs_codes = sorted(list(set(all_hs_codes)))
+    print("\nTotal unique HS codes:", len(final_hs_codes))
+
+    # Scrape VAT rates for all HS codes
+    results = fetch_vat_rates(final_hs_codes, max_workers=MAX_WORKERS if CONCURRENT else 1)
+
+    print(http_cache.summary())
+
+    # Export to CSV: rewrite the partial file (completion order, rows repeated across
+    # resumed runs) with one row per code in HS code order, then put it in place
+    df = pd.DataFrame(results, columns=["HS_Code", "VAT_Rate"])
+    df.to_csv(PARTIAL_FILE, index=False)
+    os.replace(PARTIAL_FILE, OUTPUT_FILE)
+    print(f"Data saved to '{OUTPUT_FILE}'")
+
+    # Keep the progress log only while some codes still need another try
+    if df["VAT_Rate"].str.startswith("Error").any():
+        print(f"Some codes failed, rerun to retry them ({PROGRESS_LOG} keeps the finished ones)")
+    else:
+        os.remove(PROGRESS_LOG)
@@ -1,206 +1,274 @@
 import tabula
 import pandas as pd
 import numpy as np
+import os
 import re
+import time
+from pypdf import PdfReader
+
+DEBUG_SNAPSHOTS = False  # Save every transform stage's output to SNAPSHOT_DIR as Parquet
+SNAPSHOT_DIR = "snapshots"
+
+# Build an index of the pages whose text carries the tariff table header, so the
+# (slow) lattice extraction can skip notes and annex pages entirely
+def index_tariff_pages(pdf_path, markers=("税则号列", "最惠国税率")):
+    pages = []
+    for number, page in enumerate(PdfReader(pdf_path).pages, start=1):
+        # Header cells are often wrapped over several lines, so compare without whitespace
+        text = re.sub(r'\s+', '', page.extract_text() or '')
+        if all(marker in text for marker in markers):
+            pages.append(number)
+    return pages
 
 #EXTRACT
 
-# Extract tables from the PDF using the stream method
-tables = tabula.read_pdf(
-    "complete_china_data.pdf",
-    pages="all",
-    multiple_tables=True,
-    lattice= True,
-    pandas_options={"header": None}  # Disable automatic header detection
-)
-
-# Filter tables with the specified headers
-target_headers = ["序号", "税则号列", "货品名称", "最惠国税率(%)", "协定税率(%)", "特惠税率(%)", "普通税率(%)"]
-filtered_tables = []
-
-for table in tables:
-    # Check if the table contains the target headers in the first row
-    if all(header in table.iloc[0].values for header in target_headers):
-        # Set the first row as the header and remove it from the data
-        table.columns = table.iloc[0]
-        table = table[1:]
-        # Select columns from the second column onward
-        table = table.iloc[:, 1:]
-        filtered_tables.append(table)
-
-# Concatenate all filtered tables into one DataFrame
-if filtered_tables:
-    combined_table = pd.concat(filtered_tables, ignore_index=True)
-    # Save the combined table to a single CSV file
-    combined_table.to_csv("_combined_china.csv", index=False, encoding="utf-8-sig")
-    print("All tables saved to 'tabula_stream_combined_china.csv'.")
-else:
-    print("No tables with the specified headers were found.")
-
-### LOAD
-
-data = pd.read_csv('_combined_china.csv')
+# Function to extract the tariff tables of the PDF into one DataFrame, header row removed
+def extract_tariff_table(pdf_path):
+    # Pre-scan: find the pages that hold tariff tables
+    stage_start = time.perf_counter()
+    tariff_pages = index_tariff_pages(pdf_path)
+    print(f"Pre-scan: {len(tariff_pages)} pages with tariff headers ({time.perf_counter() - stage_start:.1f}s)")
+    if not tariff_pages:
+        # Text extraction found nothing (e.g. fonts without a unicode map), scan every page instead
+        tariff_pages = "all"
+
+    # Extract tables from the indexed pages using the lattice method
+    stage_start = time.perf_counter()
+    tables = tabula.read_pdf(
+        pdf_path,
+        pages=tariff_pages,
+        multiple_tables=True,
+        lattice= True,
+        pandas_options={"header": None}  # Disable automatic header detection
+    )
+    print(f"Lattice extraction: {len(tables)} tables ({time.perf_counter() - stage_start:.1f}s)")
+
+    # Filter tables with the specified headers
+    target_headers = ["序号", "税则号列", "货品名称", "最惠国税率(%)", "协定税率(%)", "特惠税率(%)", "普通税率(%)"]
+    filtered_tables = []
+
+    stage_start = time.perf_counter()
+    for table in tables:
+        # Check if the table contains the target headers in the first row
+        if all(header in table.iloc[0].values for header in target_headers):
+            # Set the first row as the header and remove it from the data
+            table.columns = table.iloc[0]
+            table = table[1:]
+            # Select columns from the second column onward
+            table = table.iloc[:, 1:]
+            filtered_tables.append(table)
+
+    print(f"Header filter: kept {len(filtered_tables)} tables ({time.perf_counter() - stage_start:.1f}s)")
+
+    # Concatenate all filtered tables into one DataFrame
+    if filtered_tables:
+        return pd.concat(filtered_tables, ignore_index=True)
+    else:
+        raise SystemExit("No tables with the specified headers were found.")
 
 #TRANSFORM
 
-#rename the columns Unnamed: 7, Unnamed: 8 to 'new_col1', 'new_col2'
-data.rename(columns={'Unnamed: 7':'new_col1', 'Unnamed: 8':'new_col2', 'Unnamed: 2' : 
-                     'Preferential_Rate(Agreement rate)_1'}, inplace=True)
+# Every transform below takes a DataFrame and returns one, and the stages are
+# chained in memory by a Pipeline instead of going through CSV files.
+class Pipeline:
+    """Run DataFrame -> DataFrame stages in order, reporting the time and frame size of each stage.
+
+    The size is the output frame's df.memory_usage(deep=True), not the memory
+    used by the process.
+
+    With debug=True each stage's output is also saved to snapshot_dir as Parquet.
+    """
+
+    def __init__(self, name, stages, debug=DEBUG_SNAPSHOTS, snapshot_dir=SNAPSHOT_DIR):
+        self.name = name
+        self.stages = stages
+        self.debug = debug
+        self.snapshot_dir = snapshot_dir
+
+    def run(self, df):
+        for number, (stage_name, stage) in enumerate(self.stages, start=1):
+            start = time.perf_counter()
+            df = stage(df)
+            elapsed = time.perf_counter() - start
+            frame_mb = df.memory_usage(deep=True).sum() / 1e6
+            print(f"[{self.name}] {stage_name}: {elapsed:.2f}s, {len(df)} rows, frame memory_usage {frame_mb:.1f} MB")
+            if self.debug:
+                self.snapshot(number, stage_name, df)
+        return df
+
+    def snapshot(self, number, stage_name, df):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, f"{self.name}_{number:02d}_{stage_name}.parquet")
+        # Parquet needs one type per column, so mixed object columns are stored as text
+        text_columns = {col: 'string' for col in df.columns if df[col].dtype == object}
+        df.astype(text_columns).to_parquet(path)
+
+
+# Values read_csv turns into NaN by default
+CSV_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+# Values read_csv turns into booleans by default
+CSV_BOOL_VALUES = {'True': True, 'TRUE': True, 'true': True, 'False': False, 'FALSE': False, 'false': False}
+
+# The stages used to be joined by CSV files; give the frame the same NaNs and
+# numeric columns a to_csv + read_csv round trip used to give it
+def restore_csv_dtypes(data):
+    df = data.reset_index(drop=True)
+    # Go by position, the raw tables can have several columns with a blank header
+    for i in range(df.shape[1]):
+        values = df.iloc[:, i]
+        if values.dtype == object:
+            # Cells went through the CSV as text
+            values = values.astype(str).where(values.notna(), np.nan)
+            values = values.mask(values.isin(CSV_NA_VALUES), np.nan)
+            try:
+                values = pd.to_numeric(values)
+            except (ValueError, TypeError):
+                # Not numeric: the column stays text, unless it holds only
+                # true/false words (bool, or object with NaNs)
+                bools = values.map(CSV_BOOL_VALUES)
+                if bools.notna().sum() == values.notna().sum() > 0:
+                    values = bools.astype(bool) if bools.notna().all() else bools.astype(object)
+            df.isetitem(i, values)
+    return df
+
 
-#add empty column named 'guard_col'
-data['guard_col1'] = np.nan
-data['guard_col2'] = np.nan
+# English names for the tariff table headers
+COLUMN_NAMES = {
+    "税则号列": "HS_code",
+    "货品名称": "Description",
+    "最惠国税率(%)": "MFN_Rate",
+    "协定税率(%)": "Preferential_Rate(Agreement rate)",
+    "特惠税率(%)": "Preferential_Tariff_Rate(Special_Preferential_Tariff_Rate)",
+    "普通税率(%)": "General_Tariff_Rate",
+}
+
+def name_columns(data):
+    df = restore_csv_dtypes(data)
+    
+    # Blank header cells are named by position, the way read_csv names them
+    df.columns = [
+        COLUMN_NAMES.get(col, col) if isinstance(col, str) and col else f'Unnamed: {i}'
+        for i, col in enumerate(df.columns)
+    ]
+    
+    #rename the columns Unnamed: 7, Unnamed: 8 to 'new_col1', 'new_col2'
+    df = df.rename(columns={'Unnamed: 7':'new_col1', 'Unnamed: 8':'new_col2', 'Unnamed: 2' : 
+                            'Preferential_Rate(Agreement rate)_1'})
+    
+    #add empty column named 'guard_col'
+    df['guard_col1'] = np.nan
+    df['guard_col2'] = np.nan
+    
+    # Convert HS_code column to string
+    df['HS_code'] = df['HS_code'].astype(str)
+    return df
 
-#get me the rows where Unnamed: 7, Unnamed: 8 are not null as dataframe
-data[data['new_col1'].notnull() & data['new_col2'].notnull()]
+# The column repairs below work on whole columns: each rule builds a boolean row
+# mask, and the masked rows are shifted with one slice assignment on a NumPy
+# object array instead of rebuilding a pd.Series per row.
 
+# Last value in HS_code that is really an MFN rate (numeric or X∆Y, e.g. 6∆0)
+LAST_RATE_PATTERN = r'\d+∆\d+|\d+'
+CHINESE_PATTERN = r'[\u4e00-\u9fff]'
 
-# Convert HS_code column to string
-data['HS_code'] = data['HS_code'].astype(str)
+# Function to turn cell values into text while keeping missing cells missing
+def as_text(series):
+    return series.astype(object).where(series.isna(), series.astype(str))
 
-# Function to extract the last numeric value (including values like 6∆0)
-def extract_last_value(value):
-    # Split the row into segments based on whitespace
-    segments = value.strip().split()
-    # Get the last segment
-    last_segment = segments[-1]
-    # Check if the last segment matches the pattern for numeric or X∆Y
-    if re.match(r'^\d+∆\d+$|^\d+$', last_segment):
-        return last_segment
-    return None
+# Function to mark the cells that are strings matching a pattern (NaN never matches)
+def text_mask(series, pattern, **kwargs):
+    return series.astype(object).str.contains(pattern, na=False, **kwargs).to_numpy(dtype=bool)
 
 # Function to shift values to the right and insert the new value
-def shift_and_insert(row):
+def shift_and_insert(data):
+    values = data.to_numpy(dtype=object, copy=True)
     # Extract the last value from HS_code
-    new_value = extract_last_value(row['HS_code'])
-    if new_value:
-        # Shift values to the right, starting from MFN_Rate
-        row_values = row.tolist()
-        # Find the index of MFN_Rate
-        mfn_rate_index = row.index.get_loc('MFN_Rate')
-        # Shift values to the right
-        row_values[mfn_rate_index + 1:] = row_values[mfn_rate_index:-1]
-        # Update MFN_Rate only if a match is found, otherwise keep the existing value
-        row_values[mfn_rate_index] = new_value if new_value is not None else row_values[mfn_rate_index]
-        # Update the row
-        row = pd.Series(row_values, index=row.index)
-    return row
-
-# Apply the shift_and_insert function to each row
-df = data.apply(shift_and_insert, axis=1)
-
-
-# Function to check for Chinese characters
-def contains_chinese(text):
-    if pd.isna(text):
-        return False
-    return bool(re.search(r'[\u4e00-\u9fff]', str(text)))
-
-# Load your data (replace with your actual file)
-# data = pd.read_csv('your_file.csv')
-
-# Find rows with Chinese characters in the specified column
-chinese_rows = data[data['Preferential_Rate(Agreement rate)_1'].apply(contains_chinese)]
-
-# Display the results
-print(f"Found {len(chinese_rows)} rows with Chinese characters:")
-print(chinese_rows)
-
-# If you want to see just the specific column:
-print("\nChinese text found in 'Preferential_Rate(Agreement rate)_1':")
-print(chinese_rows['Preferential_Rate(Agreement rate)_1'].unique())
-
-# Function to check if a value contains Chinese characters
-def contains_chinese(value):
-    if pd.isna(value) or value is None:
-        return False  # Ignore null values
-    # Regex to match Chinese characters
-    return bool(re.search(r'[\u4e00-\u9fff]', value))
+    last_values = data['HS_code'].str.split().str[-1]
+    mask = last_values.str.fullmatch(LAST_RATE_PATTERN).fillna(False).to_numpy(dtype=bool)
+    # Shift values to the right, starting from MFN_Rate, and put the value in MFN_Rate
+    mfn_rate_index = data.columns.get_loc('MFN_Rate')
+    values[mask, mfn_rate_index + 1:] = values[mask, mfn_rate_index:-1]
+    values[mask, mfn_rate_index] = last_values.to_numpy(dtype=object)[mask]
+    return pd.DataFrame(values, index=data.index, columns=data.columns).infer_objects()
+
+# Report the rows with Chinese characters in Preferential_Rate(Agreement rate)_1
+def report_chinese_rows(data):
+    chinese_rows = data[text_mask(data['Preferential_Rate(Agreement rate)_1'], CHINESE_PATTERN)]
+    
+    # Display the results
+    print(f"Found {len(chinese_rows)} rows with Chinese characters:")
+    print(chinese_rows)
+    
+    # If you want to see just the specific column:
+    print("\nChinese text found in 'Preferential_Rate(Agreement rate)_1':")
+    print(chinese_rows['Preferential_Rate(Agreement rate)_1'].unique())
+    return data
 
 # Function to shift row values to the right if Chinese characters are found
-def shift_row(row):
+def shift_row(data):
+    values = data.to_numpy(dtype=object, copy=True)
     # Check if the value in Preferential_Rate(Agreement rate)_1 contains Chinese characters
-    if contains_chinese(row['Preferential_Rate(Agreement rate)_1']):
-        # Get the index of Preferential_Rate(Agreement rate)_1
-        start_index = row.index.get_loc('Preferential_Rate(Agreement rate)_1')
-        # Shift values to the right
-        row_values = row.tolist()
-        row_values[start_index + 1:] = row_values[start_index:-1]
-        # Add null to Preferential_Rate(Agreement rate)_1
-        row_values[start_index] = None
-        # Update the row
-        row = pd.Series(row_values, index=row.index)
-    return row
-
-# Apply the shift_row function to each row
-df2 = df.apply(shift_row, axis=1)
+    mask = text_mask(data['Preferential_Rate(Agreement rate)_1'], CHINESE_PATTERN)
+    # Shift values to the right and add null to Preferential_Rate(Agreement rate)_1
+    start_index = data.columns.get_loc('Preferential_Rate(Agreement rate)_1')
+    values[mask, start_index + 1:] = values[mask, start_index:-1]
+    values[mask, start_index] = None
+    return pd.DataFrame(values, index=data.index, columns=data.columns).infer_objects()
 
 
 def process_data(data):
     # Make a copy of the original data
-    df = df2.copy()
+    df = data.copy()
     
-    # Iterate through each row
-    for index, row in df.iterrows():
-        # Remove whitespace from HS_code
-        hs_code = str(row['HS_code']).strip()
-        
-        # Check if HS_code doesn't contain a decimal number pattern
-        if not re.search(r'\d+\.\d+', hs_code):
-            # Store the original MFN_Rate value if it exists
-            if pd.notna(row['MFN_Rate']):
-                mfn_value = row['MFN_Rate']
-                
-                # Shift values to the right
-                # Move MFN_Rate to Preferential_Rate(Agreement rate)_1
-                df.at[index, 'Preferential_Rate(Agreement rate)_1'] = mfn_value
-                
-                # Set MFN_Rate to null
-                df.at[index, 'MFN_Rate'] = np.nan
+    # Rows whose HS_code has no decimal number pattern but do have an MFN_Rate
+    hs_code = data['HS_code'].astype(str).str.strip()
+    mask = ~hs_code.str.contains(r'\d+\.\d+') & data['MFN_Rate'].notna()
+    
+    # Move MFN_Rate to Preferential_Rate(Agreement rate)_1 and set MFN_Rate to null
+    df.loc[mask, 'Preferential_Rate(Agreement rate)_1'] = data.loc[mask, 'MFN_Rate']
+    df.loc[mask, 'MFN_Rate'] = np.nan
     
     return df
 
-# Apply the transformation
-df2_updated = process_data(df2)
-
 
 #shift columns to the right with MO in Preferential_Rate_1
 # Function to process Preferential_Rate columns
-def process_preferential_rates(data):
+# The MO rows and their values come from `source` (the frame shift_row was given),
+# not from `data` (the shift_row output), where shift_row has already nulled them
+def process_preferential_rates(data, source):
+    df = data.astype({'Preferential_Rate(Agreement rate)': object})
+    pref_rate_1 = source['Preferential_Rate(Agreement rate)_1']
     
-    # Iterate through each row
-    for index, row in df.iterrows():
-        pref_rate_1 = row['Preferential_Rate(Agreement rate)_1']
-        
-        # Check if Preferential_Rate_1 contains "MO" (case insensitive)
-        if pd.notna(pref_rate_1) and re.search(r'MO', str(pref_rate_1), re.IGNORECASE):
-            
-            # Store the original Preferential_Rate_1 value
-            original_value = pref_rate_1
-            
-            # Move the value to Preferential_Rate
-            df2.at[index, 'Preferential_Rate(Agreement rate)'] = original_value
-            
-            # Set Preferential_Rate_1 to null
-            df2.at[index, 'Preferential_Rate(Agreement rate)_1'] = np.nan
+    # Check if Preferential_Rate_1 contains "MO" (case insensitive)
+    mask = pref_rate_1.notna() & pref_rate_1.astype(str).str.contains('MO', case=False)
+    
+    # Move the value to Preferential_Rate and set Preferential_Rate_1 to null
+    df.loc[mask, 'Preferential_Rate(Agreement rate)'] = pref_rate_1[mask]
+    df.loc[mask, 'Preferential_Rate(Agreement rate)_1'] = np.nan
     
-    return df2
+    return df.infer_objects()
 
-# Apply the transformation
-df3 = process_preferential_rates(df2_updated)
+# Function to run shift_row and process_preferential_rates as one stage, since
+# the second one needs the frame from before the first
+def repair_agreement_rates(data):
+    return process_preferential_rates(shift_row(data), data)
 
 
 
-#Remove all Chinese characters
-def remove_chinese_chars(text):
-    """Remove Chinese characters from text using regex"""
-    if pd.isna(text):
-        return text
-    return re.sub(r'[\u4e00-\u9fff\u3400-\u4dbf\U00020000-\U0002a6df\U0002a700-\U0002b73f\U0002b740-\U0002b81f\U0002b820-\U0002ceaf]+', 
-                  '', str(text))
 
-# Columns to process
-columns_to_clean = [
+#Remove all Chinese characters and standalone 'R' markers
+
+# Chinese characters, including the CJK extension blocks
+CHINESE_CHARS_PATTERN = re.compile(r'[\u4e00-\u9fff\u3400-\u4dbf\U00020000-\U0002a6df\U0002a700-\U0002b73f\U0002b740-\U0002b81f\U0002b820-\U0002ceaf]+')
+
+# Regex pattern to match standalone R (case-sensitive)
+STANDALONE_R_PATTERN = re.compile(r'(?:^|\s)R(?:\s|$)|(?:^|\s)R(\W)|(\W)R(?:\s|$)')
+
+# Columns to remove Chinese characters from
+COLUMNS_TO_CLEAN = [
     'HS_code', 'MFN_Rate', 'Preferential_Rate(Agreement rate)_1',
     'Preferential_Rate(Agreement rate)',
     'Preferential_Tariff_Rate(Special_Preferential_Tariff_Rate)',
@@ -208,45 +276,35 @@ columns_to_clean = [
     'guard_col'
 ]
 
-# Apply the cleaning function to each specified column
-for col in columns_to_clean:
-    if col in data.columns:
-        df3[col] = df3[col].apply(remove_chinese_chars)
-
-
+# Keep the punctuation next to the R, otherwise leave a space
+def replace_standalone_R(match):
+    return match.group(1) or match.group(2) or ' '
 
-def remove_standalone_R(df):
+def clean_text_columns(data):
     """
-    Remove all standalone 'R' characters from all columns in the DataFrame using regex.
+    One pass over the columns: remove Chinese characters (COLUMNS_TO_CLEAN only),
+    then remove all standalone 'R' characters, trim, and turn blank cells into NaN.
     Handles cases where 'R' is:
     - At start of string (Rvalue)
     - At end of string (valueR)
     - Surrounded by spaces (value R value)
     - Punctuation cases (value,R,value or value.R.value)
+    Missing cells are skipped instead of being turned into the string 'nan'.
     """
+    df = data.copy()
     
-    # Regex pattern to match standalone R (case-sensitive)
-    pattern = r'(?:^|\s)R(?:\s|$)|(?:^|\s)R(\W)|(\W)R(?:\s|$)'
-    
-    # Iterate through all columns
-    for col in df3.columns:
-        # Apply regex substitution
-        df3[col] = df3[col].apply(
-            lambda x: re.sub(pattern, 
-                           lambda m: m.group(1) if m.group(1)
-                           else (m.group(2) if m.group(2) 
-                           else ' '), 
-                           str(x))
-        )
-        # Clean up any double spaces created
-        df3[col] = df3[col].str.replace(r'\s+', ' ').str.strip()
+    for col in df.columns:
+        # Numbers become text like before, NaN/None stay missing
+        text = as_text(df[col])
+        
+        if col in COLUMNS_TO_CLEAN:
+            text = text.str.replace(CHINESE_CHARS_PATTERN, '', regex=True)
+        text = text.str.replace(STANDALONE_R_PATTERN, replace_standalone_R, regex=True).str.strip()
+        
         # Convert empty strings to NaN
-        df3[col] = df3[col].replace({'': np.nan})
+        df[col] = text.mask(text == '')
     
-    return df3
-
-# Apply the cleaning function to your DataFrame
-df3_updated = remove_standalone_R(df3)
+    return df
 
 
 
@@ -254,79 +312,62 @@ def shift_rows_left(data):
     """
     When both Preferential_Rate columns contain numbers, shift other columns left (except HS_code)
     """
-    df = data.copy()
+    values = data.to_numpy(dtype=object, copy=True)
     
-    # Columns to check for numbers
-    pref_cols = [
-        'Preferential_Rate(Agreement rate)_1',
-        'Preferential_Rate(Agreement rate)'
-    ]
+    # Check if both preferential columns contain numbers
+    both_numeric = np.ones(len(data), dtype=bool)
+    for col in ['Preferential_Rate(Agreement rate)_1', 'Preferential_Rate(Agreement rate)']:
+        numeric = data[col].notna() & data[col].astype(str).str.match(r'^[+-]?\d*\.?\d+$')
+        both_numeric &= numeric.to_numpy(dtype=bool)
     
-    # Columns that can be shifted (all except HS_code)
-    shift_cols = [col for col in df.columns if col != 'HS_code']
-    
-    for index, row in df.iterrows():
-        # Check if both preferential columns contain numbers
-        both_numeric = all(
-            pd.notna(row[col]) and 
-            re.match(r'^[+-]?\d*\.?\d+$', str(row[col]))
-            for col in pref_cols
-        )
-        
-        if both_numeric:
-            # Get values from shiftable columns
-            values = row[shift_cols].tolist()
-            
-            # Shift left by one position (first value gets dropped)
-            shifted_values = values[1:] + [np.nan]
-            
-            # Update the row (except HS_code)
-            for i, col in enumerate(shift_cols):
-                df.at[index, col] = shifted_values[i]
+    # Shift left by one position over all columns except HS_code (first value gets dropped)
+    shift_index = [i for i, col in enumerate(data.columns) if col != 'HS_code']
+    shifted = values[np.ix_(both_numeric, shift_index)]
+    shifted[:, :-1] = shifted[:, 1:]
+    shifted[:, -1] = np.nan
+    values[np.ix_(both_numeric, shift_index)] = shifted
     
-    return df
-
-# Apply the transformation
-df4 = shift_rows_left(df3_updated)
+    return pd.DataFrame(values, index=data.index, columns=data.columns)
 
 
-df4.to_csv('review_data.csv', index=False)
+# Number of trailing columns the tariff rates are spread over after the repairs
+TEXTJOIN_COLUMN_COUNT = 4
 
-
-### Used TEXTJOIN on excel to join tarrifs(last 4 columns) before proceeding to run code below
-
-
-clean_V1 = pd.read_csv('review_data.csv')
-
-# Create three new columns initialized with NaN
-clean_V1['preferential_Tariff_Rate(Special_Preferential_Tariff_Rate)'] = np.nan
-clean_V1['class'] = np.nan
-clean_V1['General_Tariff_Rate'] = np.nan
-
-# Iterate through each row
-for index, row in clean_V1.iterrows():
-    values = str(row['new_column_with_4_last_columns']).split()  # Split by space
+# Function to join the last columns into one text column, like Excel's TEXTJOIN(" ", TRUE, ...)
+def join_last_columns(data, count=TEXTJOIN_COLUMN_COUNT):
+    df = data.copy()
+    last_columns = [as_text(df.iloc[:, i]) for i in range(-count, 0)]
     
-    if len(values) == 3:
-        # Case with 3 values
-        clean_V1.at[index, 'preferential_Tariff_Rate(Special_Preferential_Tariff_Rate)'] = values[0]
-        clean_V1.at[index, 'class'] = values[1]
-        clean_V1.at[index, 'General_Tariff_Rate'] = values[2]
-    elif len(values) == 1:
-        # Case with single value
-        clean_V1.at[index, 'class'] = values[0]
-
-
-
-# Process 'hs_code' column
-clean_V1['HS_CODE'] = clean_V1['HS_code'].astype(str).str.split().str[0]
-
+    # Empty cells are skipped: na_rep='' leaves doubled spaces, which are squeezed out
+    joined = last_columns[0].str.cat(last_columns[1:], sep=' ', na_rep='')
+    joined = joined.str.replace(r'\s+', ' ', regex=True).str.strip()
+    df['new_column_with_4_last_columns'] = joined.mask(joined == '')
+    return df
 
-clean_V1.to_csv('review_data2.csv', index=False)
 
+def split_tariff_rates(data):
+    clean_V1 = data.copy()
+    
+    # Split by space, one column per value (rows with fewer values are padded with None)
+    parts = as_text(clean_V1['new_column_with_4_last_columns']).str.split(expand=True)
+    value_counts = parts.notna().sum(axis=1)
+    parts = parts.reindex(columns=range(3))
+    
+    # Case with 3 values: special preferential rate, class, general rate
+    three_values = value_counts == 3
+    # Case with single value: class only
+    single_value = value_counts == 1
+    
+    # Every other row gets NaN in the three new columns
+    clean_V1['preferential_Tariff_Rate(Special_Preferential_Tariff_Rate)'] = parts[0].where(three_values)
+    clean_V1['class'] = parts[1].where(three_values, parts[0].where(single_value))
+    clean_V1['General_Tariff_Rate'] = parts[2].where(three_values)
+    
+    # Process 'hs_code' column
+    clean_V1['HS_CODE'] = clean_V1['HS_code'].astype(str).str.split().str[0]
+    return clean_V1
 
 
-data_v2 = pd.read_csv('review_data2.csv')
 def process_hs_code(data):
     """
     Process HS_code column to extract decimal values and shift rates when conditions are met:
@@ -348,7 +389,7 @@ def process_hs_code(data):
             decimal_value = hs_values[-1]
             
             # Check if Preferential_Rate(Agreement rate)_1 is empty/NaN
-            if pd.isna(row['Preferential_Rate(Agreement rate_1']) or row['Preferential_Rate(Agreement rate_1'] == '':
+            if pd.isna(row['Preferential_Rate(Agreement rate)_1']) or row['Preferential_Rate(Agreement rate)_1'] == '':
                 # Store original MFN_Rate
                 original_mfn = row['MFN_Rate']
                 
@@ -356,19 +397,11 @@ def process_hs_code(data):
                 df.at[index, 'MFN_Rate'] = decimal_value
                 
                 # Move original MFN_Rate to Preferential_Rate(Agreement rate)_1
-                df.at[index, 'Preferential_Rate(Agreement rate_1'] = original_mfn
+                df.at[index, 'Preferential_Rate(Agreement rate)_1'] = original_mfn
     
     return df
 
-# Apply the transformation
-V4_ = process_hs_code(data_v2)
-                      
-                      
 
-V4_.to_csv('review_data3.csv', index=False)
-
-
-data_v5 = pd.read_csv('review_data3.csv')
 def remove_ex_rows(df):
     """
     Remove rows where HS_code values start with 'ex' (case insensitive)
@@ -379,21 +412,9 @@ def remove_ex_rows(df):
     # Apply the mask to filter the dataframe
     filtered_df = df[mask].copy()
     
-    return filtered_df
-
-# Apply the transformation
-filtered_data = remove_ex_rows(data_v5)
-
-# Optional: Reset index if needed
-v5_ = filtered_data.reset_index(drop=True)
-
+    return filtered_df.reset_index(drop=True)
 
-#save new version
-v5_.to_csv('review_data4.csv', index=False)
 
-
-
-data_v6 = pd.read_csv('review_data4.csv')
 def remove_non_alphanumeric_rows(df):
     """
     Remove rows that don't contain any letters (a-z, A-Z) or digits (0-9) across all columns.
@@ -411,19 +432,35 @@ def remove_non_alphanumeric_rows(df):
     # Filter the dataframe
     filtered_df = df[mask].copy()
     
-    return filtered_df
-
-# Apply the transformation
-cleaned_data = remove_non_alphanumeric_rows(data_v6)
-
-# Optional: Reset index
-v6_ = cleaned_data.reset_index(drop=True)
-
-v6_.to_csv('clean_7_1.csv')
-
-
-
-
+    return filtered_df.reset_index(drop=True)
+
+
+# Column repairs, then the rate join/split that used to be done by hand in Excel
+# (TEXTJOIN over the last 4 columns), then the final clean-up.
+# process_data is not a stage: its result was never used by the steps after it.
+# restore_csv_dtypes stands in for the CSV files that used to sit between these stages
+STAGES = [
+    ('name_columns', name_columns),
+    ('report_chinese_rows', report_chinese_rows),
+    ('shift_and_insert', shift_and_insert),
+    ('repair_agreement_rates', repair_agreement_rates),
+    ('clean_text_columns', clean_text_columns),
+    ('shift_rows_left', shift_rows_left),
+    ('join_last_columns', join_last_columns),
+    ('restore_csv_dtypes', restore_csv_dtypes),
+    ('split_tariff_rates', split_tariff_rates),
+    ('restore_csv_dtypes', restore_csv_dtypes),
+    ('process_hs_code', process_hs_code),
+    ('restore_csv_dtypes', restore_csv_dtypes),
+    ('remove_ex_rows', remove_ex_rows),
+    ('restore_csv_dtypes', restore_csv_dtypes),
+    ('remove_non_alphanumeric_rows', remove_non_alphanumeric_rows),
+]
 
+if __name__ == "__main__":
+    pdf_path = "complete_china_data.pdf"
 
+    combined_table = extract_tariff_table(pdf_path)
+    v6_ = Pipeline('china', STAGES).run(combined_table)
 
+    v6_.to_csv('clean_7_1.csv')
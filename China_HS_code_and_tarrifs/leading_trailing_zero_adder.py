@@ -1,33 +1,14 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 
-df = pd.read_csv('clean_V7_1.csv')
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for hs_codes
+from hs_codes import normalize_hs_codes
 
-def reformat_hs_code(hs_code):
-    # Handle empty/missing cases
-    if pd.isna(hs_code) or str(hs_code).strip() in ['""', '']:
-        return '""'  # Return empty quoted string
-    
-    # Remove existing quotes and whitespace
-    code = str(hs_code).strip().strip('"')
-    
-    # Handle cases where code might be empty after stripping
-    if not code:
-        return '""'
-    
-    # Split into parts
-    if '.' in code:
-        left, right = code.split('.', 1)  # Split on first dot only
-    else:
-        # If no dot, split into 4+4 digits (or whatever available)
-        left = code[:4]
-        right = code[4:] if len(code) > 4 else ''
-    
-    # Pad with zeros
-    left = left.zfill(4)[:4]  # Exactly 4 digits with leading zeros
-    right = right.ljust(4, '0')[:4]  # Exactly 4 digits with trailing zeros
-    
-    # Return with quotes
-    return f'"{left}.{right}"'
+# Function to reformat HS codes as quoted "XXXX.XXXX" strings (empty codes become "")
+def reformat_hs_codes(hs_codes):
+    return '"' + normalize_hs_codes(hs_codes).fillna('') + '"'
 
 def process_data(df):
     # Identify rows where all other columns are empty
@@ -39,10 +20,11 @@ def process_data(df):
         (df[other_columns].astype(str) == '').all(axis=1))
     
     # Apply reformatting only to non-empty rows
-    df.loc[~empty_rows, 'HS_CODE'] = df.loc[~empty_rows, 'HS_CODE'].apply(reformat_hs_code)
+    df.loc[~empty_rows, 'HS_CODE'] = reformat_hs_codes(df.loc[~empty_rows, 'HS_CODE'])
     
     return df
 
-# Example usage:
-df = process_data(df)
-df.to_csv('clean_V7_1_.csv', index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    df = pd.read_csv('clean_V7_1.csv')
+    df = process_data(df)
+    df.to_csv('clean_V7_1_.csv', index=False)
\ No newline at end of file
@@ -2,53 +2,119 @@ import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import re
-
-def scrape_customs_data():
-    base_url = "https://customs.gov.eg/Services/Tarif?page={}&type=1&chapterId={}"
-    data = []
-
-    for chapter in range(1, 4):  # Chapters 1-99
-        for page in range(1, 10):   # Pages 1-100 (stops if no data)
-            url = base_url.format(page, chapter)
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Find the table with tariff data
-            table = soup.find('table', {'class': 'table'})
-            if not table:
-                break  # No table found, exit page loop
-
-            rows = table.find_all('tr')[1:]  # Skip header row
-            if not rows:
-                break  # No data rows, exit page loop
-
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 2:  # Ensure 'Text of the item' and 'Item' exist
-                    #text_of_item = cols[1].get_text(strip=True)
-                    item = cols[0].get_text(strip=True).replace('/', '')
-
-                    if item:#text_of_item or item  # Only append if data exists
-                        data.append({
-                            'Chapter': chapter,
-                            'Page': page,
-                            #'Text of the item': text_of_item,
-                            'Item': item
-                        })
-            print(f"Chapter {chapter}, Page {page} - Scraped {len(rows)} items")
-
-    return pd.DataFrame(data)
-
-# Run the scraper
-df_customs = scrape_customs_data()
-df_customs.head()
-
-
-
-def scrape_fei_data(hscode):
+import sys
+import os
+import json
+import sqlite3
+import threading
+import time
+import asyncio
+import io
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared HTTP modules
+from http_cache import HTTPCache
+from http_helpers import create_session, get_with_retries_async
+
+sys.path.append(str(Path(__file__).resolve().parent))  # this folder, for the shared customs crawler
+from customs_listing import ListingError, scrape_customs_data
+
+try:
+    from lxml import etree  # single-pass FEI page parser
+except ImportError:
+    etree = None  # fall back to BeautifulSoup
+
+# FEI enrichment settings
+FEI_URL = "http://www.fei.org.eg/tariff/tariff.php?hscode={}&keywords=&submit=#"
+MAX_WORKERS = 8            # FEI lookups running at the same time
+MAX_RETRIES = 4            # Retries of an FEI page after a 429/5xx answer or a connection error
+BACKOFF_SECONDS = 1.0      # First retry delay, doubled on every further retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REQUEST_TIMEOUT = 20       # Seconds, so a stuck connection cannot hold a worker forever
+PROGRESS_EVERY = 10        # Print progress after this many finished codes
+
+FEI_FIELDS = {'Unit', 'Custom Fee', 'VAT', 'Product Type'}  # Fields read from the span6 content divs
+
+# FEI lookups by 6-digit prefix: every 10-digit code under one subheading gets the same page
+PREFIX_CACHE_FILE = "fei_prefix_cache.sqlite"  # Kept until the FEI loop finishes, so a rerun after a crash reuses it
+PREFIX_CACHE_SIZE = 1024                        # Prefix results held in memory, older ones are read back from disk
+
+# Incremental refresh: only new or changed items are looked up on FEI again
+INCREMENTAL = True                                 # Set to False to rebuild the whole dataset
+DATASET_FILE = "egyptian_tariff_data_final_version.csv"
+STATE_FILE = "egypt_refresh_state.sqlite"          # Last crawl snapshot and the lookups of an unfinished run
+FEI_COLUMNS = ['Description', 'Unit', 'Custom Fee', 'VAT', 'Product Type', 'Agreement details']
+
+
+# Cache of the parsed FEI result of each 6-digit prefix: an in-memory LRU in front of a
+# SQLite table, so each prefix page is fetched and parsed once per run
+class PrefixCache:
+    def __init__(self, path=PREFIX_CACHE_FILE, maxsize=PREFIX_CACHE_SIZE):
+        self.path = path
+        self.maxsize = maxsize
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS prefix_results (prefix TEXT PRIMARY KEY, result TEXT NOT NULL)")
+        self.db.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, prefix, result):
+        self.memory[prefix] = result
+        self.memory.move_to_end(prefix)
+        if len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def get(self, prefix):
+        with self.lock:
+            if prefix in self.memory:
+                self.memory.move_to_end(prefix)
+                self.memory_hits += 1
+                return self.memory[prefix]
+            row = self.db.execute("SELECT result FROM prefix_results WHERE prefix = ?", (prefix,)).fetchone()
+            if row:
+                result = json.loads(row[0])
+                self._remember(prefix, result)
+                self.disk_hits += 1
+                return result
+            self.misses += 1
+            return None
+
+    def put(self, prefix, result):
+        with self.lock:
+            self._remember(prefix, result)
+            self.db.execute("INSERT OR REPLACE INTO prefix_results VALUES (?, ?)", (prefix, json.dumps(result)))
+            self.db.commit()
+
+    def summary(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        rate = hits / lookups if lookups else 0
+        return (f"FEI prefix cache: {hits}/{lookups} lookups served from cache ({rate:.1%}, "
+                f"{self.memory_hits} memory, {self.disk_hits} disk), {hits} requests saved")
+
+    def close(self, remove=False):
+        self.db.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def scrape_fei_data(hscode, session=None):
     # First try with 6-digit code
     hscode_6digit = str(hscode)[:6] if len(str(hscode)) >= 6 else str(hscode)
-    result_6digit = scrape_fei_with_code(hscode, hscode_6digit)
+    async with prefix_locks[hscode_6digit]:
+        cached = prefix_cache.get(hscode_6digit)
+        if cached is not None:
+            result_6digit = dict(cached, Original_HS_Code=hscode)
+        else:
+            result_6digit = await scrape_fei_with_code(hscode, hscode_6digit, session)
+            # Failed requests are not cached, the next code under this prefix tries again
+            if result_6digit['VAT'] != 'ERROR':
+                prefix_cache.put(hscode_6digit, result_6digit)
 
     # Check conditions for retrying with full code:
     # 1. If all fields are N/A (original condition)
@@ -65,7 +131,7 @@ def scrape_fei_data(hscode):
     # If either condition is met and code is longer than 6 digits, try with full code
     if len(str(hscode)) > 6 and (all_na or vat_na_but_others_have_data):
         print(f"Retrying with full code {hscode} (condition: {'all N/A' if all_na else 'VAT N/A with other data'})")
-        result_full = scrape_fei_with_code(hscode, hscode)
+        result_full = await scrape_fei_with_code(hscode, hscode, session)
 
         # Only use full code results if we got something better
         if not all(val == 'N/A' for key, val in result_full.items()
@@ -78,69 +144,17 @@ def scrape_fei_data(hscode):
 
     return result_6digit
 
-def scrape_fei_with_code(original_hscode, lookup_code):
-    url = f"http://www.fei.org.eg/tariff/tariff.php?hscode={lookup_code}&keywords=&submit=#"
+async def scrape_fei_with_code(original_hscode, lookup_code, session=None):
+    url = FEI_URL.format(lookup_code)
 
     try:
-        response = requests.get(url, timeout=20)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        result = {
-            'Description': 'N/A',
-            'Unit': 'N/A',
-            'Custom Fee': 'N/A',
-            'VAT': 'N/A',
-            'Product Type': 'N/A',
-            'Agreement details': 'N/A',
-            'HS_6digit': lookup_code[:6] if len(lookup_code) >= 6 else lookup_code,
-            'Original_HS_Code': original_hscode
-        }
-
-        # EXTRACT DESCRIPTION
-        desc_div = soup.find('div', class_='span12 content')
-        if desc_div:
-            desc_strong = desc_div.find('strong', string='Description: ')
-            if desc_strong:
-                # Get all text after the Description strong tag
-                desc_text = ''.join(desc_strong.find_next_siblings(string=True)).strip()
-                result['Description'] = desc_text
-
-        # EXTRACT ALL SPAN6 CONTENT DIVS
-        content_divs = soup.find_all('div', class_='span6 content')
-        for div in content_divs:
-            strong_tag = div.find('strong')
-            if strong_tag:
-                key = strong_tag.get_text(strip=True).replace(':', '')
-                value = ''.join(strong_tag.find_next_siblings(string=True)).strip()
-
-                if key == 'Unit':
-                    result['Unit'] = value
-                elif key == 'Custom Fee':
-                    result['Custom Fee'] = value
-                elif key == 'VAT':
-                    result['VAT'] = value
-                elif key == 'Product Type':
-                    result['Product Type'] = value
-
-        # EXTRACT AGREEMENTS
-        agreements = []
-        try:
-            agreements_header = soup.find('p', class_='agree') or soup.find('strong', string='Agreements:')
-            if agreements_header:
-                agreements_table = agreements_header.find_next('div', class_='row deals')
-                if agreements_table:
-                    agreement_divs = agreements_table.find_all('div', class_='span6')
-                    for i in range(2, len(agreement_divs), 2):
-                        if i + 1 < len(agreement_divs):
-                            agreement = agreement_divs[i].get_text(strip=True)
-                            rate = agreement_divs[i+1].get_text(strip=True)
-                            agreements.append(f"{agreement}: {rate}")
-                    if agreements:
-                        result['Agreement details'] = " | ".join(agreements)
-        except Exception as e:
-            print(f"Agreement error for {lookup_code}: {str(e)}")
-
-        return result
+        # Transient failures are retried with exponential backoff, without holding a thread while waiting
+        response = await get_with_retries_async(http_cache.get, url, max_retries=MAX_RETRIES,
+                                                backoff_seconds=BACKOFF_SECONDS, retry_statuses=RETRY_STATUSES,
+                                                session=session, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        # Parsing is CPU work, keep it off the event loop
+        return await asyncio.to_thread(parse_fei_page, response.text, original_hscode, lookup_code)
 
     except requests.exceptions.RequestException as e:
         print(f"Request failed for {lookup_code}: {str(e)}")
@@ -155,35 +169,346 @@ def scrape_fei_with_code(original_hscode, lookup_code):
             'Original_HS_Code': original_hscode
         }
 
-# Assuming df_customs is your input DataFrame containing HS codes in 'Item' column
-# FULL PROCESSING
-print("\nStarting full scraping with fallback to 10-digit...")
-fei_data = []
-
-for i, hscode in enumerate(df_customs['Item'].unique()):
-    if i % 10 == 0:
-        print(f"Processing {i} of {len(df_customs['Item'].unique())} HS Codes...")
-    fei_data.append(scrape_fei_data(hscode))
-
-# CREATE FINAL DATAFRAME
-df_fei = pd.DataFrame(fei_data)
-
-# Merge with original data
-df_final = pd.merge(
-    df_customs,
-    df_fei,
-    left_on='Item',
-    right_on='Original_HS_Code',
-    how='left'
-).drop(['Original_HS_Code', 'HS_6digit'], axis=1)
-
-# Add quotes around Item values
-df_final['Item'] = df_final['Item'].apply(lambda x: f'"{x}"')
-
-# SAVE RESULTS
-df_final.to_csv('egyptian_tariff_data_with_fallb.csv', index=False, quoting=1)
-print("\nScraping complete with fallback logic!")
-
-# Display sample
-print("\nSample data:")
-df_final.head()
\ No newline at end of file
+# Text of an element with every piece stripped and joined, like get_text(strip=True)
+def stripped_text(element):
+    return ''.join(text.strip() for text in element.itertext())
+
+# Text nodes after an element inside its parent, like find_next_siblings(string=True)
+def following_text(element):
+    parts = [element.tail or '']
+    for sibling in element.itersiblings():
+        if sibling.tag is etree.Comment:
+            parts.append(sibling.text or '')  # BeautifulSoup counts comments as strings here
+        parts.append(sibling.tail or '')
+    return ''.join(parts).strip()
+
+# Class attribute with its whitespace normalised, compared the way BeautifulSoup's class_ does
+def css_class(element):
+    return ' '.join((element.get('class') or '').split())
+
+# Function to parse an FEI detail page in a single streaming pass. The span12/span6
+# content divs, the agreements header and the "row deals" div after it are picked up as
+# the parser reaches them, then read once the page is parsed
+def parse_fei_page(page_html, original_hscode, lookup_code):
+    if etree is None:
+        return parse_fei_page_soup(page_html, original_hscode, lookup_code)
+
+    result = {
+        'Description': 'N/A',
+        'Unit': 'N/A',
+        'Custom Fee': 'N/A',
+        'VAT': 'N/A',
+        'Product Type': 'N/A',
+        'Agreement details': 'N/A',
+        'HS_6digit': lookup_code[:6] if len(lookup_code) >= 6 else lookup_code,
+        'Original_HS_Code': original_hscode
+    }
+
+    description_div = None
+    content_divs = []
+    agree_paragraph = agree_strong = None
+    deals_after_paragraph = deals_after_strong = None
+
+    try:
+        for event, element in etree.iterparse(io.BytesIO(page_html.encode('utf-8')), events=('start', 'end'),
+                                              tag=('div', 'p', 'strong'), html=True, encoding='utf-8'):
+            if element.tag == 'strong':
+                # Text is only complete at the end tag
+                if event == 'end' and agree_strong is None and len(element) == 0 and element.text == 'Agreements:':
+                    agree_strong = element
+            elif event == 'end':
+                continue
+            elif element.tag == 'p':
+                if agree_paragraph is None and 'agree' in css_class(element).split():
+                    agree_paragraph = element
+            else:
+                div_class = css_class(element)
+                if div_class == 'span6 content':
+                    content_divs.append(element)
+                elif div_class == 'span12 content' and description_div is None:
+                    description_div = element
+                elif div_class == 'row deals':
+                    if agree_paragraph is not None and deals_after_paragraph is None:
+                        deals_after_paragraph = element
+                    if agree_strong is not None and deals_after_strong is None:
+                        deals_after_strong = element
+    except etree.XMLSyntaxError:
+        pass  # Empty page
+
+    # EXTRACT DESCRIPTION (from the first description div only)
+    if description_div is not None:
+        for strong_tag in description_div.iter('strong'):
+            if len(strong_tag) == 0 and strong_tag.text == 'Description: ':
+                result['Description'] = following_text(strong_tag)
+                break
+
+    # EXTRACT UNIT / CUSTOM FEE / VAT / PRODUCT TYPE (a later div overrides an earlier one)
+    for div in content_divs:
+        strong_tag = next(div.iter('strong'), None)
+        if strong_tag is not None:
+            key = stripped_text(strong_tag).replace(':', '')
+            if key in FEI_FIELDS:
+                result[key] = following_text(strong_tag)
+
+    # EXTRACT AGREEMENTS: a <p class="agree"> header wins over an "Agreements:" <strong>
+    agreements_table = deals_after_paragraph if agree_paragraph is not None else deals_after_strong
+    if agreements_table is not None:
+        cells = [stripped_text(div) for div in agreements_table.iter('div')
+                 if 'span6' in css_class(div).split()]
+        # The first pair is the Agreement / Rate header
+        agreements = [f"{cells[i]}: {cells[i + 1]}" for i in range(2, len(cells) - 1, 2)]
+        if agreements:
+            result['Agreement details'] = " | ".join(agreements)
+
+    return result
+
+# Function to parse an FEI detail page with BeautifulSoup (used when lxml is not installed)
+def parse_fei_page_soup(page_html, original_hscode, lookup_code):
+    soup = BeautifulSoup(page_html, 'html.parser')
+
+    result = {
+        'Description': 'N/A',
+        'Unit': 'N/A',
+        'Custom Fee': 'N/A',
+        'VAT': 'N/A',
+        'Product Type': 'N/A',
+        'Agreement details': 'N/A',
+        'HS_6digit': lookup_code[:6] if len(lookup_code) >= 6 else lookup_code,
+        'Original_HS_Code': original_hscode
+    }
+
+    # EXTRACT DESCRIPTION
+    desc_div = soup.find('div', class_='span12 content')
+    if desc_div:
+        desc_strong = desc_div.find('strong', string='Description: ')
+        if desc_strong:
+            # Get all text after the Description strong tag
+            desc_text = ''.join(desc_strong.find_next_siblings(string=True)).strip()
+            result['Description'] = desc_text
+
+    # EXTRACT ALL SPAN6 CONTENT DIVS
+    content_divs = soup.find_all('div', class_='span6 content')
+    for div in content_divs:
+        strong_tag = div.find('strong')
+        if strong_tag:
+            key = strong_tag.get_text(strip=True).replace(':', '')
+            value = ''.join(strong_tag.find_next_siblings(string=True)).strip()
+
+            if key == 'Unit':
+                result['Unit'] = value
+            elif key == 'Custom Fee':
+                result['Custom Fee'] = value
+            elif key == 'VAT':
+                result['VAT'] = value
+            elif key == 'Product Type':
+                result['Product Type'] = value
+
+    # EXTRACT AGREEMENTS
+    agreements = []
+    try:
+        agreements_header = soup.find('p', class_='agree') or soup.find('strong', string='Agreements:')
+        if agreements_header:
+            agreements_table = agreements_header.find_next('div', class_='row deals')
+            if agreements_table:
+                agreement_divs = agreements_table.find_all('div', class_='span6')
+                for i in range(2, len(agreement_divs), 2):
+                    if i + 1 < len(agreement_divs):
+                        agreement = agreement_divs[i].get_text(strip=True)
+                        rate = agreement_divs[i+1].get_text(strip=True)
+                        agreements.append(f"{agreement}: {rate}")
+                if agreements:
+                    result['Agreement details'] = " | ".join(agreements)
+    except Exception as e:
+        print(f"Agreement error for {lookup_code}: {str(e)}")
+
+    return result
+
+# Function to run the FEI lookups of all codes on a bounded pool of async workers.
+# Results come back in the order of codes, whatever order the lookups finish in
+async def enrich_fei(codes, max_workers=MAX_WORKERS, on_result=None):
+    results = [None] * len(codes)
+    queue = asyncio.Queue()
+    for number, hscode in enumerate(codes):
+        queue.put_nowait((number, hscode))
+    done = 0
+    start = time.perf_counter()
+
+    async def worker(session):
+        nonlocal done
+        while not queue.empty():
+            number, hscode = queue.get_nowait()
+            results[number] = await scrape_fei_data(hscode, session)
+            if on_result:
+                on_result(hscode, results[number])
+            done += 1
+            if done % PROGRESS_EVERY == 0 or done == len(codes):
+                elapsed = time.perf_counter() - start
+                print(f"Processed {done} of {len(codes)} HS Codes ({done / elapsed:.1f} codes/s)")
+
+    # asyncio.to_thread runs on the loop's default executor, which can have fewer threads than workers
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_workers))
+    with create_session(max_workers) as session:
+        await asyncio.gather(*(worker(session) for _ in range(max_workers)))
+    return results
+
+# State of the incremental refresh: the Item list and row fingerprints of the last
+# finished crawl, and the FEI results of the current run as they come in. The results
+# are only cleared once the dataset is written, so an interrupted run resumes from them
+class RefreshState:
+    def __init__(self, path=STATE_FILE):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshot (
+                chapter INTEGER NOT NULL, item TEXT NOT NULL, row_hash TEXT,
+                PRIMARY KEY (chapter, item));
+            CREATE TABLE IF NOT EXISTS fei_results (item TEXT PRIMARY KEY, result TEXT NOT NULL);
+        """)
+
+    def previous_items(self):
+        previous = defaultdict(dict)
+        for chapter, item, row_hash in self.db.execute("SELECT chapter, item, row_hash FROM snapshot"):
+            previous[chapter][item] = row_hash
+        return dict(previous)
+
+    def finished_results(self):
+        return {item: json.loads(result) for item, result in self.db.execute("SELECT item, result FROM fei_results")}
+
+    def save_result(self, item, result):
+        # Failed lookups are not kept, a resumed run tries them again
+        if result['VAT'] == 'ERROR':
+            return
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO fei_results VALUES (?, ?)", (item, json.dumps(result)))
+
+    def commit_snapshot(self, df_customs):
+        # One transaction: the crawled chapters get their new snapshot and the run is marked finished
+        rows = df_customs[['Chapter', 'Item', 'Row_hash']].itertuples(index=False, name=None)
+        with self.db:
+            self.db.executemany("DELETE FROM snapshot WHERE chapter = ?",
+                                [(int(chapter),) for chapter in df_customs['Chapter'].unique()])
+            self.db.executemany("INSERT OR REPLACE INTO snapshot VALUES (?, ?, ?)",
+                                [(int(chapter), item, row_hash) for chapter, item, row_hash in rows])
+            self.db.execute("DELETE FROM fei_results")
+
+    def close(self):
+        self.db.close()
+
+# Function to load the existing dataset with unquoted items ('N/A' stays a string)
+def load_dataset(path=DATASET_FILE):
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['Chapter', 'Page', 'Item'] + FEI_COLUMNS)
+    existing = pd.read_csv(path, dtype=str, keep_default_na=False)
+    existing['Item'] = existing['Item'].str.strip('"')
+    existing[['Chapter', 'Page']] = existing[['Chapter', 'Page']].astype(int)
+    return existing
+
+# Function to list the items that need an FEI lookup: new in their chapter, with a changed
+# listing row, or without usable FEI data in the existing dataset
+def find_items_to_refresh(df_customs, previous, existing):
+    usable = set(existing.loc[existing['VAT'] != 'ERROR', 'Item'])
+    to_refresh = []
+    for chapter, chapter_rows in df_customs.groupby('Chapter', sort=False):
+        before = previous.get(chapter, {})
+        fresh = dict(zip(chapter_rows['Item'], chapter_rows['Row_hash']))
+        new = [item for item in fresh if item not in before]
+        # A snapshot taken from the dataset has no fingerprints, those items count as unchanged
+        changed = [item for item, row_hash in fresh.items()
+                   if before.get(item) is not None and before[item] != row_hash]
+        removed = len(before.keys() - fresh.keys())
+        if new or changed or removed:
+            print(f"Chapter {chapter}: {len(new)} new, {len(changed)} changed, {removed} removed items")
+        to_refresh.extend(new + changed)
+    to_refresh.extend(item for item in df_customs['Item'].unique() if item not in usable)
+    return list(dict.fromkeys(to_refresh))
+
+# Function to run the FEI lookups of the new and changed items only. Every finished lookup
+# is saved in the state file first; the other items keep their FEI columns from the dataset
+def refresh_fei_incrementally(df_customs, state, existing):
+    previous = state.previous_items()
+    if not previous:
+        # First incremental run: compare against the items already in the dataset
+        previous = {chapter: dict.fromkeys(rows['Item']) for chapter, rows in existing.groupby('Chapter')}
+
+    to_refresh = find_items_to_refresh(df_customs, previous, existing)
+    finished = state.finished_results()
+    pending = [item for item in to_refresh if item not in finished]
+    print(f"\nIncremental refresh: {len(to_refresh)} of {df_customs['Item'].nunique()} items new or changed, "
+          f"{len(to_refresh) - len(pending)} already looked up by an interrupted run")
+
+    refreshed = {item: finished[item] for item in to_refresh if item in finished}
+    for result in asyncio.run(enrich_fei(pending, on_result=state.save_result)):
+        refreshed[result['Original_HS_Code']] = result
+
+    kept = existing.loc[~existing['Item'].isin(list(refreshed)), ['Item'] + FEI_COLUMNS]
+    kept = kept.drop_duplicates('Item').rename(columns={'Item': 'Original_HS_Code'})
+    return pd.concat([kept, pd.DataFrame(list(refreshed.values()))], ignore_index=True)
+
+if __name__ == "__main__":
+    # Pages that have not changed since the last run are served from disk after a 304
+    http_cache = HTTPCache()
+    prefix_cache = PrefixCache()
+    # Codes under the same prefix wait for the first one's lookup instead of fetching the page too
+    prefix_locks = defaultdict(asyncio.Lock)
+
+    # Run the scraper: every chapter is crawled to its last page, so the incremental refresh
+    # below compares the full listing with the last snapshot
+    try:
+        df_customs = scrape_customs_data(http_cache)
+    except ListingError as e:
+        # Merging a listing with chapters missing would drop their items from the dataset
+        prefix_cache.close()
+        raise SystemExit(f"{e}\nNothing was merged or written, rerun to retry.")
+    df_customs.head()
+
+    # Assuming df_customs is your input DataFrame containing HS codes in 'Item' column
+    # FULL PROCESSING
+    if INCREMENTAL:
+        print("\nStarting incremental refresh with fallback to 10-digit...")
+        refresh_state = RefreshState()
+        existing = load_dataset()
+        df_fei = refresh_fei_incrementally(df_customs, refresh_state, existing)
+    else:
+        print("\nStarting full scraping with fallback to 10-digit...")
+        hs_codes = df_customs['Item'].unique().tolist()
+        fei_data = asyncio.run(enrich_fei(hs_codes))
+    print(http_cache.summary())
+    print(prefix_cache.summary())
+    prefix_cache.close(remove=True)  # The next run fetches the prefixes again
+
+    # CREATE FINAL DATAFRAME
+    if not INCREMENTAL:
+        df_fei = pd.DataFrame(fei_data)
+
+    # Merge with original data
+    df_final = pd.merge(
+        df_customs,
+        df_fei,
+        left_on='Item',
+        right_on='Original_HS_Code',
+        how='left'
+    ).drop(['Original_HS_Code', 'HS_6digit', 'Row_hash'], axis=1, errors='ignore')
+
+    if INCREMENTAL:
+        # Chapters the listing returned no rows for keep their rows from the existing dataset
+        untouched = existing[~existing['Chapter'].isin(df_customs['Chapter'])]
+        df_final = pd.concat([df_final, untouched[df_final.columns]], ignore_index=True)
+        df_final = df_final.sort_values('Chapter', kind='stable', ignore_index=True)
+
+    # Add quotes around Item values
+    df_final['Item'] = df_final['Item'].apply(lambda x: f'"{x}"')
+
+    # SAVE RESULTS
+    if INCREMENTAL:
+        # Write to a temporary file first so a crash never leaves a half-written dataset
+        df_final.to_csv(DATASET_FILE + '.tmp', index=False, quoting=1)
+        os.replace(DATASET_FILE + '.tmp', DATASET_FILE)
+        refresh_state.commit_snapshot(df_customs)
+        refresh_state.close()
+        print(f"\nIncremental refresh complete, {DATASET_FILE} updated!")
+    else:
+        df_final.to_csv('egyptian_tariff_data_with_fallb.csv', index=False, quoting=1)
+        print("\nScraping complete with fallback logic!")
+
+    # Display sample
+    print("\nSample data:")
+    df_final.head()
\ No newline at end of file
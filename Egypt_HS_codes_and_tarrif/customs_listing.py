@@ -0,0 +1,161 @@
+"""Crawler for the customs.gov.eg tariff listing, shared by the Egypt scripts.
+
+Every chapter's listing pages are read until the first page without data. The
+chapters are crawled on a thread pool, and the next pages of a chapter are
+requested while the current one is read (see scrape_chapter). Pages answered
+with a 429/5xx are retried; a chapter that still fails makes scrape_customs_data
+raise ListingError, so no script works on a listing with chapters cut short.
+
+Usage from a script in this folder:
+
+    from customs_listing import scrape_customs_data
+
+    http_cache = HTTPCache()
+    df_customs = scrape_customs_data(http_cache)   # Chapter, Page, Item, Row_hash
+"""
+
+import hashlib
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared HTTP helpers
+from http_helpers import HostRateLimiter, create_session, get_with_retries
+
+# Customs listing crawl settings
+CONCURRENT = True          # Set to False to crawl the chapters one at a time
+MAX_WORKERS = 8            # Number of chapters crawled at the same time
+PREFETCH_PAGES = 2         # Pages of a chapter in flight at once (1 disables the speculative requests)
+REQUESTS_PER_SECOND = 0    # Cap on new requests to customs.gov.eg (0 disables the cap)
+# At most MAX_WORKERS * PREFETCH_PAGES requests are open at any time. Prefetching costs
+# about PREFETCH_PAGES - 1 extra requests per chapter (pages past its end), so it only
+# pays off while the cap is not what limits the crawl
+CHAPTERS = range(1, 100)   # Chapters 1-99
+MAX_PAGES = 99             # Pages 1-99 per chapter (stops at the first page without data)
+MAX_RETRIES = 4            # Retries of a listing page after a 429/5xx answer or a connection error
+BACKOFF_SECONDS = 1.0      # First retry delay, doubled on every further retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REQUEST_TIMEOUT = 20       # Seconds, so a stuck connection cannot hold a worker forever
+
+CUSTOMS_URL = "https://customs.gov.eg/Services/Tarif?page={}&type=1&chapterId={}"
+
+
+class ListingError(Exception):
+    """Some chapters could not be crawled; their items would otherwise look removed"""
+
+
+# Function to fetch one listing page through the script's HTTPCache; returns (number of
+# table rows, [(item, row hash)]), or None when the page has no data and the chapter has ended
+def fetch_customs_page(chapter, page, http_cache, session=None, rate_limiter=None):
+    url = CUSTOMS_URL.format(page, chapter)
+    response = get_with_retries(http_cache.get, url, rate_limiter=rate_limiter, max_retries=MAX_RETRIES,
+                                backoff_seconds=BACKOFF_SECONDS, retry_statuses=RETRY_STATUSES,
+                                session=session, timeout=REQUEST_TIMEOUT)
+    # An error page has no table either, it must not end the chapter early
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, 'html.parser')
+
+    # Find the table with tariff data
+    table = soup.find('table', {'class': 'table'})
+    if not table:
+        return None  # No table found, end of chapter
+
+    rows = table.find_all('tr')[1:]  # Skip header row
+    if not rows:
+        return None  # No data rows, end of chapter
+
+    items = []
+    for row in rows:
+        cols = row.find_all('td')
+        if len(cols) >= 2:  # Ensure 'Text of the item' and 'Item' exist
+            #text_of_item = cols[1].get_text(strip=True)
+            item = cols[0].get_text(strip=True).replace('/', '')
+
+            if item:#text_of_item or item  # Only append if data exists
+                # Fingerprint of the whole listing row, so the incremental refresh sees edits
+                row_text = '\x1f'.join(col.get_text(strip=True) for col in cols)
+                items.append((item, hashlib.sha1(row_text.encode('utf-8')).hexdigest()))
+    return len(rows), items
+
+# Function to scrape one chapter. With a page executor the next pages are requested
+# speculatively while the current one is read; the pages are still read in order and
+# the speculative requests past the first empty page are cancelled or discarded
+def scrape_chapter(chapter, http_cache, session=None, rate_limiter=None, page_executor=None,
+                   prefetch=PREFETCH_PAGES):
+    data = []
+    pages = iter(range(1, MAX_PAGES + 1))
+    pending = deque()
+
+    def request_next_page():
+        page = next(pages, None)
+        if page is None:
+            return
+        if page_executor:
+            future = page_executor.submit(fetch_customs_page, chapter, page, http_cache, session, rate_limiter)
+        else:
+            future = None
+        pending.append((page, future))
+
+    for _ in range(prefetch if page_executor else 1):
+        request_next_page()
+
+    try:
+        while pending:
+            page, future = pending.popleft()
+            result = future.result() if future else fetch_customs_page(chapter, page, http_cache, session, rate_limiter)
+            if result is None:
+                break  # No data, exit page loop
+            row_count, items = result
+            data.extend({'Chapter': chapter, 'Page': page, 'Item': item, 'Row_hash': row_hash}
+                        for item, row_hash in items)
+            print(f"Chapter {chapter}, Page {page} - Scraped {row_count} items")
+            request_next_page()
+    finally:
+        # Pages requested past the end of the chapter (or after an error) are not needed
+        for _, future in pending:
+            if future:
+                future.cancel()
+
+    return data
+
+# Function to crawl the listing of every chapter; returns one row per item with its
+# Chapter, Page, Item and Row_hash, in chapter/page order. Raises ListingError after
+# the crawl when any chapter failed
+def scrape_customs_data(http_cache, concurrent=CONCURRENT, max_workers=MAX_WORKERS, prefetch=PREFETCH_PAGES,
+                        requests_per_second=REQUESTS_PER_SECOND):
+    start = time.perf_counter()
+    failed = {}
+
+    def scrape_or_record(chapter, *args):
+        try:
+            return scrape_chapter(chapter, http_cache, *args)
+        except Exception as e:
+            print(f"Error scraping chapter {chapter}: {e}")
+            failed[chapter] = e
+            return []
+
+    if concurrent:
+        rate_limiter = HostRateLimiter(requests_per_second)
+        # Every chapter worker can have `prefetch` pages in flight at once
+        with create_session(max_workers * prefetch) as session, \
+                ThreadPoolExecutor(max_workers=max_workers * prefetch) as page_executor, \
+                ThreadPoolExecutor(max_workers=max_workers) as chapter_executor:
+            # executor.map keeps input order, so the rows come out in chapter/page order
+            chapters = list(chapter_executor.map(
+                lambda chapter: scrape_or_record(chapter, session, rate_limiter, page_executor, prefetch),
+                CHAPTERS))
+    else:
+        chapters = [scrape_or_record(chapter) for chapter in CHAPTERS]
+    if failed:
+        raise ListingError(f"Listing of chapters {sorted(failed)} failed, first error: {failed[min(failed)]}")
+
+    data = [row for chapter_rows in chapters for row in chapter_rows]
+    elapsed = time.perf_counter() - start
+    print(f"Scraped {len(data)} items from {len(CHAPTERS)} chapters in {elapsed:.1f}s "
+          f"({len(CHAPTERS) / elapsed:.2f} chapters/s)")
+    return pd.DataFrame(data)
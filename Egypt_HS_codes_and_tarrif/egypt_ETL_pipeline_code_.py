@@ -1,56 +1,20 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import re
+import sys
+from pathlib import Path
 
-
-def scrape_customs_data():
-    base_url = "https://customs.gov.eg/Services/Tarif?page={}&type=1&chapterId={}"
-    data = []
-
-    for chapter in range(1, 100):  # Chapters 1-99
-        for page in range(1, 100):   # Pages 1-100 (stops if no data)
-            url = base_url.format(page, chapter)
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find the table with tariff data
-            table = soup.find('table', {'class': 'table'})
-            if not table:
-                break  # No table found, exit page loop
-            
-            rows = table.find_all('tr')[1:]  # Skip header row
-            if not rows:
-                break  # No data rows, exit page loop
-            
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 2:  # Ensure 'Text of the item' and 'Item' exist
-                    #text_of_item = cols[1].get_text(strip=True)
-                    item = cols[0].get_text(strip=True).replace('/', '')
-                    
-                    if item:#text_of_item or item  # Only append if data exists
-                        data.append({
-                            'Chapter': chapter,
-                            'Page': page,
-                            #'Text of the item': text_of_item,
-                            'Item': item
-                        })
-            print(f"Chapter {chapter}, Page {page} - Scraped {len(rows)} items")
-    
-    return pd.DataFrame(data)
-
-# Run the scraper
-df_customs = scrape_customs_data()
-df_customs.head()
-
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared HTTP cache
+sys.path.append(str(Path(__file__).resolve().parent))  # this folder, for the shared customs crawler
+from http_cache import HTTPCache
+from customs_listing import scrape_customs_data
 
 
 def scrape_fei_data(hscode):
     url = f"http://www.fei.org.eg/tariff/tariff.php?hscode={hscode}&keywords=&submit=#"
     
     try:
-        response = requests.get(url, timeout=15)
+        response = http_cache.get(url, timeout=15)
         soup = BeautifulSoup(response.text, 'html.parser')
         
         # Initialize result with default values
@@ -80,26 +44,15 @@ def scrape_fei_data(hscode):
         # EXTRACT ALL SPAN6 CONTENT DIVS
         content_divs = soup.find_all('div', class_='span6 content')
         
-        # EXTRACT UNIT
+        # EXTRACT UNIT, CUSTOM FEE AND VAT in one pass over the divs (the first div with a field wins)
+        fields = {'Unit: ': 'Unit', 'Custom Fee: ': 'Custom Fee', 'VAT: ': 'VAT'}
+        found = set()
         for div in content_divs:
-            strong = div.find('strong', string='Unit: ')
-            if strong:
-                result['Unit'] = strong.parent.get_text(strip=True).replace('Unit:', '').strip()
-                break
-        
-        # EXTRACT CUSTOM FEE
-        for div in content_divs:
-            strong = div.find('strong', string='Custom Fee: ')
-            if strong:
-                result['Custom Fee'] = strong.parent.get_text(strip=True).replace('Custom Fee:', '').strip()
-                break
-        
-        # EXTRACT VAT
-        for div in content_divs:
-            strong = div.find('strong', string='VAT: ')
-            if strong:
-                result['VAT'] = strong.parent.get_text(strip=True).replace('VAT:', '').strip()
-                break
+            for strong in div.find_all('strong'):
+                field = fields.get(strong.string)
+                if field and field not in found:
+                    result[field] = strong.parent.get_text(strip=True).replace(field + ':', '').strip()
+                    found.add(field)
         
         # EXTRACT AND PROCESS AGREEMENTS
         agreements = []
@@ -138,25 +91,34 @@ def scrape_fei_data(hscode):
         print(f"Request error for HS Code {hscode}: {str(e)}")
         return {k: 'ERROR' for k in result.keys()}
 
-# FULL PROCESSING
-print("\nStarting full scraping...")
-fei_data = []
-for i, hscode in enumerate(df_customs['Item'].unique()):
-    if i % 10 == 0:
-        print(f"Processed {i} HS Codes...")
-    fei_data.append(scrape_fei_data(hscode))
+if __name__ == "__main__":
+    # Pages that have not changed since the last run are served from disk after a 304
+    http_cache = HTTPCache()
+
+    # Run the scraper (the row fingerprints are only used by the incremental refresh)
+    df_customs = scrape_customs_data(http_cache).drop(columns='Row_hash')
+    df_customs.head()
+
+    # FULL PROCESSING
+    print("\nStarting full scraping...")
+    fei_data = []
+    for i, hscode in enumerate(df_customs['Item'].unique()):
+        if i % 10 == 0:
+            print(f"Processed {i} HS Codes...")
+        fei_data.append(scrape_fei_data(hscode))
+    print(http_cache.summary())
 
-# CREATE FINAL DATAFRAME
-df_fei = pd.DataFrame(fei_data)
-df_final = pd.concat([df_customs, df_fei], axis=1)
+    # CREATE FINAL DATAFRAME
+    df_fei = pd.DataFrame(fei_data)
+    df_final = pd.concat([df_customs, df_fei], axis=1)
 
-# ADD QUOTES AROUND ITEM VALUES TO PRESERVE LEADING ZEROS
-df_final['Item'] = df_final['Item'].apply(lambda x: f'"{x}"')
+    # ADD QUOTES AROUND ITEM VALUES TO PRESERVE LEADING ZEROS
+    df_final['Item'] = df_final['Item'].apply(lambda x: f'"{x}"')
 
-# SAVE RESULTS
-df_final.to_csv('egyptian_tariff_data_.csv', index=False, quoting=1)
-print("\nScraping complete! Data saved with quoted Item values.")
+    # SAVE RESULTS
+    df_final.to_csv('egyptian_tariff_data_.csv', index=False, quoting=1)
+    print("\nScraping complete! Data saved with quoted Item values.")
 
-# Display sample of results
-print("\nSample of extracted data:")
-df_final.head()
\ No newline at end of file
+    # Display sample of results
+    print("\nSample of extracted data:")
+    df_final.head()
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""Australia clean_data against the row-wise cleaning it replaced.
+
+The baseline ran a regex search per ReferenceNumber cell and a Python string
+function per Goods cell; clean_data works on whole columns and cleans each
+distinct value once. Both clean the rows of every saved chapter page
+repeated COPIES times, about the size of a full crawl: once as repeated, and
+once with a copy number in every Goods and ReferenceNumber cell so no value
+repeats and the gain from cleaning distinct values once is left out.
+
+    python benchmarks/australia_clean_data.py
+"""
+
+import contextlib
+import io
+
+import pandas as pd
+
+from timing import FIXTURES_DIR, best_time, load_script, report
+from baselines import australia_clean_data
+
+COPIES = 200
+PAGES = sorted((FIXTURES_DIR / 'australia').glob('*.html'))
+
+
+def main():
+    scraper = load_script('Australia_HS_codes_and_tarrifs/scraper.py')
+    rows = []
+    # parse_page prints the tables it found
+    with contextlib.redirect_stdout(io.StringIO()):
+        for path in PAGES:
+            rows.extend(scraper.parse_page(path.read_bytes(), path.name))
+    repeated = pd.DataFrame(rows * COPIES, columns=scraper.HEADERS)
+    distinct = repeated.copy()
+    copy_numbers = pd.Series(range(len(distinct))).floordiv(len(rows)).astype(str)
+    for col in ('Goods', 'ReferenceNumber'):
+        distinct[col] = distinct[col] + ' (' + copy_numbers + ')'
+    print(f'{len(repeated):,} rows from {len(PAGES)} chapter pages')
+
+    for label, frame in (('repeated', repeated), ('distinct', distinct)):
+        pd.testing.assert_frame_equal(scraper.clean_data(frame.copy()), australia_clean_data(frame.copy()))
+        baseline = best_time(lambda: australia_clean_data(frame.copy()))
+        report(f'row-wise clean_data, {label}', baseline, count=len(frame))
+        seconds = best_time(lambda: scraper.clean_data(frame.copy()))
+        report(f'clean_data, {label}', seconds, baseline, count=len(frame))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Australia chapter parsing: streaming lxml parse_page against parse_page_soup.
+
+parse_page_soup is the BeautifulSoup html.parser path scrape_page used before
+the lxml streaming parser. Both parse the saved chapter 84 page and the same
+page with its tables repeated COPIES times, about the size of the largest
+live chapter pages.
+
+    python benchmarks/australia_parse_page.py
+"""
+
+import contextlib
+import io
+
+from timing import FIXTURES_DIR, best_time, load_script, report
+
+COPIES = 20
+PAGE = FIXTURES_DIR / 'australia' / 'section-xvi_chapter-84.html'
+
+
+# Function to repeat the tables of a page, keeping the page chrome around them once
+def scaled_page(content, copies):
+    start, end = content.index(b'<table'), content.rindex(b'</table>') + len(b'</table>')
+    return content[:start] + content[start:end] * copies + content[end:]
+
+
+def main():
+    scraper = load_script('Australia_HS_codes_and_tarrifs/scraper.py')
+    content = PAGE.read_bytes()
+    for label, page in (('chapter 84', content), (f'chapter 84 x{COPIES}', scaled_page(content, COPIES))):
+        # Both parsers print the tables they found
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = scraper.parse_page(page, PAGE.name)
+            assert rows == scraper.parse_page_soup(page, PAGE.name)
+            baseline = best_time(lambda: scraper.parse_page_soup(page, PAGE.name))
+            seconds = best_time(lambda: scraper.parse_page(page, PAGE.name))
+        print(f'{label}: {len(page) / 1e3:,.0f} KB, {len(rows):,} rows')
+        report('  parse_page_soup (html.parser)', baseline)
+        report('  parse_page (lxml iterparse)', seconds, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Brazil TIPI extraction: page ranges across a process pool against one pages="all" call.
+
+Writes a synthetic PAGES-page tariff PDF, then extracts it the way the script
+did before (one tabula.read_pdf call on the whole document), page range by
+page range in this process, and with pools of WORKERS processes. The tables
+of every run must match the pages="all" ones. Scaling needs as many free
+cores as workers; pools larger than os.cpu_count() are skipped.
+
+Needs tabula-py, pypdf and java:
+
+    python benchmarks/brazil_page_ranges.py
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from timing import best_time, load_script, report
+from pdfs import write_synthetic_pdf
+
+PAGES = 400
+PAGES_PER_CHUNK = 25
+WORKERS = (2, 4, 8)
+
+
+def main():
+    if shutil.which('java') is None:
+        print('tabula needs java, install a JRE to run this benchmark')
+        return
+    brazil = load_script('Brazil_HS_codes_and_tarrifs/brazil_tarrif_scraper.py')
+
+    with tempfile.TemporaryDirectory() as folder:
+        pdf_path = str(Path(folder) / 'synthetic_tipi.pdf')
+        write_synthetic_pdf(pdf_path, PAGES)
+        expected = pd.concat(brazil.tabula.read_pdf(pdf_path, pages='all'), ignore_index=True)
+        print(f'{PAGES} pages, {len(expected):,} rows, {os.cpu_count()} cores')
+
+        # Function to extract the document one way and check the tables against pages="all"
+        def extract(**kwargs):
+            tables = list(brazil.iter_tables(pdf_path, pages_per_chunk=PAGES_PER_CHUNK, **kwargs))
+            pd.testing.assert_frame_equal(pd.concat(tables, ignore_index=True), expected)
+
+        # iter_tables prints the page ranges
+        with contextlib.redirect_stdout(io.StringIO()):
+            baseline = best_time(lambda: brazil.tabula.read_pdf(pdf_path, pages='all'), repeat=1)
+            sequential = best_time(lambda: extract(parallel=False), repeat=1)
+            pooled = {workers: best_time(lambda: extract(parallel=True, max_workers=workers), repeat=1)
+                      for workers in WORKERS if workers <= (os.cpu_count() or 1)}
+
+    report('read_pdf(pages="all")', baseline, count=PAGES)
+    report(f'{PAGES_PER_CHUNK}-page ranges, one process', sequential, baseline, count=PAGES)
+    for workers, seconds in pooled.items():
+        report(f'{PAGES_PER_CHUNK}-page ranges, {workers} workers', seconds, baseline, count=PAGES)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""China column-misalignment repairs: whole-column masks against the row-wise steps.
+
+The baseline is the row-wise shift_and_insert, shift_row and MO repair
+(DataFrame.apply(axis=1) and iterrows) followed by the iterrows
+shift_rows_left; the new path is shift_and_insert, repair_agreement_rates and
+shift_rows_left from the script. Both run on ROWS rows that mix every case
+the repairs handle, and must give the same cells.
+
+    python benchmarks/china_column_repairs.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from timing import best_time, load_script, report
+from baselines import china_column_repairs, china_shift_rows_left
+
+ROWS = 20_000
+COLUMNS = [
+    'HS_code', 'Description', 'Preferential_Rate(Agreement rate)_1', 'MFN_Rate',
+    'Preferential_Rate(Agreement rate)',
+    'Preferential_Tariff_Rate(Special_Preferential_Tariff_Rate)',
+    'General_Tariff_Rate', 'new_col1', 'new_col2', 'guard_col1', 'guard_col2',
+]
+# Row shapes of the extracted tables: MFN rate stuck to the code, Chinese and MO
+# agreement notes, both preferential rates numeric, plain rows
+SHAPES = [
+    ['{code} 5', 'horse', 'AS,CL', '0', '0', np.nan, '30'],
+    ['{code}', 'cow', '亚太 HK,MO', '5', '3', '0', '20'],
+    ['{code}', 'pig', 'MO', '5', '3', '0', '20'],
+    ['{code}', 'x', '中国', '5', '3', '0', '20'],
+    ['{code} 6∆0', 'hen', '澳门 mo', '8', '4', '0', '50'],
+    ['{code}', 'goat', '3', '5', '2.5', '0', '70'],
+    ['{code}', 'other', np.nan, '5', np.nan, np.nan, '70'],
+]
+
+
+# Function to build rows of every shape with distinct HS codes
+def synthetic_rows(count):
+    rows = []
+    for number in range(count):
+        shape = SHAPES[number % len(SHAPES)]
+        code = f'{number // 100 % 10000:04d}.{number % 100:02d}00'
+        row = [cell.format(code=code) if isinstance(cell, str) else cell for cell in shape]
+        rows.append(row + [np.nan] * (len(COLUMNS) - len(row)))
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+# Function to compare frames cell by cell, None and NaN both count as missing
+def as_cells(frame):
+    return frame.astype(object).where(frame.notna(), None).values.tolist()
+
+
+def main():
+    china = load_script('China_HS_code_and_tarrifs/china_tarrif_ETL_script_.py')
+    data = synthetic_rows(ROWS)
+
+    def baseline():
+        return china_shift_rows_left(china_column_repairs(data))
+
+    def columns():
+        return china.shift_rows_left(china.repair_agreement_rates(china.shift_and_insert(data)))
+
+    assert as_cells(columns()) == as_cells(baseline())
+    print(f'{ROWS:,} rows')
+    baseline_seconds = best_time(baseline, repeat=1)
+    report('row-wise repairs + shift_rows_left', baseline_seconds, count=ROWS)
+    seconds = best_time(columns)
+    report('column-wise repairs + shift_rows_left', seconds, baseline_seconds, count=ROWS)
+
+
+if __name__ == '__main__':
+    main()
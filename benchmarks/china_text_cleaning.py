@@ -0,0 +1,44 @@
+"""China clean_text_columns against the two per-cell passes it replaced.
+
+The baseline is remove_chinese_columns (a per-cell re.sub over
+COLUMNS_TO_CLEAN) followed by remove_standalone_R (a per-cell re.sub over every
+column); clean_text_columns does both in one vectorised pass per column.
+Both run on ROWS repaired rows, the input the stage gets in the pipeline, and
+must match once written to CSV and read back, the way review_data.csv was.
+
+    python benchmarks/china_text_cleaning.py
+"""
+
+import io
+
+import pandas as pd
+
+from timing import best_time, load_script, report
+from baselines import china_remove_chinese_columns, china_remove_standalone_R
+from china_column_repairs import synthetic_rows
+
+ROWS = 60_000
+
+
+# Function to read a frame back the way the CSV hand-off did
+def read_back(data):
+    return pd.read_csv(io.StringIO(data.to_csv(index=False)))
+
+
+def main():
+    china = load_script('China_HS_code_and_tarrifs/china_tarrif_ETL_script_.py')
+    data = china.repair_agreement_rates(china.shift_and_insert(synthetic_rows(ROWS)))
+
+    def baseline():
+        return china_remove_standalone_R(china_remove_chinese_columns(data, china.COLUMNS_TO_CLEAN))
+
+    pd.testing.assert_frame_equal(read_back(china.clean_text_columns(data)), read_back(baseline()))
+    print(f'{ROWS:,} rows, {data.shape[1]} columns')
+    baseline_seconds = best_time(baseline)
+    report('remove_chinese_columns + remove_standalone_R', baseline_seconds, count=ROWS)
+    seconds = best_time(lambda: china.clean_text_columns(data))
+    report('clean_text_columns', seconds, baseline_seconds, count=ROWS)
+
+
+if __name__ == '__main__':
+    main()
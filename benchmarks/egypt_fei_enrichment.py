@@ -0,0 +1,69 @@
+"""Egypt FEI enrichment: the sequential lookup loop against enrich_fei.
+
+Looks up CODES codes (PREFIXES 6-digit prefixes with four 10-digit codes each)
+on the FEI stand-in, every answer delayed by LATENCY seconds like the real
+site. The baseline is the loop the dynamic ETL ran before enrich_fei: one
+blocking request after the other, every code fetching its prefix page again.
+enrich_fei runs on WORKERS async workers with the prefix cache. Every run
+starts with an empty HTTP and prefix cache and must return the same results.
+
+    python benchmarks/egypt_fei_enrichment.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+from collections import defaultdict
+
+from timing import best_time, load_script, report
+from baselines import egypt_scrape_fei_data
+from http_cache import HTTPCache
+from servers import serve
+from servers.fei import FEIHandler
+
+LATENCY = 0.05
+PREFIXES = 40
+WORKERS = (1, 8, 16)
+FEI_PATH = '/tariff/tariff.php?hscode={}&keywords=&submit=#'
+
+
+def main():
+    codes = [f'{prefix}{suffix}' for prefix in range(10_01_01, 10_01_01 + PREFIXES)
+             for suffix in ('0000', '1000', '2500', '9001')]
+    print(f'{len(codes)} codes under {PREFIXES} prefixes, {LATENCY * 1000:.0f} ms per page')
+
+    with serve(FEIHandler, latency=LATENCY, fail_first=False) as server, tempfile.TemporaryDirectory() as folder:
+        etl = load_script('Egypt_HS_codes_and_tarrif/Egypt-Tariff-Dynamic-ETL.py')
+        etl.FEI_URL = server.url + FEI_PATH
+
+        # Function to time one run over every code, checking it against the baseline's results
+        def lookup(label, run, baseline=None, expected=None):
+            requests_before = len(server.requests)
+            results = []
+            # Both paths print a line per fallback and per progress step
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds = best_time(lambda: results.append(run()), repeat=1)
+            assert expected is None or results[0] == expected
+            report(f'{label} ({len(server.requests) - requests_before} pages)', seconds, baseline, count=len(codes))
+            return seconds, results[0]
+
+        baseline, expected = lookup('sequential loop', lambda: [egypt_scrape_fei_data(code, etl.FEI_URL)
+                                                                for code in codes])
+        for workers in WORKERS:
+            def enrich():
+                # A fresh HTTP cache, prefix cache and locks, like one run of the script
+                etl.http_cache = HTTPCache(cache_dir=os.path.join(folder, f'cache_{workers}'))
+                etl.prefix_cache = etl.PrefixCache(path=os.path.join(folder, f'prefixes_{workers}.sqlite'))
+                etl.prefix_locks = defaultdict(asyncio.Lock)
+                try:
+                    return asyncio.run(etl.enrich_fei(codes, max_workers=workers))
+                finally:
+                    etl.prefix_cache.close(remove=True)
+
+            lookup(f'enrich_fei, {workers} workers', enrich, baseline, expected)
+
+
+if __name__ == '__main__':
+    main()
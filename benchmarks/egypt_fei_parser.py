@@ -0,0 +1,37 @@
+"""Egypt FEI pages: the single-pass lxml parse_fei_page against parse_fei_page_soup.
+
+parse_fei_page_soup is the BeautifulSoup html.parser path the FEI lookups used
+before the lxml parser. Both parse every saved page in tests/fixtures/egypt_fei
+CALLS times and must return the same result for each page.
+
+    python benchmarks/egypt_fei_parser.py
+"""
+
+from timing import FIXTURES_DIR, best_time, load_script, report
+
+CALLS = 100
+
+
+def main():
+    etl = load_script('Egypt_HS_codes_and_tarrif/Egypt-Tariff-Dynamic-ETL.py')
+    if etl.etree is None:
+        raise SystemExit('parse_fei_page needs lxml, which is not installed')
+    pages = [path.read_text(encoding='utf-8') for path in sorted((FIXTURES_DIR / 'egypt_fei').glob('*.html'))]
+    full_page = (FIXTURES_DIR / 'egypt_fei' / 'tariff_010121.html').read_text(encoding='utf-8')
+
+    for label, batch in (('tariff_010121.html', [full_page]), (f'all {len(pages)} saved pages', pages)):
+        for page in batch:
+            assert etl.parse_fei_page(page, '0101210000', '010121') == \
+                etl.parse_fei_page_soup(page, '0101210000', '010121')
+        count = CALLS * len(batch)
+        print(f'{label}: {sum(map(len, batch)) / 1e3:,.1f} KB, {count:,} parses')
+        baseline = best_time(lambda: [etl.parse_fei_page_soup(page, '0101210000', '010121')
+                                      for _ in range(CALLS) for page in batch])
+        report('  parse_fei_page_soup (html.parser)', baseline, count=count)
+        seconds = best_time(lambda: [etl.parse_fei_page(page, '0101210000', '010121')
+                                     for _ in range(CALLS) for page in batch])
+        report('  parse_fei_page (lxml, one pass)', seconds, baseline, count=count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""HSCodeIndex lookups against filtering each country table per code.
+
+Looks up LOOKUPS distinct codes (the codes of every country output plus random
+ones, so both hits and misses) written as strings in three of the country
+formats, then PREFIXES heading lookups. The baseline normalises the code
+columns once and filters every table with a boolean mask per code, the way
+the country scripts matched codes before the index; it is timed on fewer
+codes since it is several orders of magnitude slower.
+
+    python benchmarks/hs_code_index.py
+"""
+
+import random
+
+import pandas as pd
+
+from timing import best_time, report
+from hs_codes import hs_code_text, load_country_index
+
+LOOKUPS = 1_000_000
+BASELINE_LOOKUPS = 200
+PREFIXES = 100_000
+
+
+# Function to draw distinct 10-digit codes, the indexed ones first
+def distinct_codes(index, count):
+    codes = set(index.exact)
+    rng = random.Random(0)
+    while len(codes) < count:
+        codes.add(f'{rng.randrange(10 ** 10):010d}')
+    codes = sorted(codes)
+    rng.shuffle(codes)
+    return codes
+
+
+# Function to match codes the old way: one boolean mask per table and code
+def mask_lookup(tables, code):
+    text = hs_code_text(code)
+    return tuple((country, row) for country, codes in tables.items() for row in codes.index[codes == text])
+
+
+def main():
+    index = load_country_index()
+    print(f"{len(index):,} indexed lines from {len(index.countries)} countries")
+    codes = distinct_codes(index, LOOKUPS)
+    formats = {
+        '"0101210000"': codes,
+        '"0101.210000"': [f'{code[:4]}.{code[4:]}' for code in codes],
+        '"0101.21.0000"': [f'{code[:4]}.{code[4:6]}.{code[6:]}' for code in codes],
+    }
+
+    tables = {}
+    for number, country in enumerate(index.countries):
+        mask = index.country_ids == number
+        tables[country] = pd.Series(index.keys[mask], index=index.rows[mask]).map('{:010d}'.format)
+    sample = codes[:BASELINE_LOOKUPS]
+    baseline = best_time(lambda: [mask_lookup(tables, code) for code in sample], repeat=1) / len(sample)
+    report('mask per table and code (per 1M)', baseline * LOOKUPS, count=LOOKUPS)
+
+    for label, strings in formats.items():
+        seconds = best_time(lambda: [index.lookup(code) for code in strings])
+        report(f'HSCodeIndex.lookup {label}', seconds, baseline * LOOKUPS, count=LOOKUPS)
+
+    headings = [code[:4] for code in random.Random(1).choices(sorted(index.exact), k=PREFIXES)]
+    seconds = best_time(lambda: [index.lookup_prefix(code) for code in headings])
+    report('HSCodeIndex.lookup_prefix (heading)', seconds, count=PREFIXES)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""normalize_hs_codes against the per-row .apply it replaced.
+
+Formats CODES codes in the China, Brazil/Australia and undotted formats,
+once all distinct and once drawn from REPEATED_DISTINCT codes the way tariff
+files repeat them. The baseline is reformat_hs_code from the old
+leading_trailing_zero_adder.py applied row by row.
+
+    python benchmarks/normalize_hs_codes.py
+"""
+
+import random
+
+import pandas as pd
+
+from timing import best_time, report
+from hs_codes import normalize_hs_codes
+
+CODES = 1_000_000
+REPEATED_DISTINCT = 20_000
+
+
+# The per-row formatter normalize_hs_codes replaced
+def reformat_hs_code(hs_code):
+    if pd.isna(hs_code) or str(hs_code).strip() in ['""', '']:
+        return '""'
+    code = str(hs_code).strip().strip('"')
+    if not code:
+        return '""'
+    if '.' in code:
+        left, right = code.split('.', 1)
+    else:
+        left = code[:4]
+        right = code[4:] if len(code) > 4 else ''
+    left = left.zfill(4)[:4]
+    right = right.ljust(4, '0')[:4]
+    return f'"{left}.{right}"'
+
+
+# Function to write distinct codes in the formats the country files use
+def distinct_codes(count, rng):
+    codes = []
+    for number, code in enumerate(f'{n:010d}' for n in rng.sample(range(10 ** 10), count)):
+        if number % 3 == 0:
+            codes.append(f'{code[:4]}.{code[4:8]}')
+        elif number % 3 == 1:
+            codes.append(f'{code[:4]}.{code[4:6]}.{code[6:8]}')
+        else:
+            codes.append(code[:8])
+    return codes
+
+
+def main():
+    rng = random.Random(0)
+    unique = distinct_codes(CODES, rng)
+    pool = distinct_codes(REPEATED_DISTINCT, rng)
+    inputs = {
+        'distinct': pd.Series(unique, dtype=object),
+        f'{REPEATED_DISTINCT:,} repeated': pd.Series(rng.choices(pool, k=CODES), dtype=object),
+    }
+    for label, codes in inputs.items():
+        baseline = best_time(lambda: codes.apply(reformat_hs_code))
+        report(f'.apply(reformat_hs_code), {label}', baseline, count=CODES)
+        seconds = best_time(lambda: normalize_hs_codes(codes))
+        report(f'normalize_hs_codes, {label}', seconds, baseline, count=CODES)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""tabula.read_pdf with a java subprocess per call against the in-process JVM.
+
+Extracts CALLS single-page ranges of a synthetic tariff PDF, the way the
+Brazil page-range extraction calls tabula. force_subprocess=True starts a
+cold java process for every call; the default (USE_JVM_WORKER, tabula-py
+2.8+ with jpype) starts one JVM on the first call and reuses it. The first
+call of the in-process run is reported on its own, since it carries the JVM
+start. Each path runs in a fresh interpreter so the JVM is cold at the start.
+
+Needs tabula-py[jpype], pypdf and java:
+
+    python benchmarks/tabula_jvm.py
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+
+from timing import report
+from pdfs import write_synthetic_pdf
+
+CALLS = 20
+
+# Times each read_pdf call in a fresh interpreter
+PROBE = textwrap.dedent("""
+    import json, time
+    import tabula
+    times = []
+    for page in range(1, {calls} + 1):
+        start = time.perf_counter()
+        tabula.read_pdf({pdf_path!r}, pages=str(page), multiple_tables=True, force_subprocess={force_subprocess})
+        times.append(time.perf_counter() - start)
+    print(json.dumps(times))
+""")
+
+
+# Function to time CALLS read_pdf calls in a fresh interpreter
+def call_times(pdf_path, force_subprocess):
+    probe = PROBE.format(calls=CALLS, pdf_path=pdf_path, force_subprocess=force_subprocess)
+    result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if shutil.which('java') is None:
+        print('tabula needs java, install a JRE to run this benchmark')
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        pdf_path = str(Path(folder) / 'synthetic_tipi.pdf')
+        write_synthetic_pdf(pdf_path, CALLS)
+        cold = call_times(pdf_path, force_subprocess=True)
+        warm = call_times(pdf_path, force_subprocess=False)
+
+    print(f'{CALLS} read_pdf calls, one page each')
+    report('java subprocess per call, total', sum(cold), count=CALLS)
+    report('in-process JVM, total', sum(warm), sum(cold), count=CALLS)
+    report('java subprocess, one call', sum(cold) / CALLS)
+    report('in-process JVM, first call (JVM start)', warm[0])
+    report('in-process JVM, later calls', sum(warm[1:]) / (CALLS - 1), sum(cold) / CALLS)
+
+
+if __name__ == '__main__':
+    main()
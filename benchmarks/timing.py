@@ -0,0 +1,59 @@
+"""Timing helpers shared by the benchmark scripts in this folder.
+
+Each benchmark times the code path a change replaced against the one that
+replaced it, on the same input, and prints one line per path:
+
+    python benchmarks/hs_code_index.py
+"""
+
+import sys
+import time
+import types
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+TESTS_DIR = REPO_ROOT / 'tests'
+FIXTURES_DIR = TESTS_DIR / 'fixtures'
+
+# The shared modules (hs_codes, http_cache, ...) live at the repo root; the
+# replaced code paths (baselines) and the site stand-ins (servers) in tests
+for folder in (REPO_ROOT, TESTS_DIR):
+    if str(folder) not in sys.path:
+        sys.path.insert(0, str(folder))
+
+
+# Function to time a call, best of a few runs so one slow run does not count
+def best_time(function, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Function to print the time of one path, and its speedup over the baseline
+def report(label, seconds, baseline=None, count=None):
+    line = f"{label:<44} {seconds:8.3f}s"
+    if count:
+        line += f"  {count / seconds:>12,.0f}/s"
+    if baseline:
+        line += f"  x{baseline / seconds:.1f}"
+    print(line)
+
+
+# Function to import one of the repo's scripts (they only do their work under __main__).
+# replacements are (old, new) text pairs applied to the source first, e.g. to point
+# a site URL at one of the stand-in servers in tests/servers
+def load_script(relative_path, replacements=()):
+    path = REPO_ROOT / relative_path
+    source = path.read_text(encoding='utf-8')
+    for old, new in replacements:
+        assert old in source, f'{old!r} not found in {relative_path}'
+        source = source.replace(old, new)
+    module = types.ModuleType(path.stem.replace('-', '_'))
+    module.__file__ = str(path)
+    # Registered like a normal import, so process pools can pickle the script's functions
+    sys.modules[module.__name__] = module
+    exec(compile(source, str(path), 'exec'), module.__dict__)
+    return module
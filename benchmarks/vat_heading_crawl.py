@@ -0,0 +1,52 @@
+"""vat_auto_scraper.py heading crawl: one heading at a time against the thread pool.
+
+Crawls the HEADINGS of the transcustoms stand-in, each answer delayed by
+LATENCY seconds like the real site. The baseline calls
+scrape_hs_codes_for_heading for one heading after the other, the way the script
+did; scrape_headings_concurrently runs WORKERS headings at the same time on
+one pooled session, uncapped and with the script's REQUESTS_PER_SECOND cap.
+Every run starts with an empty HTTP cache and must find the same codes.
+
+    python benchmarks/vat_heading_crawl.py
+"""
+
+import tempfile
+
+from timing import best_time, load_script, report
+from http_cache import HTTPCache
+from servers import serve
+from servers.transcustoms import HEADINGS, TranscustomsHandler, heading_codes
+
+LATENCY = 0.05
+WORKERS = (4, 8, 16)
+
+
+def main():
+    expected = [sorted(code for page in range(4) for code in heading_codes(heading, page)) for heading in HEADINGS]
+    print(f'{len(HEADINGS)} headings, {LATENCY * 1000:.0f} ms per page')
+
+    with serve(TranscustomsHandler, latency=LATENCY, fail_first=False) as server, \
+            tempfile.TemporaryDirectory() as folder:
+        scraper = load_script('China_HS_code_and_tarrifs/VAT/vat_auto_scraper.py',
+                              [('https://www.transcustoms.com', server.url)])
+
+        # Function to time one crawl of every heading from an empty cache
+        def crawl(label, run, baseline=None):
+            scraper.http_cache = HTTPCache(cache_dir=f'{folder}/{label}')
+            requests_before = len(server.requests)
+            codes = []
+            seconds = best_time(lambda: codes.append(run()), repeat=1)
+            assert codes[0] == expected
+            report(f'{label} ({len(server.requests) - requests_before} pages)', seconds, baseline, count=len(HEADINGS))
+            return seconds
+
+        baseline = crawl('one heading at a time', lambda: [scraper.scrape_hs_codes_for_heading(h) for h in HEADINGS])
+        for workers in WORKERS:
+            crawl(f'{workers} workers, no cap', lambda: scraper.scrape_headings_concurrently(
+                HEADINGS, max_workers=workers, requests_per_second=0), baseline)
+        crawl(f'{scraper.MAX_WORKERS} workers, {scraper.REQUESTS_PER_SECOND} requests/s cap',
+              lambda: scraper.scrape_headings_concurrently(HEADINGS), baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""transcustoms VAT cell: extract_vat_rate_fast against extract_vat_rate_soup.
+
+extract_vat_rate_soup is the whole-page html.parser lookup fetch_vat_rate ran on
+every tariff page before the byte-level search. Both read the saved pages in
+tests/fixtures/transcustoms the fast search handles, and the plain page padded
+to at least the 50 KB of a live tariff page. The pages the fast search hands over
+to soup are timed as fetch_vat_rate reads them: a missed search, then soup.
+
+    python benchmarks/vat_rate_parser.py
+"""
+
+from timing import FIXTURES_DIR, best_time, load_script, report
+
+CALLS = 50
+PADDED_KB = 50
+PAGES = ['tariff_plain', 'tariff_uppercase_tags', 'tariff_nested_markup', 'tariff_gbk']
+FALLBACK_PAGES = ['tariff_label_in_bold', 'tariff_nested_table']
+
+
+# Function to pad a page with copies of its related-headings rows to at least size_kb
+def padded_page(content, size_kb):
+    start, end = content.index(b'<table class="related">'), content.rindex(b'</table>')
+    rows = content[content.index(b'<tr>', start):end]
+    copies = max(0, -(-(size_kb * 1000 - len(content)) // len(rows)))
+    return content[:end] + rows * copies + content[end:]
+
+
+def main():
+    scraper = load_script('China_HS_code_and_tarrifs/VAT/vat_auto_scraper.py')
+    pages = {name: (FIXTURES_DIR / 'transcustoms' / f'{name}.html').read_bytes() for name in PAGES}
+    pages['tariff_plain, padded'] = padded_page(pages['tariff_plain'], PADDED_KB)
+    for label, content in pages.items():
+        encoding = 'gbk' if 'gbk' in label else 'utf-8'
+        text = content.decode(encoding)
+        assert scraper.extract_vat_rate_fast(content, encoding) == scraper.extract_vat_rate_soup(text)
+        baseline = best_time(lambda: [scraper.extract_vat_rate_soup(text) for _ in range(CALLS)])
+        seconds = best_time(lambda: [scraper.extract_vat_rate_fast(content, encoding) for _ in range(CALLS)])
+        print(f'{label}: {len(content) / 1e3:,.0f} KB, {CALLS} pages')
+        report('  extract_vat_rate_soup (html.parser)', baseline, count=CALLS)
+        report('  extract_vat_rate_fast (regex on bytes)', seconds, baseline, count=CALLS)
+
+    for name in FALLBACK_PAGES:
+        content = (FIXTURES_DIR / 'transcustoms' / f'{name}.html').read_bytes()
+        text = content.decode('utf-8')
+        assert scraper.extract_vat_rate_fast(content, 'utf-8') is None
+        baseline = best_time(lambda: [scraper.extract_vat_rate_soup(text) for _ in range(CALLS)])
+        seconds = best_time(lambda: [scraper.extract_vat_rate_fast(content, 'utf-8') or scraper.extract_vat_rate_soup(text)
+                                     for _ in range(CALLS)])
+        print(f'{name}: {len(content) / 1e3:,.0f} KB, {CALLS} pages')
+        report('  extract_vat_rate_soup (html.parser)', baseline, count=CALLS)
+        report('  missed fast search, then soup', seconds, baseline, count=CALLS)
+
+
+if __name__ == '__main__':
+    main()
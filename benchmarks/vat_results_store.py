@@ -0,0 +1,71 @@
+"""Chinese VAT results: ResultsStore against rewriting tax_id_VAT.json per result.
+
+The baseline is how the ETL saved results before ResultsStore: every query
+reread tax_id_VAT.json and every result rewrote the whole file (save_results).
+Both save TAX_IDS results, QUERY_SIZE of them per query, into a temporary
+folder and must leave the same tax_id_VAT.json behind.
+
+    python benchmarks/vat_results_store.py
+"""
+
+import json
+import os
+import tempfile
+
+from timing import best_time, load_script, report
+
+TAX_IDS = 3_000
+QUERY_SIZE = 4
+
+
+# Function to group the results the way the queries return them
+def queries(count, size):
+    tax_ids = [f'{n:08d}' for n in range(10_000_000, 10_000_000 + count)]
+    return [{tax_id: f'{9 + 4 * (int(tax_id) % 2)}%' for tax_id in tax_ids[start:start + size]}
+            for start in range(0, count, size)]
+
+
+def save_per_result(etl, batches, results_file):
+    for batch in batches:
+        existing_results = etl.load_existing_results(results_file)
+        for tax_id, vat_rate in batch.items():
+            existing_results[tax_id] = vat_rate
+            etl.save_results(existing_results, results_file)
+
+
+# process_results_table saves each row, then the worker the whole query
+def save_through_store(etl, batches, results_file):
+    store = etl.ResultsStore(results_file, results_file + '.journal.jsonl')
+    for batch in batches:
+        for tax_id, vat_rate in batch.items():
+            store.update({tax_id: vat_rate})
+        store.update(batch)
+    store.close()
+
+
+# Function to time one way of saving from an empty folder, returning the time and the saved file
+def timed_save(etl, save, batches, results_file, repeat):
+    def run():
+        if os.path.exists(results_file):
+            os.remove(results_file)
+        save(etl, batches, results_file)
+
+    seconds = best_time(run, repeat)
+    with open(results_file) as f:
+        return seconds, json.load(f)
+
+
+def main():
+    etl = load_script('China_HS_code_and_tarrifs/VAT/VatETLSoftware/Chinese_VAT_Software_ETL_Solution.py')
+    batches = queries(TAX_IDS, QUERY_SIZE)
+    with tempfile.TemporaryDirectory() as folder:
+        etl.LOG_FILE = os.path.join(folder, 'scrape_progress.log')
+        # The baseline is quadratic, one run is enough
+        baseline, expected = timed_save(etl, save_per_result, batches, os.path.join(folder, 'per_result.json'), 1)
+        seconds, saved = timed_save(etl, save_through_store, batches, os.path.join(folder, 'store.json'), 3)
+    assert saved == expected
+    report(f'save_results per result, {TAX_IDS:,} IDs', baseline, count=TAX_IDS)
+    report(f'ResultsStore, {TAX_IDS:,} IDs', seconds, baseline, count=TAX_IDS)
+
+if __name__ == '__main__':
+    main()
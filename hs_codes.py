@@ -0,0 +1,300 @@
+"""HS code helpers shared by the country tariff scripts.
+
+normalize_hs_codes formats a whole pandas Series of HS codes. Every code
+comes out as 4 digits, a dot and 4 digits ("0101.2100"):
+
+- the part before the first dot is left-padded with zeros ("101.21" -> "0101.2100")
+- the part after it is right-padded with zeros
+- a code without a dot is split after its 4th character ("01012100" -> "0101.2100")
+
+Each distinct code is formatted only once, which is where most of the time
+goes on tariff files that repeat their codes. With pyarrow installed the
+distinct codes are formatted by Arrow compute kernels, otherwise by
+format_hs_code one at a time (benchmarks/normalize_hs_codes.py).
+
+hs_code_text maps an HS code written in any of the country formats to one
+canonical 10-digit code, and HSCodeIndex uses it for exact and prefix
+(heading, subheading) lookups across all countries at once.
+
+Usage from a country script:
+
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root
+    from hs_codes import normalize_hs_codes
+
+    df['HS_CODE'] = normalize_hs_codes(df['HS_CODE'])
+
+    from hs_codes import load_country_index
+    index = load_country_index()
+    index.lookup('0101.21.00')     # (('Australia', 2), ('Egypt', 5), ...), same as '0101210000'
+    index.lookup_prefix('0101')    # every line under heading 01.01
+"""
+
+import os
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+HEADING_DIGITS = 4      # chapter + heading, before the dot
+SUBHEADING_DIGITS = 4   # subheading + national digits, after the dot
+
+
+def format_hs_code(text):
+    """Format one code's text as "XXXX.XXXX"; blank text becomes NaN."""
+    # Remove existing quotes and whitespace (quoted codes come from earlier CSV exports)
+    text = text.strip().strip('"')
+    if not text:
+        return np.nan
+    left, dot, right = text.partition('.')
+    if not dot:
+        left, right = text[:HEADING_DIGITS], text[HEADING_DIGITS:]
+    return left.zfill(HEADING_DIGITS)[:HEADING_DIGITS] + '.' + right.ljust(SUBHEADING_DIGITS, '0')[:SUBHEADING_DIGITS]
+
+
+def format_hs_codes_arrow(text):
+    """format_hs_code for a whole Arrow string array, as an object array."""
+    text = pc.utf8_trim(pc.utf8_trim_whitespace(text), '"')
+    # With a dot appended to every code, splitting at the first dot gives the
+    # heading and the rest + '.' for dotted codes, and the code and '' otherwise
+    parts = pc.split_pattern(pc.binary_join_element_wise(text, '.', ''), '.', max_splits=1)
+    left, after = pc.list_element(parts, 0), pc.list_element(parts, 1)
+    dotted = pc.greater(pc.utf8_length(after), 0)
+    right = pc.if_else(dotted, pc.utf8_slice_codeunits(after, 0, -1),
+                       pc.utf8_slice_codeunits(text, HEADING_DIGITS))
+
+    padded = pc.utf8_slice_codeunits(pc.utf8_lpad(left, HEADING_DIGITS, '0'), 0, HEADING_DIGITS)
+    right = pc.utf8_slice_codeunits(pc.utf8_rpad(right, SUBHEADING_DIGITS, '0'), 0, SUBHEADING_DIGITS)
+    formatted = pc.binary_join_element_wise(padded, right, '.').to_numpy(zero_copy_only=False)
+
+    # Padding matches str.zfill except after a +/- sign, so the few codes
+    # starting with a stray sign go through format_hs_code
+    signed = pc.or_(pc.starts_with(left, '+'), pc.starts_with(left, '-')).to_numpy(zero_copy_only=False)
+    for i in np.flatnonzero(signed):
+        formatted[i] = format_hs_code(text[i].as_py())
+    formatted[pc.equal(text, '').to_numpy(zero_copy_only=False)] = np.nan
+    return formatted
+
+
+def normalize_hs_codes(codes):
+    """Format HS codes as "XXXX.XXXX"; missing or blank codes become NaN."""
+    codes = pd.Series(codes)
+    # Tariff files repeat the same codes many times, so format each distinct code once.
+    # Distinct by text, not by value: 1, 1.0 and True (or 0.0 and -0.0) are equal
+    # values that format differently.
+    text = codes.astype(str).to_numpy(dtype=object)
+    if pa is not None:
+        encoded = pa.array(text, type=pa.string()).dictionary_encode()
+        formatted = format_hs_codes_arrow(encoded.dictionary)[encoded.indices.to_numpy()]
+    else:
+        distinct = {value: format_hs_code(value) for value in dict.fromkeys(text)}
+        formatted = np.array([distinct[value] for value in text], dtype=object)
+    formatted[codes.isna().to_numpy()] = np.nan
+    return pd.Series(formatted, index=codes.index, dtype=object)
+
+
+# Canonical HS code keys
+#
+# Every dataset writes its codes differently: "0101.2100" (China), "0101210000"
+# (Egypt, China VAT), "0101.21.00" or "0101.2" (Australia, Brazil, New Zealand),
+# "1.01" for heading 01.01 after a float round trip. hs_code_digits reads all of
+# them as one string of digits, and hs_code_text pads it with zeros to the 10
+# digits of a national tariff line, so the same line matches across countries:
+#
+#     "0101.2100", "0101.21.00", "0101210000"  ->  "0101210000"
+#
+# A shorter code pads to the line ending in zeros, so an exact lookup of the
+# heading "0101" also finds the line "0101000000"; lookup_prefix is the way to
+# get everything under a heading or subheading. hs_code_key is the same padded
+# code as an integer, for NumPy arrays of keys.
+
+NATIONAL_DIGITS = 10   # chapter, heading, subheading and national digits
+MIN_CODE_DIGITS = 4    # chapter and heading; shorter numbers are not HS codes
+KEY_PADDING = ['0' * (NATIONAL_DIGITS - size) for size in range(NATIONAL_DIGITS + 1)]
+
+# Last heading of each HS chapter (chapter 77 is reserved). Years, rates and
+# other numbers in the code columns rarely land on a real chapter and heading.
+HS_LAST_HEADINGS = {
+    1: 6, 2: 10, 3: 9, 4: 10, 5: 11, 6: 4, 7: 14, 8: 14, 9: 10, 10: 8,
+    11: 9, 12: 14, 13: 2, 14: 4, 15: 22, 16: 5, 17: 4, 18: 6, 19: 5, 20: 9,
+    21: 6, 22: 9, 23: 9, 24: 4, 25: 30, 26: 21, 27: 16, 28: 53, 29: 42, 30: 6,
+    31: 5, 32: 15, 33: 7, 34: 7, 35: 7, 36: 6, 37: 7, 38: 27, 39: 26, 40: 17,
+    41: 15, 42: 6, 43: 4, 44: 21, 45: 4, 46: 2, 47: 7, 48: 23, 49: 11, 50: 7,
+    51: 13, 52: 12, 53: 11, 54: 8, 55: 16, 56: 9, 57: 5, 58: 11, 59: 11, 60: 6,
+    61: 17, 62: 17, 63: 10, 64: 6, 65: 7, 66: 3, 67: 4, 68: 15, 69: 14, 70: 20,
+    71: 18, 72: 29, 73: 26, 74: 19, 75: 8, 76: 16, 78: 6, 79: 7, 80: 7, 81: 13,
+    82: 15, 83: 11, 84: 87, 85: 49, 86: 9, 87: 16, 88: 7, 89: 8, 90: 33, 91: 14,
+    92: 9, 93: 7, 94: 6, 95: 8, 96: 20, 97: 6,
+    # National chapters (Egypt, China and New Zealand use 98 and 99)
+    98: 99, 99: 99,
+}
+
+# Digits and dots (stray ones too, "0101." or "0101..21"), optionally after the
+# markers New Zealand puts in front of some codes ("S ", "\u00b1", or the
+# mojibake of a Windows symbol font)
+HS_CODE_PATTERN = re.compile(r'(?:[^\x00-\x7f]+\s*|S\s+)?(\d+)((?:\.\d*)*)', re.ASCII)
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Country outputs and the column holding their HS codes
+COUNTRY_CODE_COLUMNS = {
+    'Australia': ('Australia_HS_codes_and_tarrifs/tariff_classification_all_sections_chapters_data.csv', 'ReferenceNumber'),
+    'Brazil': ('Brazil_HS_codes_and_tarrifs/brazil_tarrif.csv', 'NCM'),
+    'China': ('China_HS_code_and_tarrifs/clean_V7_1_.csv', 'HS_CODE'),
+    'China VAT': ('China_HS_code_and_tarrifs/VAT/hs_codes_vat_rates.csv', 'HS_Code'),
+    'Egypt': ('Egypt_HS_codes_and_tarrif/egyptian_tariff_data_final_version.csv', 'Item'),
+    'New Zealand': ('New_Zealand_HS_codes_and_Tarrifs/milestone2_all_data_joined_sequentially.csv', 'Number'),
+}
+
+
+def hs_code_digits(code):
+    """Digits of one HS code ("01012100"), or '' if it is not an HS code."""
+    if not isinstance(code, str):
+        if pd.isna(code):
+            return ''
+        code = str(code)
+    match = HS_CODE_PATTERN.fullmatch(code.strip().strip('"').strip())
+    if not match:
+        return ''
+    first, rest = match.group(1), match.group(2).replace('.', '')
+
+    if match.group(2) and len(first) <= 2:
+        # "1.01" / "84.1": chapter.heading that lost its zeros as a float
+        digits = first.zfill(2) + (rest + '0' if len(rest) == 1 else rest)
+    elif match.group(2) and len(first) <= 4:
+        # "101.21" / "0101.21.00": the heading comes first
+        digits = first.zfill(4) + rest
+    elif not match.group(2) and len(first) % 2:
+        # Undotted codes read as numbers lose the leading zero of chapters 01-09
+        digits = '0' + first
+    else:
+        digits = first + rest
+
+    if not MIN_CODE_DIGITS <= len(digits) <= NATIONAL_DIGITS:
+        return ''
+    heading = int(digits[2:4])
+    if not 1 <= heading <= HS_LAST_HEADINGS.get(int(digits[:2]), 0):
+        return ''
+    return digits
+
+
+def hs_code_text(code):
+    """Code padded to the 10 digits of a tariff line ("0101210000"), or '' if it is not an HS code."""
+    digits = hs_code_digits(code)
+    return digits + KEY_PADDING[len(digits)] if digits else ''
+
+
+def hs_code_key(code):
+    """hs_code_text as an integer, or -1 if it is not an HS code."""
+    text = hs_code_text(code)
+    return int(text) if text else -1
+
+
+def hs_code_keys(codes):
+    """hs_code_key for a whole Series, as an int64 array (each distinct code is parsed once)."""
+    labels, uniques = pd.factorize(pd.Series(codes))
+    keys = np.fromiter((hs_code_key(code) for code in uniques), dtype=np.int64, count=len(uniques))
+    # Missing codes have label -1, which picks the trailing -1
+    return np.append(keys, -1)[labels]
+
+
+def hs_prefix_range(digits):
+    """[low, high) range holding the keys of every code that starts with these digits."""
+    low = int(digits + KEY_PADDING[len(digits)])
+    return low, low + 10 ** (NATIONAL_DIGITS - len(digits))
+
+
+class HSCodeIndex:
+    """Exact and prefix (heading, subheading) lookups of HS codes across countries.
+
+    Entries are sorted by key. A dict maps each padded code straight to its
+    entries for exact lookups, and bisect finds the slice of a prefix. Lookups
+    return (country, row label) pairs.
+    """
+
+    def __init__(self, codes_by_country):
+        self.countries = list(codes_by_country)
+        keys, country_ids, rows = [], [], []
+        for number, codes in enumerate(codes_by_country.values()):
+            codes = pd.Series(codes)
+            country_keys = hs_code_keys(codes)
+            valid = country_keys >= 0
+            keys.append(country_keys[valid])
+            country_ids.append(np.full(valid.sum(), number, dtype=np.int16))
+            rows.append(codes.index.to_numpy()[valid])
+
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.int64)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.country_ids = np.concatenate(country_ids)[order] if country_ids else np.empty(0, dtype=np.int16)
+        self.rows = np.concatenate(rows)[order] if rows else np.empty(0, dtype=object)
+
+        # Plain lists for the per-code lookups, which are faster on them than on arrays
+        self.key_list = self.keys.tolist()
+        self.entry_list = [(self.countries[c], row)
+                           for c, row in zip(self.country_ids.tolist(), self.rows.tolist())]
+        self.unique_keys, starts, self.counts = np.unique(self.keys, return_index=True, return_counts=True)
+        self.exact = {
+            f'{key:0{NATIONAL_DIGITS}d}': tuple(self.entry_list[start:start + count])
+            for key, start, count in zip(self.unique_keys.tolist(), starts.tolist(), self.counts.tolist())
+        }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, code):
+        """Entries whose code is exactly this code, in any of the country formats."""
+        exact = self.exact
+        # Shortcuts for the common shapes, "0101210000" / "01012100" and
+        # "0101.2100" / "0101.21.00"; hs_code_text reads them the same way
+        try:
+            if code.isdecimal():
+                size = len(code)
+                if size == NATIONAL_DIGITS:
+                    return exact.get(code, ())
+                if MIN_CODE_DIGITS <= size < NATIONAL_DIGITS and not size % 2:
+                    return exact.get(code + KEY_PADDING[size], ())
+            elif code.find('.') == MIN_CODE_DIGITS:
+                digits = code.replace('.', '')
+                if digits.isdecimal() and len(digits) <= NATIONAL_DIGITS:
+                    return exact.get(digits + KEY_PADDING[len(digits)], ())
+        except AttributeError:
+            pass  # not a string
+        return exact.get(hs_code_text(code), ())
+
+    def lookup_prefix(self, code):
+        """Entries whose code starts with this code's digits, e.g. all lines under a heading."""
+        digits = hs_code_digits(code)
+        if not digits:
+            return ()
+        low, high = hs_prefix_range(digits)
+        return tuple(self.entry_list[bisect_left(self.key_list, low):bisect_left(self.key_list, high)])
+
+    def count_matches(self, keys):
+        """Number of exact matches for each key in an array (batch lookups)."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if not len(self.unique_keys):
+            return np.zeros(len(keys), dtype=np.int64)
+        positions = np.searchsorted(self.unique_keys, keys).clip(max=len(self.unique_keys) - 1)
+        return np.where(self.unique_keys[positions] == keys, self.counts[positions], 0)
+
+
+def load_country_index(root=REPO_ROOT):
+    """Build an HSCodeIndex over the country outputs found under the repo root."""
+    codes_by_country = {}
+    for country, (path, column) in COUNTRY_CODE_COLUMNS.items():
+        path = os.path.join(root, path)
+        if not os.path.exists(path):
+            continue
+        # dtype=str keeps leading zeros; the Brazil CSV is not UTF-8 outside the code column
+        data = pd.read_csv(path, dtype=str, usecols=[column], encoding_errors='replace')
+        codes_by_country[country] = data[column]
+    return HSCodeIndex(codes_by_country)
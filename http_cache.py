@@ -0,0 +1,167 @@
+"""Shared on-disk HTTP cache for the country tariff scrapers.
+
+Each URL's last response body is kept on disk with its ETag / Last-Modified
+validators. The next request for that URL is sent as a conditional GET, and a
+304 Not Modified answer is served from disk instead of downloading the page
+again. The cache folder is kept under a size limit by evicting the least
+recently used entries.
+
+Usage from a country script:
+
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root
+    from http_cache import HTTPCache
+
+    http_cache = HTTPCache()
+    response = http_cache.get(url, timeout=15)
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache")
+MAX_CACHE_BYTES = 500 * 1024 * 1024  # 500 MB
+
+
+class HTTPCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, session=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.session = session or requests.Session()
+        self.lock = threading.Lock()
+        self.not_modified = 0  # answered from disk after a 304
+        self.downloaded = 0    # full responses fetched from the site
+        os.makedirs(cache_dir, exist_ok=True)
+        # Running size of the cached bodies; the folder is only scanned when over the limit
+        self.total_bytes = sum(size for _, size, _ in self._entries())
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".body", base + ".json"
+
+    def get(self, url, headers=None, session=None, **kwargs):
+        """GET a URL, revalidating any cached copy with a conditional request."""
+        body_path, meta_path = self._paths(url)
+        meta = self._load_meta(body_path, meta_path)
+
+        request_headers = dict(headers or {})
+        if meta:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = (session or self.session).get(url, headers=request_headers, **kwargs)
+
+        if response.status_code == 304 and meta:
+            cached = self._load_response(response, body_path, meta)
+            if cached is not None:
+                with self.lock:
+                    self.not_modified += 1
+                return cached
+            # The body was evicted or unreadable after the 304; fetch it again in full
+            response = (session or self.session).get(url, headers=headers, **kwargs)
+
+        with self.lock:
+            self.downloaded += 1
+        if response.status_code == 200 and (
+            response.headers.get("ETag") or response.headers.get("Last-Modified")
+        ):
+            self._store(url, response, body_path, meta_path)
+        return response
+
+    def summary(self):
+        total = self.not_modified + self.downloaded
+        return f"HTTP cache: {self.not_modified}/{total} pages unchanged (served from disk)"
+
+    def _load_meta(self, body_path, meta_path):
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load_response(self, response, body_path, meta):
+        try:
+            with open(body_path, "rb") as f:
+                content = f.read()
+            os.utime(body_path)  # mark as recently used for LRU eviction
+        except OSError:
+            return None
+
+        # Rebuild a normal 200 response so callers don't need to know about the cache
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.reason = "OK"
+        cached.url = meta["url"]
+        cached.headers = CaseInsensitiveDict(meta["headers"])
+        cached.encoding = meta["encoding"]
+        cached.request = response.request
+        cached._content = content
+        return cached
+
+    def _store(self, url, response, body_path, meta_path):
+        meta = {
+            "url": response.url or url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding,
+            "headers": dict(response.headers),
+        }
+        # Write to temporary files first so a crash never leaves a half-written entry;
+        # the names are per thread so the writes can happen outside the lock
+        suffix = f".{threading.get_ident()}.tmp"
+        with open(body_path + suffix, "wb") as f:
+            f.write(response.content)
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        with self.lock:
+            try:
+                replaced = os.path.getsize(body_path)
+            except OSError:
+                replaced = 0
+            os.replace(body_path + suffix, body_path)
+            os.replace(meta_path + suffix, meta_path)
+            self.total_bytes += len(response.content) - replaced
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".body"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+
+        # Drop least recently used bodies (oldest mtime) until under the limit
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            for stale in (path, path[: -len(".body")] + ".json"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+            total -= size
+        self.total_bytes = total
@@ -0,0 +1,112 @@
+"""Shared request helpers for the country tariff scrapers.
+
+HostRateLimiter spaces the requests that many fetch threads send to one host,
+create_session gives those threads a keep-alive connection pool, and
+get_with_retries / get_with_retries_async retry 429/5xx answers and
+connection errors with exponential backoff.
+
+Usage from a country script:
+
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root
+    from http_helpers import HostRateLimiter, create_session, get_with_retries
+
+    rate_limiter = HostRateLimiter(8)
+    with create_session(8) as session:
+        response = get_with_retries(session.get, url, rate_limiter=rate_limiter, timeout=30)
+"""
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MAX_RETRIES = 4            # Retries after a 429/5xx answer or a connection error
+BACKOFF_SECONDS = 1.0      # First retry delay, doubled on every further retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# Rate limiter shared by all fetch threads, spaces requests to the same host
+class HostRateLimiter:
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        # Reserve the next free slot for this host, then sleep outside the lock
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Function to create a keep-alive session with one pooled connection per fetch thread
+def create_session(max_connections):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Function to work out the wait before the next attempt, or None when the
+# response (or the exception, after the last attempt) should go to the caller
+def retry_delay(attempt, response, max_retries, backoff_seconds, retry_statuses):
+    if attempt == max_retries:
+        return None
+    if response is None:  # connection error or timeout
+        return backoff_seconds * 2 ** attempt
+    if response.status_code not in retry_statuses:
+        return None
+    # Wait as long as the server asks for, otherwise back off exponentially
+    retry_after = response.headers.get("Retry-After", "")
+    return float(retry_after) if retry_after.isdigit() else backoff_seconds * 2 ** attempt
+
+
+# Function to GET a page with `get` (session.get, HTTPCache.get, ...), retrying
+# with exponential backoff on 429/5xx and connection errors
+def get_with_retries(get, url, rate_limiter=None, max_retries=MAX_RETRIES,
+                     backoff_seconds=BACKOFF_SECONDS, retry_statuses=RETRY_STATUSES, **kwargs):
+    for attempt in range(max_retries + 1):
+        if rate_limiter:
+            rate_limiter.wait(url)
+        try:
+            response = get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            delay = retry_delay(attempt, None, max_retries, backoff_seconds, retry_statuses)
+            if delay is None:
+                raise
+        else:
+            delay = retry_delay(attempt, response, max_retries, backoff_seconds, retry_statuses)
+            if delay is None:
+                return response
+        time.sleep(delay)
+
+
+# Same as get_with_retries for asyncio code. The blocking request runs in a
+# worker thread, the wait between attempts does not hold one
+async def get_with_retries_async(get, url, max_retries=MAX_RETRIES, backoff_seconds=BACKOFF_SECONDS,
+                                 retry_statuses=RETRY_STATUSES, **kwargs):
+    for attempt in range(max_retries + 1):
+        try:
+            response = await asyncio.to_thread(get, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            delay = retry_delay(attempt, None, max_retries, backoff_seconds, retry_statuses)
+            if delay is None:
+                raise
+        else:
+            delay = retry_delay(attempt, response, max_retries, backoff_seconds, retry_statuses)
+            if delay is None:
+                return response
+        await asyncio.sleep(delay)
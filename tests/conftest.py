@@ -0,0 +1,61 @@
+import importlib.util
+import os
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# The repo root holds the shared modules (hs_codes, http_cache, ...)
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def load_script(relative_path):
+    """Import one of the repo's scripts and return its globals.
+
+    The scripts only do their work (download, scrape, write CSVs) under
+    `if __name__ == "__main__":`, so importing one runs nothing but its imports
+    and definitions. Tests replace settings and shared objects such as the HTTP
+    cache in the returned dict, which is the module's own namespace. A script
+    whose packages are not installed skips the test.
+    """
+    path = REPO_ROOT / relative_path
+    spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ModuleNotFoundError as e:
+        pytest.skip(f"{relative_path} needs {e.name}")
+    return vars(module)
+
+
+def run_script(relative_path, cwd, replacements=(), constants=None):
+    """Run one of the repo's scripts from cwd after editing its source.
+
+    replacements are (old, new) text pairs, e.g. to point a site URL at one of
+    the stand-in servers in tests/servers; constants replace the value of
+    UPPERCASE settings (the whole `NAME = ...` line). Both must match, so a
+    renamed setting fails the test instead of silently running the real crawl.
+    Returns the script's globals.
+    """
+    path = REPO_ROOT / relative_path
+    source = path.read_text(encoding="utf-8")
+    for old, new in replacements:
+        assert old in source, f"{old!r} not found in {relative_path}"
+        source = source.replace(old, new)
+    for name, value in (constants or {}).items():
+        source, count = re.subn(rf"^{name} = .*$", f"{name} = {value!r}", source, count=1, flags=re.M)
+        assert count, f"{name} not found in {relative_path}"
+
+    namespace = {"__name__": "__main__", "__file__": str(path)}
+    previous = os.getcwd()
+    os.chdir(cwd)
+    try:
+        exec(compile(source, str(path), "exec"), namespace)
+    finally:
+        os.chdir(previous)
+    return namespace
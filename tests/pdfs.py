@@ -0,0 +1,76 @@
+"""Synthetic PDFs for the PDF extraction tests and benchmarks."""
+
+from pathlib import Path
+
+# ToUnicode map of the CJK font: every 2-byte code is the UTF-16 code unit it shows
+IDENTITY_UNICODE_CMAP = (
+    b"/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n"
+    b"/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+    b"/CMapName /Adobe-Identity-UCS def /CMapType 2 def\n"
+    b"1 begincodespacerange <0000> <FFFF> endcodespacerange\n"
+    b"1 beginbfrange <0000> <FFFF> <0000> endbfrange\n"
+    b"endcmap CMapName currentdict /CMap defineresource pop end end"
+)
+
+
+def write_pdf(path, page_streams, fonts):
+    """Write a PDF whose pages draw page_streams with font object F1 (objects 3 onwards)."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, *fonts]
+    kids = []
+    for stream in page_streams:
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    Path(path).write_bytes(bytes(out))
+
+
+def write_synthetic_pdf(path, page_count, rows_per_page=45):
+    """Write a plain PDF of tariff-like tables: NCM code, description and rate columns."""
+    streams = []
+    for page in range(page_count):
+        lines = [b"BT /F1 9 Tf", b"1 0 0 1 50 800 Tm (NCM) Tj",
+                 b"1 0 0 1 160 800 Tm (DESCRICAO) Tj", b"1 0 0 1 480 800 Tm (ALIQUOTA) Tj"]
+        for row in range(rows_per_page):
+            y = 784 - row * 16
+            code = f"{(page * rows_per_page + row) % 10000:04d}.{row % 100:02d}.{page % 100:02d}"
+            lines.append(f"1 0 0 1 50 {y} Tm ({code}) Tj".encode())
+            lines.append(f"1 0 0 1 160 {y} Tm (Item {page}-{row} synthetic description) Tj".encode())
+            lines.append(f"1 0 0 1 480 {y} Tm ({(page + row) % 20}) Tj".encode())
+        lines.append(b"ET")
+        streams.append(b"\n".join(lines))
+    write_pdf(path, streams, [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"])
+
+
+def write_text_pdf(path, pages):
+    """Write a PDF with one line of (e.g. Chinese) text per string in each page's list.
+
+    The font is not embedded; its ToUnicode map is what lets text extraction
+    read the lines back.
+    """
+    streams = []
+    for lines in pages:
+        commands = [b"BT /F1 10 Tf"]
+        for number, text in enumerate(lines):
+            commands.append(b"1 0 0 1 50 %d Tm <%s> Tj" % (800 - number * 14, text.encode("utf-16-be").hex().encode()))
+        commands.append(b"ET")
+        streams.append(b"\n".join(commands))
+    fonts = [
+        b"<< /Type /Font /Subtype /Type0 /BaseFont /STSong-Light /Encoding /Identity-H "
+        b"/DescendantFonts [4 0 R] /ToUnicode 5 0 R >>",
+        b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /STSong-Light "
+        b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(IDENTITY_UNICODE_CMAP), IDENTITY_UNICODE_CMAP),
+    ]
+    write_pdf(path, streams, fonts)
@@ -0,0 +1,116 @@
+"""Local stand-ins for the sites the scrapers crawl, for tests and benchmarks.
+
+Each module in this package defines a request handler that answers like one of
+the real sites, from the fixtures under tests/fixtures or from generated pages.
+serve() runs a handler on a free localhost port in a background thread:
+
+    with serve(ABFReplayHandler, latency=0.05) as server:
+        content = requests.get(server.url + "/section-i/chapter-1").content
+        print(len(server.requests))
+
+Every module can also be run on its own to benchmark a script against it, e.g.
+from the tests directory:
+
+    python -m servers.abf_replay --port 8765 --latency 0.2
+"""
+
+import argparse
+import contextlib
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler, port=0, latency=0.0, **state):
+        super().__init__(("127.0.0.1", port), handler)
+        self.latency = latency      # Seconds every answer is delayed, like a remote site
+        self.state = state          # Handler settings a test can change while the server runs
+        self.lock = threading.Lock()
+        self.requests = []          # Paths of all requests received, in arrival order
+        self.in_flight = 0
+        self.most_in_flight = 0     # Most requests handled at the same time
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Base handler: records the request, waits the latency, then calls respond()."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes on keep-alive connections
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.in_flight += 1
+            server.most_in_flight = max(server.most_in_flight, server.in_flight)
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+            url = urlparse(self.path)
+            self.respond(url.path, {key: values[0] for key, values in parse_qs(url.query).items()})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def respond(self, path, query):
+        raise NotImplementedError
+
+    def send_body(self, body, status=200, content_type="text/html; charset=utf-8", etag=True, headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        extra = dict(headers or {})
+        if etag and status == 200:
+            # Pages carry an ETag, so conditional requests from HTTPCache get a 304
+            tag = '"%s"' % hashlib.sha1(body).hexdigest()
+            extra["ETag"] = tag
+            if self.headers.get("If-None-Match") == tag:
+                status, body = 304, b""
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in extra.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@contextlib.contextmanager
+def serve(handler, latency=0.0, **state):
+    server = StandInServer(handler, latency=latency, **state)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+# Function to run a handler from the command line until interrupted
+def main(handler, description, default_port):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--port", type=int, default=default_port)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every answer")
+    args = parser.parse_args()
+    server = StandInServer(handler, port=args.port, latency=args.latency)
+    print(f"Serving {handler.__name__} on {server.url} (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
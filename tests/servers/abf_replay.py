@@ -0,0 +1,45 @@
+"""Replays ABF Schedule 3 chapter pages from tests/fixtures/australia.
+
+/<anything>/section-ii/chapter-7 answers with section-ii_chapter-7.html. Chapters
+without a fixture get the largest fixture page (chapter 84), so a crawl of all
+97 chapters from generate_urls() can be timed; unknown paths answer 404.
+state["edits"] ({fixture name: (old, new)}) changes the text of a page, like
+an update of the live schedule.
+
+    python -m servers.abf_replay --port 8765 --latency 0.2
+"""
+
+import re
+from pathlib import Path
+
+from servers import StandInHandler, main
+
+FIXTURES = Path(__file__).resolve().parents[1] / "fixtures" / "australia"
+FALLBACK_PAGE = "section-xvi_chapter-84.html"
+CHAPTER_PATH = re.compile(r"/(section-[ivx]+)/(chapter-\d+)/?$")
+
+
+# Function to map a chapter path to the checkpoint-style fixture name
+def fixture_name(path):
+    match = CHAPTER_PATH.search(path)
+    return f"{match.group(1)}_{match.group(2)}.html" if match else None
+
+
+class ABFReplayHandler(StandInHandler):
+    def respond(self, path, query):
+        name = fixture_name(path)
+        if name is None:
+            self.send_body("<html><body>Page not found</body></html>", status=404)
+            return
+        page = FIXTURES / name
+        if not page.exists():
+            page = FIXTURES / FALLBACK_PAGE
+        content = page.read_bytes()
+        edit = self.server.state.get("edits", {}).get(name)
+        if edit:
+            content = content.replace(*(text.encode("utf-8") for text in edit))
+        self.send_body(content)
+
+
+if __name__ == "__main__":
+    main(ABFReplayHandler, "ABF Schedule 3 chapter replay", 8765)
@@ -0,0 +1,75 @@
+"""Stand-in for the customs.gov.eg tariff listing (Services/Tarif).
+
+/Services/Tarif?page=<n>&type=1&chapterId=<c> lists ROWS_PER_PAGE items per page
+for CHAPTER_PAGES[c] pages (0-12, fixed per chapter). Page 2 of a chapter also
+holds a row without an item and a row with a single cell, which the crawler
+skips. Past the last page, chapters divisible by 3 answer a table with only
+its header row and the others a page without a table, the two ways the site
+ends a chapter. With the server state revision=1 the listing changes the way
+it does between two runs: an item of chapter 2 is edited, one of chapter 1 is
+removed and one is added to chapter 3 (see listing_rows). With the server state
+failures={(chapter, page): n} the first n requests for that page answer 503.
+
+    python -m servers.customs_listing --port 8771 --latency 0.05
+"""
+
+import random
+
+from servers import StandInHandler, main
+
+CHAPTERS = range(1, 100)
+ROWS_PER_PAGE = 20
+
+EDITED = (2, 1, 0)     # (chapter, page, row) whose description changes in revision 1
+REMOVED = (1, 1, 3)    # (chapter, page, row) missing from revision 1
+ADDED = (3, 1)         # (chapter, page) with one more item in revision 1
+
+# The chapters revision 1 changes always have pages, the others 0-12
+CHAPTER_PAGES = {chapter: random.Random(chapter).choice([0, 1, 1, 2, 3, 5, 8, 12]) for chapter in CHAPTERS}
+CHAPTER_PAGES.update({1: 2, 2: 1, 3: 3})
+
+
+# Function to build the cells of every row on one listing page, None past the
+# chapter's last page
+def listing_rows(chapter, page, revision=0):
+    if page > CHAPTER_PAGES.get(chapter, 0):
+        return None
+    rows = []
+    for i in range(ROWS_PER_PAGE):
+        if revision and (chapter, page, i) == REMOVED:
+            continue
+        text = "Edited goods description" if revision and (chapter, page, i) == EDITED else f"Goods {chapter}-{page}-{i}"
+        rows.append([f"{chapter:02d}{page:02d}/{i:06d}", text, f"{(chapter + i) % 40}%"])
+    if revision and (chapter, page) == ADDED:
+        rows.append([f"{chapter:02d}{page:02d}/999999", "New goods", "5%"])
+    if page == 2:
+        rows += [["", "Continued description"], ["Single cell"]]
+    return rows
+
+
+class CustomsListingHandler(StandInHandler):
+    def respond(self, path, query):
+        if path != "/Services/Tarif":
+            self.send_body("", status=404)
+            return
+        chapter, page = int(query["chapterId"]), int(query["page"])
+        with self.server.lock:
+            failures = self.server.state.get("failures", {})
+            fail = failures.get((chapter, page), 0) > 0
+            if fail:
+                failures[(chapter, page)] -= 1
+        if fail:
+            self.send_body("", status=503)
+            return
+        rows = listing_rows(chapter, page, self.server.state.get("revision", 0))
+        header = "<tr><th>Item</th><th>Text of the item</th><th>Duty</th></tr>"
+        if rows is None:
+            table = f'<table class="table">{header}</table>' if chapter % 3 == 0 else "<p>No data</p>"
+        else:
+            cells = "".join("<tr>" + "".join(f"<td> {cell} </td>" for cell in row) + "</tr>" for row in rows)
+            table = f'<table class="table">{header}{cells}</table>'
+        self.send_body(f"<html><body><div class=\"container\">{table}</div></body></html>")
+
+
+if __name__ == "__main__":
+    main(CustomsListingHandler, "customs.gov.eg tariff listing stand-in", 8771)
@@ -0,0 +1,109 @@
+"""Stand-in for the online.customs.gov.cn tax rate query the Chinese VAT ETL drives.
+
+QUERY_PATH is the query page: typing a tax ID into input#dutySpa and clicking
+button#queryBtn loads query.json and shows div#result with table#listData (or
+div#noResult), the way the real page does. Each listed code links to
+DETAIL_PATH?id=<id>; clicking its "进口消费税税率、增值税税率" link loads detail.json
+and fills table.showTable tbody#add with the VAT rate. Every tax ID lists
+CODE_SUFFIXES under it, except IDs ending in 99, which have no results. The
+VAT rate of a code is vat_rate(code).
+
+    python -m servers.customs_query --port 8774 --latency 0.2
+"""
+
+import json
+
+from servers import StandInHandler, main
+
+QUERY_PATH = "/ociswebserver/pages/jckspsl/"
+DETAIL_PATH = QUERY_PATH + "detail.html"
+CODE_SUFFIXES = ["1000", "9000"]
+
+QUERY_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>进出口商品税率查询</title></head>
+<body>
+<input id="dutySpa" type="text"><button id="queryBtn" type="button">查询</button>
+<div id="result" style="display: none">
+  <table id="listData">
+    <thead><tr><th>序号</th><th>税则号列</th><th>商品名称</th><th>操作</th></tr></thead>
+    <tbody></tbody>
+  </table>
+</div>
+<div id="noResult" style="display: none">暂无数据</div>
+<script>
+document.getElementById('queryBtn').addEventListener('click', function () {
+  var code = document.getElementById('dutySpa').value;
+  document.getElementById('result').style.display = 'none';
+  document.getElementById('noResult').style.display = 'none';
+  fetch('query.json?code=' + encodeURIComponent(code))
+    .then(function (response) { return response.json(); })
+    .then(function (rows) {
+      var body = document.querySelector('#listData tbody');
+      body.innerHTML = '';
+      rows.forEach(function (row, i) {
+        var tr = document.createElement('tr');
+        tr.innerHTML = '<td>' + (i + 1) + '</td><td>' + row.code + '</td><td>' + row.name + '</td>'
+          + '<td><a class="showDetailA" name="' + row.id + '" href="javascript:void(0)">详情</a></td>';
+        body.appendChild(tr);
+      });
+      document.getElementById(rows.length ? 'result' : 'noResult').style.display = 'block';
+    });
+});
+</script>
+</body></html>
+"""
+
+DETAIL_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>详情</title></head>
+<body>
+<a id="vatLink" href="javascript:void(0)">进口消费税税率、增值税税率</a>
+<table class="showTable">
+  <thead><tr><th>税种</th><th>税率</th></tr></thead>
+  <tbody id="add"></tbody>
+</table>
+<script>
+var id = new URLSearchParams(location.search).get('id');
+document.getElementById('vatLink').addEventListener('click', function () {
+  fetch('detail.json?id=' + encodeURIComponent(id))
+    .then(function (response) { return response.json(); })
+    .then(function (detail) {
+      document.getElementById('add').innerHTML = '<tr><td>增值税税率</td><td>' + detail.vat + '</td></tr>';
+    });
+});
+</script>
+</body></html>
+"""
+
+
+# Function to list the codes a query for tax_id returns
+def query_rows(tax_id):
+    if not tax_id.isdigit() or tax_id.endswith("99"):
+        return []
+    return [{"code": tax_id + suffix, "name": f"Goods {tax_id}{suffix}", "id": f"id-{tax_id}{suffix}"}
+            for suffix in CODE_SUFFIXES]
+
+
+def vat_rate(code):
+    return "13%" if int(code[:4]) % 2 else "9%"
+
+
+class CustomsQueryHandler(StandInHandler):
+    def respond(self, path, query):
+        if path == QUERY_PATH:
+            self.send_body(QUERY_PAGE)
+        elif path == DETAIL_PATH:
+            self.send_body(DETAIL_PAGE)
+        elif path == QUERY_PATH + "query.json":
+            self.send_json(query_rows(query.get("code", "")))
+        elif path == QUERY_PATH + "detail.json" and query.get("id", "").startswith("id-"):
+            self.send_json({"vat": vat_rate(query["id"][3:])})
+        else:
+            self.send_body("", status=404)
+
+    def send_json(self, data):
+        self.send_body(json.dumps(data, ensure_ascii=False), content_type="application/json; charset=utf-8",
+                       etag=False)
+
+
+if __name__ == "__main__":
+    main(CustomsQueryHandler, "online.customs.gov.cn tax rate query stand-in", 8774)
@@ -0,0 +1,75 @@
+"""Stand-in for the FEI tariff pages (fei.org.eg/tariff/tariff.php?hscode=<code>).
+
+Code 010121 answers with the saved page tests/fixtures/egypt_fei/tariff_010121.html.
+Other codes get a page in the same layout built from fei_fields(code), which
+covers the cases the enrichment handles differently: by int(code) % 7, a
+6-digit code can have no data at all (0) or no VAT (1), which sends the lookup
+on to the full 10-digit code, and codes 2-4 list that many agreements. With the
+server state fail_first=True the first request for a code divisible by 5 answers
+503, so the retries run.
+
+    python -m servers.fei --port 8772 --latency 0.05
+"""
+
+from html import escape
+from pathlib import Path
+
+from servers import StandInHandler, main
+
+SAVED_PAGES = {"010121": Path(__file__).resolve().parents[1] / "fixtures" / "egypt_fei" / "tariff_010121.html"}
+
+
+# Function to list the fields the FEI page of a code shows, None for a page without data
+def fei_fields(code):
+    kind = int(code) % 7 if code.isdigit() else 0
+    if len(code) <= 6 and kind == 0:
+        return None
+    fields = {"Description": f"Goods of {code} <grade A>", "Unit": "KG", "Custom Fee": f"{kind * 5}%",
+              "VAT": "14%" if kind % 2 else "5%", "Product Type": f"Type {kind}"}
+    if len(code) <= 6 and kind == 1:
+        del fields["VAT"]
+    agreements = [(f"Egypt-{n} & partners", f"{n * kind}%") for n in range(kind)] if kind in (2, 3, 4) else []
+    return fields, agreements
+
+
+def render_page(code):
+    found = fei_fields(code)
+    if found is None:
+        return "<html><body><div class=\"container\">No results</div></body></html>"
+    fields, agreements = found
+    description = escape(fields["Description"], quote=False)
+    description = f'<div class="span12 content"><strong>Description: </strong>{description}</div>'
+    content = "".join(f'<div class="span6 content"><strong>{name}: </strong>{value}</div>'
+                      for name, value in fields.items() if name != "Description")
+    deals = ""
+    if agreements:
+        deals = ('<p class="agree">Agreements:</p><div class="row deals">'
+                 '<div class="span6"><strong>Agreement</strong></div><div class="span6"><strong>Rate</strong></div>'
+                 + "".join(f'<div class="span6">{escape(name, quote=False)}</div><div class="span6">{rate}</div>'
+                           for name, rate in agreements)
+                 + "</div>")
+    return (f'<html><body><div class="container">{description}<div class="row">{content}'
+            f'<div class="span6 content"></div></div>{deals}</div></body></html>')
+
+
+class FEIHandler(StandInHandler):
+    def respond(self, path, query):
+        if not path.endswith("/tariff.php"):
+            self.send_body("", status=404)
+            return
+        code = query.get("hscode", "")
+        state = self.server.state
+        with self.server.lock:
+            attempts = state.setdefault("attempts", {})
+            attempts[code] = attempts.get(code, 0) + 1
+            first = attempts[code] == 1
+        if first and state.get("fail_first", True) and code.isdigit() and int(code) % 5 == 0:
+            self.send_body("busy", status=503)
+        elif code in SAVED_PAGES:
+            self.send_body(SAVED_PAGES[code].read_bytes())
+        else:
+            self.send_body(render_page(code))
+
+
+if __name__ == "__main__":
+    main(FEIHandler, "FEI tariff page stand-in", 8772)
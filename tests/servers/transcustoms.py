@@ -0,0 +1,63 @@
+"""Stand-in for the transcustoms.com pages vat_auto_scraper.py reads.
+
+/HS_tree.htm lists HEADINGS. /Hscode/HScode_search.asp?word=<heading>&page=<n>
+lists five 10-digit codes per page; a heading has 1-3 pages of codes
+(int(heading) % 3 + 1), then empty pages. /China_HS_Code/China_Tariff.asp?HS_Code=<code>
+is a padded tariff page with the Import VAT cell: 13% when the code's fourth digit
+is odd, else 9% (see vat_rate). With the server state fail_first=True (the default)
+the first request for a code ending in 0/4/8 answers 503 and one ending in 1/5/9
+answers 429 with Retry-After: 0, like the real site under load.
+
+    python -m servers.transcustoms --port 8770 --latency 0.05
+"""
+
+from servers import StandInHandler, main
+
+HEADINGS = [f"{chapter:02d}{heading:02d}" for chapter in range(1, 31) for heading in range(1, 3)]
+CODES_PER_PAGE = 5
+
+
+# Function to list the codes on one search page of a heading, [] past its last page
+def heading_codes(heading, page):
+    if page > int(heading) % 3:
+        return []
+    return [f"{heading}{page}{i:05d}" for i in range(CODES_PER_PAGE)]
+
+
+def vat_rate(code):
+    return "13%" if int(code[3]) % 2 else "9%"
+
+
+class TranscustomsHandler(StandInHandler):
+    def respond(self, path, query):
+        if path == "/HS_tree.htm":
+            headings = self.server.state.get("headings", HEADINGS)
+            self.send_body("".join(f"<p>Heading {heading}: goods</p>" for heading in headings))
+        elif path.endswith("/HScode_search.asp"):
+            codes = heading_codes(query["word"], int(query["page"]))
+            self.send_body("<table>" + "".join(f"<tr><td>{code}</td></tr>\n" for code in codes) + "</table>")
+        elif path.endswith("/China_Tariff.asp"):
+            self.respond_tariff(query["HS_Code"])
+        else:
+            self.send_body("", status=404)
+
+    def respond_tariff(self, code):
+        state = self.server.state
+        with self.server.lock:
+            attempts = state.setdefault("attempts", {})
+            attempts[code] = attempts.get(code, 0) + 1
+            first = attempts[code] == 1
+        if first and state.get("fail_first", True):
+            if int(code[-1]) % 4 == 0:
+                self.send_body("", status=503)
+                return
+            if int(code[-1]) % 4 == 1:
+                self.send_body("", status=429, headers={"Retry-After": "0"})
+                return
+        self.send_body("<html><body>" + "<div>filler</div>" * 200
+                       + "<table><tr><td>Import VAT (Value-Added Tax)</td>"
+                       + f"<td> {vat_rate(code)} </td></tr></table></body></html>")
+
+
+if __name__ == "__main__":
+    main(TranscustomsHandler, "transcustoms.com stand-in", 8770)
@@ -0,0 +1,60 @@
+"""Australia chapter checkpoints: a rerun only parses and cleans the chapters whose page changed."""
+import json
+
+import pytest
+
+from conftest import run_script
+from servers import serve
+from servers.abf_replay import ABFReplayHandler
+
+SCRIPT = "Australia_HS_codes_and_tarrifs/scraper.py"
+BASE_URL = "https://www.abf.gov.au/importing-exporting-and-manufacturing/tariff-classification/current-tariff/schedule-3"
+OUTPUT = "tariff_classification_all_section_found_all_ref.csv"
+CHAPTERS = 12  # sections I and II, which hold most of the fixture pages
+EDITED = "section-ii_chapter-7.html"
+
+
+@pytest.fixture
+def server():
+    with serve(ABFReplayHandler) as server:
+        yield server
+
+
+def run(tmp_path, server, capsys, version=1):
+    replacements = [
+        (BASE_URL, server.url),
+        ("urls = generate_urls()", f"urls = generate_urls()[:{CHAPTERS}]"),
+        ("http_cache = HTTPCache()", f"http_cache = HTTPCache(cache_dir={str(tmp_path / 'cache')!r})"),
+    ]
+    run_script(SCRIPT, tmp_path, replacements, {"REQUESTS_PER_SECOND": 0, "CHECKPOINT_VERSION": version})
+    reused = capsys.readouterr().out.count("Unchanged, using checkpoint for")
+    return reused, (tmp_path / OUTPUT).read_text(encoding="utf-8")
+
+
+def test_rerun_reuses_the_checkpoints_of_unchanged_chapters(tmp_path, server, capsys):
+    reused, first = run(tmp_path, server, capsys)
+    assert reused == 0
+
+    reused, second = run(tmp_path, server, capsys)
+    assert reused == CHAPTERS
+    assert second == first
+
+    server.state["edits"] = {EDITED: ("Peas", "Garden peas")}
+    reused, edited = run(tmp_path, server, capsys)
+    assert reused == CHAPTERS - 1
+    changed = set(edited.splitlines()) ^ set(first.splitlines())
+    assert changed == {"0708.10.00,10,kg,Peas,Free,", "0708.10.00,10,kg,Garden peas,Free,"}
+
+
+def test_new_checkpoint_version_rebuilds_every_chapter(tmp_path, server, capsys):
+    _, first = run(tmp_path, server, capsys)
+
+    reused, rebuilt = run(tmp_path, server, capsys, version=2)
+    assert reused == 0
+    assert rebuilt == first
+    manifest = json.loads((tmp_path / "checkpoints" / "manifest.json").read_text())
+    assert len(manifest) == CHAPTERS
+    assert {entry["version"] for entry in manifest.values()} == {2}
+
+    reused, _ = run(tmp_path, server, capsys, version=2)
+    assert reused == CHAPTERS
@@ -0,0 +1,51 @@
+"""The column-wise Australia clean_data must clean like the row-wise one it replaced."""
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from baselines import australia_clean_data
+from conftest import FIXTURES_DIR, load_script
+
+PAGES = sorted((FIXTURES_DIR / "australia").glob("*.html"))
+# Cells the fixture pages do not have: every reference number pattern, dashes, missing values
+EDGE_ROWS = [
+    ["0101.21.00", "10", "=-Pure-bred  breeding animals", "Free", "TCO  8471.30.00 refers", ""],
+    ["0101.29.00", "", "--Other--", "5%", "See 8471 and 8528.7", ""],
+    ["0102", "", " - = Live bovine\tanimals - ", "", "Heading 8528.72 only", ""],
+    ["0103.10.00", "", "Pure-bred", "", "8528.7", ""],
+    ["0103.91", "", "", "", "no reference", ""],
+    ["0104.10.00", None, None, "Free", None, "TCO"],
+    [None, None, None, None, None, None],
+    ["", "", "", "", "", ""],
+]
+
+
+@pytest.fixture(scope="module")
+def australia():
+    return load_script("Australia_HS_codes_and_tarrifs/scraper.py")
+
+
+def fixture_rows(australia):
+    rows = []
+    # parse_page prints the tables it found
+    with contextlib.redirect_stdout(io.StringIO()):
+        for path in PAGES:
+            rows.extend(australia["parse_page"](path.read_bytes(), path.name))
+    return rows
+
+
+def test_clean_data_matches_row_wise_cleaning(australia):
+    rows = fixture_rows(australia) + EDGE_ROWS
+    frame = pd.DataFrame(rows, columns=australia["HEADERS"])
+    expected = australia_clean_data(frame.copy())
+    cleaned = australia["clean_data"](frame)
+    pd.testing.assert_frame_equal(cleaned, expected)
+
+
+def test_reference_numbers_take_the_first_pattern_that_matches(australia):
+    frame = pd.DataFrame(EDGE_ROWS[:6], columns=australia["HEADERS"])
+    cleaned = australia["clean_data"](frame)
+    assert list(cleaned["ReferenceNumber"]) == ["8471.30.00", "8471", "8528", "8528", "no reference", None]
+    assert list(cleaned["Goods"]) == ["Pure - bred breeding animals", "Other", "Live bovine animals", "Pure - bred", "", None]
@@ -0,0 +1,51 @@
+"""Concurrent chapter fetching against a local replay of the ABF chapter pages."""
+import time
+
+import pytest
+
+from conftest import load_script
+from http_cache import HTTPCache
+from servers import serve
+from servers.abf_replay import ABFReplayHandler
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    namespace = load_script("Australia_HS_codes_and_tarrifs/scraper.py")
+    namespace["http_cache"] = HTTPCache(cache_dir=str(tmp_path / "cache"))
+    return namespace
+
+
+def replay_urls(scraper, server, count):
+    # generate_urls() points at abf.gov.au; keep the section/chapter part
+    return [server.url + "/" + url.split("/schedule-3/")[1] for url in scraper["generate_urls"]()[:count]]
+
+
+def test_concurrent_rows_match_sequential(scraper):
+    with serve(ABFReplayHandler) as server:
+        urls = replay_urls(scraper, server, 20)
+        sequential = [scraper["scrape_page"](url) for url in urls]
+        concurrent = scraper["scrape_pages_concurrently"](urls, max_workers=8, requests_per_second=0)
+    assert concurrent == sequential
+    assert all(concurrent)
+
+
+def test_chapters_are_fetched_in_parallel(scraper):
+    with serve(ABFReplayHandler, latency=0.1) as server:
+        urls = replay_urls(scraper, server, 16)
+        start = time.perf_counter()
+        scraper["scrape_pages_concurrently"](urls, max_workers=8, requests_per_second=0)
+        elapsed = time.perf_counter() - start
+    # One at a time this takes 16 x 0.1s
+    assert server.most_in_flight >= 4
+    assert elapsed < 0.8
+
+
+def test_rate_cap_spaces_the_requests(scraper):
+    with serve(ABFReplayHandler) as server:
+        urls = replay_urls(scraper, server, 10)
+        start = time.perf_counter()
+        scraper["scrape_pages_concurrently"](urls, max_workers=8, requests_per_second=20)
+        elapsed = time.perf_counter() - start
+    assert len(server.requests) == 10
+    assert elapsed >= 9 / 20 - 0.05
@@ -0,0 +1,45 @@
+"""The streaming lxml parser must return the same rows as the BeautifulSoup one.
+
+tests/fixtures/australia holds chapter pages in the ABF Schedule 3 layout
+(site chrome, one table per heading, <br> and entities in cells) plus the
+markup variations the two parsers read differently: a row left open and a
+table nested in a cell, which parse_page hands to BeautifulSoup.
+"""
+import pytest
+
+from conftest import FIXTURES_DIR, load_script
+
+PAGES = sorted((FIXTURES_DIR / "australia").glob("*.html"))
+
+
+@pytest.fixture(scope="module")
+def australia():
+    scraper = load_script("Australia_HS_codes_and_tarrifs/scraper.py")
+    if scraper["etree"] is None:
+        pytest.skip("lxml is not installed")
+    return scraper
+
+
+@pytest.mark.parametrize("path", PAGES, ids=[path.name for path in PAGES])
+def test_lxml_rows_match_soup(australia, path):
+    content = path.read_bytes()
+    rows = australia["parse_page"](content, path.name)
+    assert rows
+    assert rows == australia["parse_page_soup"](content, path.name)
+
+
+def test_well_formed_pages_are_streamed(australia):
+    streamed = {path.name for path in PAGES if australia["streams_like_soup"](path.read_bytes())}
+    assert "section-xvi_chapter-84.html" in streamed
+    assert "section-ii_chapter-8-unclosed-row.html" not in streamed
+
+    nested = (FIXTURES_DIR / "australia" / "section-ii_chapter-9-nested-table.html").read_bytes()
+    with pytest.raises(australia["NestedTableError"]):
+        list(australia["iter_table_rows"](nested))
+
+
+def test_rows_are_padded_to_the_headers(australia):
+    content = (FIXTURES_DIR / "australia" / "section-ii_chapter-7.html").read_bytes()
+    rows = australia["parse_page"](content, "section-ii_chapter-7.html")
+    assert all(len(row) == len(australia["HEADERS"]) for row in rows)
+    assert ["0708.10.00", "10", "kg", "Peas", "Free", ""] in rows
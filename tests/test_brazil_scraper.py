@@ -0,0 +1,152 @@
+import importlib.util
+import json
+import shutil
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import load_script
+from pdfs import write_synthetic_pdf
+
+SCRIPT = "Brazil_HS_codes_and_tarrifs/brazil_tarrif_scraper.py"
+TESTS_DIR = Path(__file__).resolve().parent
+
+
+@pytest.fixture(scope="module")
+def brazil():
+    return load_script(SCRIPT)
+
+
+def concat_csv(tables, path):
+    # What the original script wrote: everything concatenated in memory
+    pd.concat(tables, ignore_index=True).to_csv(path, index=False)
+    return path.read_bytes()
+
+
+DTYPE_CASES = {
+    "bool_and_int": [pd.DataFrame({"a": [True, False]}), pd.DataFrame({"a": [1, 2]})],
+    "bool_with_missing_column": [pd.DataFrame({"a": [True], "b": [1]}), pd.DataFrame({"b": [2]})],
+    "int_with_missing_column": [pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"b": ["x"]})],
+    "int_and_all_missing": [pd.DataFrame({"a": [np.nan, np.nan]}), pd.DataFrame({"a": [3, 4]})],
+    "int_and_none_objects": [pd.DataFrame({"a": [None, None]}, dtype=object), pd.DataFrame({"a": [3, 4]})],
+    "int_and_empty_table": [pd.DataFrame({"a": pd.Series([], dtype=object)}), pd.DataFrame({"a": [5]})],
+    "int_and_float": [pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [0.5, np.nan]})],
+    "text_and_numbers": [pd.DataFrame({"NCM": ["01.01", None], "Aliquota": [0, 10]}),
+                         pd.DataFrame({"NCM": [101.21], "Aliquota": ["NT"]}),
+                         pd.DataFrame({"Unnamed: 0": [np.nan], "NCM": ["0102"]})],
+}
+
+
+@pytest.mark.parametrize("case", DTYPE_CASES)
+def test_csv_matches_concat(brazil, tmp_path, case):
+    tables = DTYPE_CASES[case]
+    expected = concat_csv(tables, tmp_path / "concat.csv")
+    count = brazil["write_tables_to_csv"](iter(tables), tmp_path / "streamed.csv")
+    assert count == len(tables)
+    assert (tmp_path / "streamed.csv").read_bytes() == expected
+
+
+class RecordingExecutor:
+    """Runs submitted calls lazily and records how many were outstanding."""
+
+    def __init__(self, max_workers, initializer=None):
+        self.outstanding = 0
+        self.most_outstanding = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        executor = self
+        executor.outstanding += 1
+        executor.most_outstanding = max(executor.most_outstanding, executor.outstanding)
+
+        class Future:
+            def result(self):
+                executor.outstanding -= 1
+                return fn(*args)
+        return Future()
+
+
+def test_parallel_extraction_submits_a_bounded_window(brazil, monkeypatch):
+    executors = []
+
+    def make_executor(*args, **kwargs):
+        executors.append(RecordingExecutor(*args, **kwargs))
+        return executors[-1]
+
+    class FakeReader:
+        def __init__(self, path):
+            self.pages = range(1000)
+
+    monkeypatch.setitem(brazil, "ProcessPoolExecutor", make_executor)
+    monkeypatch.setitem(brazil, "PdfReader", FakeReader)
+    monkeypatch.setitem(brazil, "extract_page_range",
+                        lambda pdf_path, pages: [pd.DataFrame({"pages": [pages]})])
+
+    tables = brazil["iter_tables"]("tipi.pdf", parallel=True, max_workers=3, pages_per_chunk=10)
+    pages = [table["pages"][0] for table in tables]
+    assert pages == brazil["page_ranges"](1000, 10)
+    assert executors[0].most_outstanding == 3
+
+
+# Runs in a fresh interpreter so ru_maxrss is this run's own peak
+MEMORY_PROBE = textwrap.dedent("""
+    import json, resource, sys
+    sys.path.insert(0, {tests_dir!r})
+    from conftest import load_script
+    brazil = load_script({script!r})
+    brazil["USE_JVM_WORKER"] = False  # java runs as a subprocess, outside this process's RSS
+    {setup}
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    count = brazil["write_tables_to_csv"](tables, {csv_path!r})
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({{"tables": count, "peak_growth_kb": after - before}}))
+""")
+
+
+def measure_peak_growth(tmp_path, setup):
+    probe = MEMORY_PROBE.format(tests_dir=str(TESTS_DIR), script=SCRIPT,
+                                setup=setup.strip(), csv_path=str(tmp_path / "out.csv"))
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_peak_memory_stays_at_one_table(tmp_path):
+    # 40 tables of 25,000 x 8 integers: 64 MB if they were all held for pd.concat
+    setup = textwrap.dedent("""
+        import numpy as np, pandas as pd
+        tables = (pd.DataFrame(np.random.default_rng(i).integers(0, 10**6, (25_000, 8)),
+                               columns=[f"col{c}" for c in range(8)]) for i in range(40))
+    """)
+    measured = measure_peak_growth(tmp_path, setup)
+    assert measured["tables"] == 40
+    assert measured["peak_growth_kb"] < 24 * 1024
+
+
+def test_peak_memory_on_a_large_synthetic_pdf(tmp_path):
+    for module in ("tabula", "pypdf"):
+        if importlib.util.find_spec(module) is None:
+            pytest.skip(f"{module} is not installed")
+    if shutil.which("java") is None:
+        pytest.skip("tabula needs java")
+
+    # The streamed writer holds one page range of tables at a time, so eight times the
+    # pages should not need much more memory than the small document
+    growth = {}
+    for page_count in (50, 400):
+        pdf_path = tmp_path / f"synthetic_{page_count}.pdf"
+        write_synthetic_pdf(pdf_path, page_count)
+        setup = (f"tables = brazil['iter_tables']({str(pdf_path)!r}, parallel=False, pages_per_chunk=25)")
+        measured = measure_peak_growth(tmp_path, setup)
+        assert measured["tables"] >= page_count
+        growth[page_count] = measured["peak_growth_kb"]
+    assert growth[400] < 1.5 * growth[50] + 20 * 1024
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from baselines import china_column_repairs, china_shift_rows_left
+from conftest import load_script
+
+COLUMNS = [
+    'HS_code', 'Description', 'Preferential_Rate(Agreement rate)_1', 'MFN_Rate',
+    'Preferential_Rate(Agreement rate)',
+    'Preferential_Tariff_Rate(Special_Preferential_Tariff_Rate)',
+    'General_Tariff_Rate', 'new_col1', 'new_col2', 'guard_col1', 'guard_col2',
+]
+
+ROWS = [
+    ['0101.2100 5', 'horse', 'AS,CL', '0', '0', np.nan, '30'],
+    # Chinese text and MO in the same cell: shift_row moves it, and the MO repair
+    # must still see it
+    ['0102.1000', 'cow', '亚太 HK,MO', '5', '3', '0', '20'],
+    ['0103', 'pig', 'MO', '5', '3', '0', '20'],
+    ['0104.1000', 'x', '中国', '5', '3', '0', '20'],
+    ['0105.1100 6∆0', 'hen', '澳门 mo', '8', '4', '0', '50'],
+    ['0106', 'other', np.nan, '5', np.nan, np.nan, '70'],
+]
+
+
+@pytest.fixture(scope="module")
+def china():
+    return load_script("China_HS_code_and_tarrifs/china_tarrif_ETL_script_.py")
+
+
+@pytest.fixture
+def data():
+    frame = pd.DataFrame([row + [np.nan] * (len(COLUMNS) - len(row)) for row in ROWS],
+                         columns=COLUMNS)
+    frame['HS_code'] = frame['HS_code'].astype(str)
+    return frame
+
+
+def as_cells(frame):
+    return frame.astype(object).where(frame.notna(), None).values.tolist()
+
+
+def test_repairs_match_baseline(china, data):
+    expected = china_column_repairs(data)
+    result = china['repair_agreement_rates'](china['shift_and_insert'](data))
+    assert as_cells(result) == as_cells(expected)
+
+
+def test_mo_value_is_taken_from_before_shift_row(china, data):
+    result = china['repair_agreement_rates'](china['shift_and_insert'](data))
+    assert result.loc[1, 'Preferential_Rate(Agreement rate)'] == '亚太 HK,MO'
+    assert pd.isna(result.loc[1, 'Preferential_Rate(Agreement rate)_1'])
+    assert result.loc[4, 'Preferential_Rate(Agreement rate)'] == '澳门 mo'
+
+
+def test_shift_rows_left_matches_baseline(china):
+    frame = pd.DataFrame([
+        ['0101.2100', 'horse', '5', '3', '0', '30', np.nan],
+        ['0102.1000', 'cow', '5', '3.5', 'x', '20', '10'],
+        ['0103', 'pig', np.nan, '3', '0', '20', np.nan],
+        ['0104.1000', 'goat', '-1', 'AS,CL', '0', '20', np.nan],
+        ['0105.1100', 'hen', '.5', '+2', '0', np.nan, '50'],
+    ], columns=['HS_code', 'Description', 'Preferential_Rate(Agreement rate)_1', 'Preferential_Rate(Agreement rate)',
+                'MFN_Rate', 'General_Tariff_Rate', 'new_col1'])
+    result = china['shift_rows_left'](frame)
+    assert as_cells(result) == as_cells(china_shift_rows_left(frame))
+    assert result.loc[0].tolist()[:3] == ['0101.2100', '5', '3']
@@ -0,0 +1,66 @@
+"""The China page index must keep every table the pages="all" extraction kept."""
+import types
+
+import pandas as pd
+import pytest
+
+from conftest import load_script
+from pdfs import write_text_pdf
+
+HEADERS = ["序号", "税则号列", "货品名称", "最惠国税率(%)", "协定税率(%)", "特惠税率(%)", "普通税率(%)"]
+# Page text of a small tariff PDF, the kinds of pages the index has to tell apart
+PAGES = [
+    ["中华人民共和国进出口税则", "说明"],                           # 1 title and notes
+    ["序号 税则号列 货品名称 最惠国税率(%) 协定税率(%)", "1 01012100 马 0 0"],  # 2 table
+    ["序号 税则", "号列 货品名称 最惠国", "税率(%) 特惠税率(%)"],            # 3 header wrapped over lines
+    ["注释：本章税则号列不包括"],                                   # 4 names one marker only
+    [],                                                          # 5 blank
+    ["2 01022100 牛 5 3"],                                      # 6 rows without a header
+    ["序号 税则号列 货品名称 最惠国税率(%)"],                           # 7 table
+]
+TARIFF_PAGES = [2, 3, 7]
+
+
+@pytest.fixture(scope="module")
+def china():
+    return load_script("China_HS_code_and_tarrifs/china_tarrif_ETL_script_.py")
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "china.pdf"
+    write_text_pdf(path, PAGES)
+    return str(path)
+
+
+def test_index_finds_the_pages_with_tariff_headers(china, pdf_path):
+    assert china["index_tariff_pages"](pdf_path) == TARIFF_PAGES
+
+
+def page_tables(page):
+    # What tabula finds on a page: the tariff table on tariff pages, other tables elsewhere
+    if page in TARIFF_PAGES:
+        return [pd.DataFrame([HEADERS, [str(page), f"0101{page:02d}00", "马", "0", "0", "", "30"]])]
+    if page == 6:
+        # A table running on from page 3 without its header, dropped by the header filter
+        return [pd.DataFrame([["2", "01022100", "牛", "5", "3", "", "20"]])]
+    return [pd.DataFrame([["说明", str(page)]])]
+
+
+def test_indexed_extraction_matches_all_pages(china, pdf_path, monkeypatch):
+    requested = []
+
+    def read_pdf(path, pages, **kwargs):
+        requested.append(pages)
+        numbers = range(1, len(PAGES) + 1) if pages == "all" else pages
+        return [table for page in numbers for table in page_tables(page)]
+
+    monkeypatch.setitem(china, "tabula", types.SimpleNamespace(read_pdf=read_pdf))
+    indexed = china["extract_tariff_table"](pdf_path)
+    # No page with headers found: the whole document is read, as before the index
+    monkeypatch.setitem(china, "index_tariff_pages", lambda path: [])
+    all_pages = china["extract_tariff_table"](pdf_path)
+
+    assert requested == [TARIFF_PAGES, "all"]
+    pd.testing.assert_frame_equal(indexed, all_pages)
+    assert list(indexed["税则号列"]) == ["01010200", "01010300", "01010700"]
@@ -0,0 +1,91 @@
+"""The in-memory China Pipeline against the CSV files that used to sit between its stages."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import load_script
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, settings, strategies as st  # noqa: E402
+
+# Cells as tabula returns them: rates, codes, words, the NA and boolean words read_csv knows
+CELLS = st.one_of(
+    st.none(),
+    st.sampled_from(["", "NA", "None", "nan", "n/a", "True", "false", "0", "5", "-1", "3.5", "1e3",
+                     "0101.2100", "6∆0", "AS,CL", "亚太 HK,MO", "ex0102", " 7", "R"]),
+    st.integers(-10, 10),
+    st.floats(allow_nan=True, allow_infinity=False, width=32),
+)
+
+# Header row of the extracted tariff tables after the 序号 column is dropped, blank cells are NaN
+RAW_HEADER = ["税则号列", "货品名称", np.nan, "最惠国税率(%)", "协定税率(%)", "特惠税率(%)", "普通税率(%)",
+              np.nan, np.nan]
+RAW_ROWS = [
+    ["0101.2100 5", "马", "AS,CL", "0", "0", np.nan, "30", np.nan, np.nan],
+    ["0102.1000", "牛", "亚太 HK,MO", "5", "3", "0", "20", np.nan, np.nan],
+    ["0103", "猪 R", "MO", "5", "3", "0", "20", np.nan, np.nan],
+    ["0104.1000", "羊", "中国", "5", "3", "0", "20", np.nan, np.nan],
+    ["0105.1100 6∆0", "鸡", "澳门 mo", "8", "4", "0", "50", np.nan, np.nan],
+    ["0106.1100 3.5", "其他", np.nan, "5", np.nan, np.nan, "70", np.nan, np.nan],
+    ["0106.1200", "鲸", "3", "5", "2.5", "0", "70", "1", np.nan],
+    ["ex0106.1900", "其他", np.nan, "5", np.nan, "0 5", "70", np.nan, np.nan],
+    ["-", "", np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan],
+]
+
+
+@pytest.fixture(scope="module")
+def china():
+    return load_script("China_HS_code_and_tarrifs/china_tarrif_ETL_script_.py")
+
+
+def csv_round_trip(data):
+    # What the stages got when they were joined by CSV files
+    return pd.read_csv(io.StringIO(data.to_csv(index=False)))
+
+
+@settings(max_examples=200, deadline=None)
+@given(st.lists(st.lists(CELLS, min_size=3, max_size=3), min_size=1, max_size=6))
+def test_restore_csv_dtypes_matches_a_csv_round_trip(china, rows):
+    frame = pd.DataFrame(rows, columns=["a", "b", "c"], dtype=object)
+    expected = csv_round_trip(frame)
+    pd.testing.assert_frame_equal(china["restore_csv_dtypes"](frame), expected)
+
+
+def test_restore_csv_dtypes_goes_by_position(china):
+    frame = pd.DataFrame([["1", "x", "NA"], ["2", "y", "3"]], columns=["", "", "c"])
+    restored = china["restore_csv_dtypes"](frame)
+    assert list(restored.dtypes) == [np.int64, object, np.float64]
+
+
+def test_pipeline_output_matches_csv_handoffs(china, monkeypatch, capsys):
+    raw = pd.DataFrame(RAW_ROWS, columns=RAW_HEADER)
+    in_memory = china["Pipeline"]("china", china["STAGES"]).run(raw.copy())
+
+    # The same stages with real CSV round trips, including the one inside name_columns
+    monkeypatch.setitem(china, "restore_csv_dtypes", csv_round_trip)
+    stages = [(name, csv_round_trip if name == "restore_csv_dtypes" else stage) for name, stage in china["STAGES"]]
+    through_csv = china["Pipeline"]("china", stages).run(raw.copy())
+
+    assert in_memory.to_csv() == through_csv.to_csv()
+    assert len(in_memory) == len(RAW_ROWS) - 1  # the ex row
+
+
+def test_pipeline_reports_and_snapshots_each_stage(china, tmp_path, capsys):
+    stages = [("double", lambda df: df.assign(a=df["a"] * 2)), ("drop_first", lambda df: df.iloc[1:])]
+    pipeline = china["Pipeline"]("test", stages, debug=True, snapshot_dir=str(tmp_path))
+    result = pipeline.run(pd.DataFrame({"a": [1, 2, 3], "b": ["x", 1, None]}))
+
+    assert result["a"].tolist() == [4, 6]
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split(":")[0] for line in lines] == ["[test] double", "[test] drop_first"]
+    assert all("rows, frame memory_usage" in line for line in lines)
+    assert "3 rows" in lines[0] and "2 rows" in lines[1]
+
+    snapshots = sorted(path.name for path in tmp_path.iterdir())
+    assert snapshots == ["test_01_double.parquet", "test_02_drop_first.parquet"]
+    saved = pd.read_parquet(tmp_path / snapshots[1])
+    assert saved["a"].tolist() == [4, 6]
+    # Mixed object columns are stored as text
+    assert saved["b"].tolist()[0] == "1" and saved["b"].isna().tolist() == [False, True]
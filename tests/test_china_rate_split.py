@@ -0,0 +1,75 @@
+"""The automated join and split of the China tariff rates against the Excel TEXTJOIN hand-off."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from baselines import china_split_tariff_rates
+from conftest import load_script
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, settings, strategies as st  # noqa: E402
+
+# After clean_text_columns every cell is text or missing
+CELLS = st.one_of(st.none(), st.sampled_from(["", "0", "5", "3.5", "A", "B", "AS,CL", "10 20", "NT", "1e3"]))
+COLUMNS = ["HS_code", "Description", "MFN_Rate", "c1", "c2", "c3", "c4"]
+
+
+@pytest.fixture(scope="module")
+def china():
+    return load_script("China_HS_code_and_tarrifs/china_tarrif_ETL_script_.py")
+
+
+def read_back(data):
+    return pd.read_csv(io.StringIO(data.to_csv(index=False)))
+
+
+# What TEXTJOIN(" ", TRUE, ...) made of the last 4 columns of review_data.csv,
+# taking the cells as the text in the file
+def textjoin(data, count=4):
+    frame = read_back(data)
+    text = pd.read_csv(io.StringIO(data.to_csv(index=False)), dtype=str, keep_default_na=False)
+    joined = [" ".join(cell for cell in row if cell != "") for row in text.iloc[:, -count:].itertuples(index=False)]
+    frame["new_column_with_4_last_columns"] = [text or np.nan for text in joined]
+    return frame
+
+
+def manual_steps(data):
+    # review_data.csv -> Excel TEXTJOIN -> read back -> iterrows split -> CSV
+    return read_back(china_split_tariff_rates(read_back(textjoin(data))))
+
+
+def automated_steps(china, data):
+    joined = china["restore_csv_dtypes"](china["join_last_columns"](data))
+    return china["restore_csv_dtypes"](china["split_tariff_rates"](joined))
+
+
+def test_join_skips_empty_cells(china):
+    frame = pd.DataFrame([
+        ["0101", "horse", "0", "5", None, "A", "30"],
+        ["0102", "cow", "0", None, "", None, None],
+        ["0103", "pig", "0", " 5 ", "B", "", "20"],
+    ], columns=COLUMNS)
+    joined = china["join_last_columns"](frame)["new_column_with_4_last_columns"]
+    assert joined.tolist()[0] == "5 A 30"
+    assert pd.isna(joined[1])
+    assert joined[2] == "5 B 20"
+
+
+def test_split_by_value_count(china):
+    frame = pd.DataFrame({"HS_code": ["0101.2100 5", "0102", "0103", "0104"],
+                          "new_column_with_4_last_columns": ["3 A 30", "B", "5 20", np.nan]})
+    split = china["split_tariff_rates"](frame)
+    cells = split.astype(object).where(split.notna(), None)
+    assert cells["preferential_Tariff_Rate(Special_Preferential_Tariff_Rate)"].tolist() == ["3", None, None, None]
+    assert cells["class"].tolist() == ["A", "B", None, None]
+    assert cells["General_Tariff_Rate"].tolist() == ["30", None, None, None]
+    assert split["HS_CODE"].tolist() == ["0101.2100", "0102", "0103", "0104"]
+
+
+@settings(max_examples=100, deadline=None)
+@given(st.lists(st.lists(CELLS, min_size=4, max_size=4), min_size=1, max_size=6))
+def test_automated_steps_match_the_excel_hand_off(china, rates):
+    frame = pd.DataFrame([[f"01{n:02d}.1000", "x", "0"] + row for n, row in enumerate(rates)], columns=COLUMNS)
+    pd.testing.assert_frame_equal(automated_steps(china, frame), manual_steps(frame))
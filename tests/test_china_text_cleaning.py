@@ -0,0 +1,59 @@
+"""clean_text_columns must give what the two per-cell passes it replaced gave, once read back."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from baselines import china_remove_chinese_columns, china_remove_standalone_R
+from conftest import load_script
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, settings, strategies as st  # noqa: E402
+
+# Characters the two patterns look at: R next to spaces and punctuation, CJK (with an extension block)
+TEXT = st.text(alphabet=["R", "r", " ", "\t", ",", ".", "-", "A", "5", "中", "\U00020001"], max_size=8)
+CELLS = st.one_of(st.none(), st.floats(allow_nan=True, allow_infinity=False), st.integers(-5, 5), TEXT)
+COLUMNS = ["HS_code", "Description", "MFN_Rate", "new_col1"]
+
+
+@pytest.fixture(scope="module")
+def china():
+    return load_script("China_HS_code_and_tarrifs/china_tarrif_ETL_script_.py")
+
+
+def read_back(data):
+    # The cleaned frame was handed on through review_data.csv
+    return pd.read_csv(io.StringIO(data.to_csv(index=False)))
+
+
+def baseline(china, data):
+    return china_remove_standalone_R(china_remove_chinese_columns(data, china["COLUMNS_TO_CLEAN"]))
+
+
+def test_clean_text_columns_examples(china):
+    frame = pd.DataFrame([
+        ["0101.2100 R", "马 R 5", "5R", "R,5"],
+        ["R0102", "A R B", "5.R.", "中国 R"],
+        ["0103", np.nan, 3.5, None],
+        ["中国", "中国", "R", "x\U00020001y"],
+    ], columns=COLUMNS)
+    cleaned = china["clean_text_columns"](frame)
+    pd.testing.assert_frame_equal(read_back(cleaned), read_back(baseline(china, frame)))
+    rows = cleaned.astype(object).where(cleaned.notna(), None).values.tolist()
+    assert rows == [
+        ["0101.2100", "马 5", "5R", ",5"],
+        ["R0102", "A B", "5.R.", None],
+        # Missing cells stay missing instead of becoming 'nan', numbers become text
+        ["0103", None, "3.5", None],
+        # Chinese is only removed from COLUMNS_TO_CLEAN, which has no Description
+        [None, "中国", None, "xy"],
+    ]
+
+
+@settings(max_examples=300, deadline=None)
+@given(st.lists(st.lists(CELLS, min_size=4, max_size=4), min_size=1, max_size=5))
+def test_clean_text_columns_matches_baseline(china, rows):
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    cleaned = china["clean_text_columns"](frame)
+    pd.testing.assert_frame_equal(read_back(cleaned), read_back(baseline(china, frame)))
@@ -0,0 +1,93 @@
+"""The shared Egypt listing crawler against the customs.gov.eg stand-in."""
+import hashlib
+
+import pandas as pd
+import pytest
+
+from conftest import load_script
+from http_cache import HTTPCache
+from servers import serve
+from servers.customs_listing import CHAPTER_PAGES, EDITED, CustomsListingHandler, listing_rows
+
+SCRIPT = "Egypt_HS_codes_and_tarrif/customs_listing.py"
+CHAPTERS = range(1, 21)
+
+
+@pytest.fixture
+def crawler():
+    namespace = load_script(SCRIPT)
+    namespace["CHAPTERS"] = CHAPTERS
+    return namespace
+
+
+@pytest.fixture
+def http_cache(tmp_path):
+    return HTTPCache(cache_dir=str(tmp_path / "cache"))
+
+
+def crawl(crawler, server, http_cache, **kwargs):
+    crawler["CUSTOMS_URL"] = server.url + "/Services/Tarif?page={}&type=1&chapterId={}"
+    return crawler["scrape_customs_data"](http_cache, **kwargs)
+
+
+def expected_listing(revision=0):
+    data = []
+    for chapter in CHAPTERS:
+        for page in range(1, CHAPTER_PAGES[chapter] + 1):
+            for cells in listing_rows(chapter, page, revision):
+                if len(cells) >= 2 and cells[0]:
+                    row_hash = hashlib.sha1("\x1f".join(cells).encode("utf-8")).hexdigest()
+                    data.append({"Chapter": chapter, "Page": page, "Item": cells[0].replace("/", ""),
+                                 "Row_hash": row_hash})
+    return pd.DataFrame(data)
+
+
+def test_concurrent_crawl_matches_the_listing(crawler, http_cache):
+    with serve(CustomsListingHandler, latency=0.01) as server:
+        concurrent = crawl(crawler, server, http_cache, concurrent=True, max_workers=4, prefetch=2)
+        sequential = crawl(crawler, server, http_cache, concurrent=False)
+    pd.testing.assert_frame_equal(concurrent, expected_listing())
+    pd.testing.assert_frame_equal(sequential, concurrent)
+    assert 1 < server.most_in_flight <= 4 * 2
+
+
+@pytest.mark.parametrize("prefetch", [1, 3])
+def test_prefetch_requests_stay_bounded(crawler, http_cache, prefetch):
+    with serve(CustomsListingHandler) as server:
+        crawl(crawler, server, http_cache, concurrent=True, max_workers=4, prefetch=prefetch)
+    # Every page with data plus the empty page ending each chapter, and at most
+    # prefetch - 1 speculative pages past it
+    needed = sum(CHAPTER_PAGES[chapter] + 1 for chapter in CHAPTERS)
+    assert needed <= len(server.requests) <= needed + (prefetch - 1) * len(CHAPTERS)
+
+
+def test_row_hashes_follow_listing_edits(crawler, http_cache):
+    with serve(CustomsListingHandler) as server:
+        before = crawl(crawler, server, http_cache, concurrent=True)
+        server.state["revision"] = 1
+        after = crawl(crawler, server, http_cache, concurrent=True)
+    pd.testing.assert_frame_equal(after, expected_listing(revision=1))
+
+    changed = before.merge(after, on="Item", how="outer", suffixes=("_before", "_after"), indicator=True)
+    edited = changed[(changed["_merge"] == "both") & (changed["Row_hash_before"] != changed["Row_hash_after"])]
+    chapter, page, row = EDITED
+    assert edited["Item"].tolist() == [f"{chapter:02d}{page:02d}{row:06d}"]
+    assert (changed["_merge"] == "left_only").sum() == 1
+    assert (changed["_merge"] == "right_only").sum() == 1
+
+
+def test_error_pages_are_retried(crawler, http_cache):
+    crawler["BACKOFF_SECONDS"] = 0.01
+    # Chapter 1 has two pages, chapter 3 three: an error page must not end them early
+    with serve(CustomsListingHandler, failures={(1, 2): 2, (3, 1): 1, (3, 3): 3}) as server:
+        listing = crawl(crawler, server, http_cache, concurrent=True, max_workers=4)
+    pd.testing.assert_frame_equal(listing, expected_listing())
+    assert not any(server.state["failures"].values())
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_a_failing_chapter_fails_the_crawl(crawler, http_cache, concurrent):
+    crawler.update(MAX_RETRIES=1, BACKOFF_SECONDS=0.01)
+    with serve(CustomsListingHandler, failures={(3, 2): 5}) as server:
+        with pytest.raises(crawler["ListingError"], match=r"chapters \[3\] failed.*503"):
+            crawl(crawler, server, http_cache, concurrent=concurrent)
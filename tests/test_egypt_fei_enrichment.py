@@ -0,0 +1,146 @@
+"""The Egypt FEI enrichment and incremental refresh against the FEI and listing stand-ins."""
+import asyncio
+import json
+import sys
+import types
+from collections import defaultdict
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from conftest import FIXTURES_DIR, load_script, run_script
+from http_cache import HTTPCache
+from servers import serve
+from servers.customs_listing import ADDED, CHAPTER_PAGES, EDITED, REMOVED, CustomsListingHandler, listing_rows
+from servers.fei import FEIHandler
+
+SCRIPT = "Egypt_HS_codes_and_tarrif/Egypt-Tariff-Dynamic-ETL.py"
+FEI_PATH = "/tariff/tariff.php?hscode={}&keywords=&submit=#"
+# Consecutive prefixes cover every page kind of the stand-in, 010121 is the saved page
+PREFIXES = [f"0101{n:02d}" for n in range(15, 29)]
+CODES = [prefix + suffix for prefix in PREFIXES for suffix in ("0000", "1000", "2500", "9001")]
+
+
+@pytest.fixture
+def etl(tmp_path):
+    namespace = load_script(SCRIPT)
+    namespace["http_cache"] = HTTPCache(cache_dir=str(tmp_path / "cache"))
+    namespace["BACKOFF_SECONDS"] = 0.01
+    return namespace
+
+
+def enrich(etl, tmp_path, server, max_workers):
+    # A fresh prefix cache and locks per run, like one run of the script
+    etl["FEI_URL"] = server.url + FEI_PATH
+    etl["prefix_cache"] = etl["PrefixCache"](path=str(tmp_path / f"prefixes_{max_workers}.sqlite"))
+    etl["prefix_locks"] = defaultdict(asyncio.Lock)
+    try:
+        return asyncio.run(etl["enrich_fei"](CODES, max_workers=max_workers))
+    finally:
+        etl["prefix_cache"].close()
+
+
+def requested_codes(server):
+    return [parse_qs(urlparse(path).query)["hscode"][0] for path in server.requests]
+
+
+def test_concurrent_enrichment_matches_one_worker(etl, tmp_path):
+    with serve(FEIHandler, fail_first=False) as server:
+        one_worker = enrich(etl, tmp_path, server, max_workers=1)
+    with serve(FEIHandler, latency=0.02) as server:
+        eight_workers = enrich(etl, tmp_path, server, max_workers=8)
+
+    assert eight_workers == one_worker
+    assert [result["Original_HS_Code"] for result in eight_workers] == CODES
+    assert all(result["VAT"] not in ("ERROR", "N/A") for result in eight_workers)
+    assert 1 < server.most_in_flight <= 8
+    # The 503 answers were retried
+    assert max(server.state["attempts"].values()) == 2
+
+    saved = json.loads((FIXTURES_DIR / "egypt_fei" / "tariff_010121.json").read_text(encoding="utf-8"))
+    assert eight_workers[CODES.index("0101210000")] == saved
+
+
+def test_each_prefix_page_is_fetched_once(etl, tmp_path):
+    with serve(FEIHandler, fail_first=False) as server:
+        enrich(etl, tmp_path, server, max_workers=8)
+    prefix_requests = [code for code in requested_codes(server) if len(code) == 6]
+    assert sorted(prefix_requests) == PREFIXES
+
+
+def listing_items(chapters, revision):
+    return sorted(cells[0].replace("/", "") for chapter in chapters for page in range(1, CHAPTER_PAGES[chapter] + 1)
+                  for cells in listing_rows(chapter, page, revision) if len(cells) >= 2 and cells[0])
+
+
+def rows_except(dataset, items):
+    return dataset[~dataset["Item"].str.strip('"').isin(items)].reset_index(drop=True)
+
+
+def listing_module(server, chapters):
+    # Stands in for Egypt_HS_codes_and_tarrif/customs_listing.py, pointed at the listing stand-in
+    crawler = load_script("Egypt_HS_codes_and_tarrif/customs_listing.py")
+    crawler.update(CHAPTERS=chapters, CUSTOMS_URL=server.url + "/Services/Tarif?page={}&type=1&chapterId={}",
+                   MAX_RETRIES=1, BACKOFF_SECONDS=0.01)
+    module = types.ModuleType("customs_listing")
+    module.__dict__.update(crawler)
+    return module
+
+
+def test_incremental_refresh_looks_up_only_changed_items(tmp_path, monkeypatch):
+    chapters = range(1, 11)
+    monkeypatch.setattr(sys, "path", list(sys.path))  # the script adds its folders
+    with serve(CustomsListingHandler) as listing, serve(FEIHandler) as fei:
+        monkeypatch.setitem(sys.modules, "customs_listing", listing_module(listing, chapters))
+        constants = {"FEI_URL": fei.url + FEI_PATH, "BACKOFF_SECONDS": 0.01}
+        cache = [("http_cache = HTTPCache()", f"http_cache = HTTPCache(cache_dir={str(tmp_path / 'cache')!r})")]
+
+        run_script(SCRIPT, tmp_path, cache, constants)
+        first = pd.read_csv(tmp_path / "egyptian_tariff_data_final_version.csv", dtype=str, keep_default_na=False)
+        first_requests = len(fei.requests)
+
+        listing.state["revision"] = 1
+        run_script(SCRIPT, tmp_path, cache, constants)
+        second = pd.read_csv(tmp_path / "egyptian_tariff_data_final_version.csv", dtype=str, keep_default_na=False)
+        second_lookups = set(requested_codes(fei)[first_requests:])
+
+    assert sorted(first["Item"].str.strip('"')) == listing_items(chapters, revision=0)
+    assert sorted(second["Item"].str.strip('"')) == listing_items(chapters, revision=1)
+    assert not (second["VAT"] == "ERROR").any()
+
+    # Only the edited and the added item were looked up again, the removed one is gone
+    edited = "{:02d}{:02d}{:06d}".format(*EDITED)
+    added = "{:02d}{:02d}999999".format(*ADDED)
+    removed = "{:02d}{:02d}{:06d}".format(*REMOVED)
+    assert second_lookups and second_lookups <= {edited, edited[:6], added, added[:6]}
+    assert removed in set(first["Item"].str.strip('"')) - set(second["Item"].str.strip('"'))
+    # Every other row is carried over as it was
+    changed = [edited, added, removed]
+    pd.testing.assert_frame_equal(rows_except(second, changed), rows_except(first, changed))
+
+
+def test_a_failed_listing_aborts_the_incremental_merge(tmp_path, monkeypatch):
+    chapters = range(1, 6)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    dataset, state = tmp_path / "egyptian_tariff_data_final_version.csv", tmp_path / "egypt_refresh_state.sqlite"
+    with serve(CustomsListingHandler) as listing, serve(FEIHandler, fail_first=False) as fei:
+        monkeypatch.setitem(sys.modules, "customs_listing", listing_module(listing, chapters))
+        constants = {"FEI_URL": fei.url + FEI_PATH, "BACKOFF_SECONDS": 0.01}
+        cache = [("http_cache = HTTPCache()", f"http_cache = HTTPCache(cache_dir={str(tmp_path / 'cache')!r})")]
+        run_script(SCRIPT, tmp_path, cache, constants)
+        saved_dataset, saved_state = dataset.read_bytes(), state.read_bytes()
+        first_requests = len(fei.requests)
+
+        # Page 2 of chapter 3 keeps failing: without it its items would look removed
+        listing.state.update(revision=1, failures={(3, 2): 10})
+        with pytest.raises(SystemExit, match=r"chapters \[3\] failed"):
+            run_script(SCRIPT, tmp_path, cache, constants)
+        assert dataset.read_bytes() == saved_dataset
+        assert state.read_bytes() == saved_state
+        assert len(fei.requests) == first_requests
+
+        listing.state["failures"] = {}
+        run_script(SCRIPT, tmp_path, cache, constants)
+    refreshed = pd.read_csv(dataset, dtype=str, keep_default_na=False)
+    assert sorted(refreshed["Item"].str.strip('"')) == listing_items(chapters, revision=1)
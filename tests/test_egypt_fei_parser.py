@@ -0,0 +1,60 @@
+"""The single-pass lxml FEI parser must return what the BeautifulSoup parser returns.
+
+tests/fixtures/egypt_fei holds a full FEI tariff page (tariff_010121.html, with
+its expected result next to it) and small pages for the layout variations the
+detail pages have: missing fields, the agreements header as <p> or <strong>,
+odd numbers of deal cells, comments, nested tags, unclosed tags, entities.
+"""
+import json
+import random
+
+import pytest
+
+from conftest import FIXTURES_DIR, load_script
+
+PAGES = sorted((FIXTURES_DIR / "egypt_fei").glob("*.html"))
+
+
+@pytest.fixture(scope="module")
+def etl():
+    namespace = load_script("Egypt_HS_codes_and_tarrif/Egypt-Tariff-Dynamic-ETL.py")
+    if namespace["etree"] is None:
+        pytest.skip("lxml is not installed")
+    return namespace
+
+
+@pytest.mark.parametrize("path", PAGES, ids=[path.stem for path in PAGES])
+def test_lxml_result_matches_soup(etl, path):
+    page = path.read_text(encoding="utf-8")
+    expected = etl["parse_fei_page_soup"](page, "0101210000", "010121")
+    assert etl["parse_fei_page"](page, "0101210000", "010121") == expected
+
+
+def test_full_page_result(etl):
+    page = (FIXTURES_DIR / "egypt_fei" / "tariff_010121.html").read_text(encoding="utf-8")
+    expected = json.loads((FIXTURES_DIR / "egypt_fei" / "tariff_010121.json").read_text(encoding="utf-8"))
+    assert etl["parse_fei_page"](page, "0101210000", "010121") == expected
+
+
+def random_page(rng):
+    # Shuffles the optional parts of the full page: fields, header style, deal count
+    fields = [f'<div class="span6 content"><strong>{name}: </strong>{value}</div>'
+              for name, value in (("Unit", "KG"), ("Custom Fee", f"{rng.randrange(40)}%"),
+                                  ("VAT", f"{rng.choice([0, 5, 14])}%"), ("Product Type", "Goods"))
+              if rng.random() < 0.8]
+    description = ('<div class="span12 content"><strong>Description: </strong>Goods &amp; parts</div>'
+                   if rng.random() < 0.8 else '')
+    header = rng.choice(['<p class="agree">Agreements:</p>', '<div><strong>Agreements:</strong></div>', ''])
+    deals = ''.join(f'<div class="span6">Agreement {n}</div><div class="span6"> {n}% </div>'
+                    for n in range(rng.randrange(6)))
+    return (f'<html><body><div class="container">{description}<div class="row">{"".join(fields)}</div>'
+            f'{header}<div class="row deals"><div class="span6">Agreement</div><div class="span6">Rate</div>'
+            f'{deals}</div></div></body></html>')
+
+
+def test_random_layouts_match_soup(etl):
+    rng = random.Random(5)
+    for _ in range(200):
+        page = random_page(rng)
+        expected = etl["parse_fei_page_soup"](page, "0101210000", "010121")
+        assert etl["parse_fei_page"](page, "0101210000", "010121") == expected, page
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import hs_codes
+from hs_codes import (COUNTRY_CODE_COLUMNS, HSCodeIndex, hs_code_key, hs_code_text, load_country_index,
+                      normalize_hs_codes)
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, settings, strategies as st  # noqa: E402
+
+
+# The per-row formatter from leading_trailing_zero_adder.py that normalize_hs_codes replaced
+def reformat_hs_code(hs_code):
+    # Handle empty/missing cases
+    if pd.isna(hs_code) or str(hs_code).strip() in ['""', '']:
+        return '""'  # Return empty quoted string
+
+    # Remove existing quotes and whitespace
+    code = str(hs_code).strip().strip('"')
+
+    # Handle cases where code might be empty after stripping
+    if not code:
+        return '""'
+
+    # Split into parts
+    if '.' in code:
+        left, right = code.split('.', 1)  # Split on first dot only
+    else:
+        # If no dot, split into 4+4 digits (or whatever available)
+        left = code[:4]
+        right = code[4:] if len(code) > 4 else ''
+
+    # Pad with zeros
+    left = left.zfill(4)[:4]  # Exactly 4 digits with leading zeros
+    right = right.ljust(4, '0')[:4]  # Exactly 4 digits with trailing zeros
+
+    # Return with quotes
+    return f'"{left}.{right}"'
+
+
+def quoted(codes):
+    # The old script wrote '"0101.2100"' and '""' for missing codes
+    return '"' + normalize_hs_codes(codes).fillna('') + '"'
+
+
+# Mostly code-like text, plus anything else a tariff file can hold
+code_text = st.text(alphabet='0123456789.. "\t\n-+x∆é', max_size=14)
+cells = st.one_of(
+    code_text,
+    code_text,
+    st.text(max_size=10),
+    st.floats(allow_nan=True, allow_infinity=True),
+    st.integers(min_value=-10**12, max_value=10**12),
+    st.booleans(),
+    st.none(),
+    st.just(np.nan),
+)
+
+
+@settings(max_examples=300, deadline=None)
+@given(st.lists(cells, max_size=60))
+def test_matches_the_per_row_formatter(values):
+    codes = pd.Series(values, dtype=object)
+    expected = codes.apply(reformat_hs_code)
+    assert quoted(codes).tolist() == expected.tolist()
+
+
+@settings(max_examples=100, deadline=None)
+@given(st.lists(code_text, min_size=1, max_size=20), st.lists(st.integers(0, 19), max_size=80))
+def test_repeated_codes_format_like_the_first(distinct, picks):
+    # Every distinct code is formatted once and copied to its repeats
+    codes = pd.Series([distinct[i % len(distinct)] for i in picks], dtype=object)
+    assert quoted(codes).tolist() == codes.apply(reformat_hs_code).tolist()
+
+
+@settings(max_examples=100, deadline=None)
+@given(st.lists(cells, max_size=60))
+def test_matches_the_per_row_formatter_without_pyarrow(values):
+    codes = pd.Series(values, dtype=object)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(hs_codes, "pa", None)
+        assert quoted(codes).tolist() == codes.apply(reformat_hs_code).tolist()
+
+
+def test_examples():
+    codes = pd.Series(['101.21', '01012100', '"0101.21"', ' 84.7130 ', '', None, np.nan, 8471.3])
+    assert normalize_hs_codes(codes).fillna('').tolist() == [
+        '0101.2100', '0101.2100', '0101.2100', '0084.7130', '', '', '', '8471.3000']
+
+
+def test_equal_values_with_different_text():
+    # Equal as values, so they must not share one formatted result
+    codes = pd.Series([0.0, -0.0, 1, 1.0, True, 12345, 12345.0, '', '\x00'], dtype=object)
+    assert quoted(codes).tolist() == codes.apply(reformat_hs_code).tolist()
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("0101.2100", "0101210000"),        # China
+    ("0101210000", "0101210000"),       # Egypt, China VAT
+    ("0101.21.00", "0101210000"),       # Australia, Brazil, New Zealand
+    ('"0101.21.00"', "0101210000"),
+    ("101.21", "0101210000"),           # heading that lost its leading zero
+    ("101210000", "0101210000"),        # undotted code read as a number
+    (101210000, "0101210000"),
+    ("1.01", "0101000000"),             # heading 01.01 after a float round trip
+    ("84.1", "8410000000"),
+    ("0101", "0101000000"),             # headings pad to the line ending in zeros
+    ("0101.", "0101000000"),
+    ("± 0101.21", "0101210000"),        # New Zealand markers
+    ("S 8471.30.00", "8471300000"),
+    (" 8471.30", "8471300000"),
+    ("9801.00", "9801000000"),          # national chapters
+])
+def test_hs_code_text_reads_every_country_format(code, expected):
+    assert hs_code_text(code) == expected
+    assert hs_code_key(code) == int(expected)
+
+
+@pytest.mark.parametrize("code", [
+    "abc1234xyz", "2023", "1999", "85%", "-1000", '"99.99,"', "0010.0000", "7701.10",
+    "0100.10", "8488.10", "11", "12345678901", "01.0", "", " ", None, np.nan, "٠١٠١٢١٠٠٠٠",
+])
+def test_hs_code_text_rejects_what_is_not_an_hs_code(code):
+    assert hs_code_text(code) == ""
+    assert hs_code_key(code) == -1
+
+
+@pytest.fixture
+def index():
+    return HSCodeIndex({
+        "China": pd.Series(["0101.2100", "0101.2900", "8471.3000", "85%"], index=[10, 11, 12, 13]),
+        "Egypt": pd.Series(["0101210000", "0101000000", "8471300000", None]),
+        "New Zealand": pd.Series(["S 0101.21.00", "8471.30", "2023"]),
+    })
+
+
+def test_exact_lookups_match_across_countries(index):
+    found = (("China", 10), ("Egypt", 0), ("New Zealand", 0))
+    for code in ["0101.2100", "0101210000", "0101.21.00", "101.21", '"0101.21"', "± 0101.21"]:
+        assert index.lookup(code) == found
+    assert index.lookup("8471.30") == (("China", 12), ("Egypt", 2), ("New Zealand", 1))
+    # A heading is the line ending in zeros, not everything under it
+    assert index.lookup("0101") == (("Egypt", 1),)
+    assert index.lookup("0101.2200") == ()
+    assert index.lookup("2023") == ()
+    assert index.lookup(None) == ()
+    assert len(index) == 8
+
+
+def test_prefix_lookups(index):
+    assert index.lookup_prefix("0101") == (
+        ("Egypt", 1), ("China", 10), ("Egypt", 0), ("New Zealand", 0), ("China", 11))
+    assert index.lookup_prefix("0101.29") == (("China", 11),)
+    assert index.lookup_prefix("84") == ()   # shorter than a heading
+    assert index.lookup_prefix("9999") == ()
+    assert index.count_matches([hs_code_key("0101.21"), hs_code_key("0101.29"), -1]).tolist() == [3, 1, 0]
+
+
+@settings(max_examples=300, deadline=None)
+@given(code_text)
+def test_lookup_shortcuts_read_codes_like_hs_code_text(code):
+    index = HSCodeIndex({"Egypt": pd.Series([code]), "China": pd.Series(["0101.2100", "8471.3000"])})
+    assert index.lookup(code) == index.exact.get(hs_code_text(code), ())
+
+
+def test_load_country_index(tmp_path):
+    for country, (path, column) in COUNTRY_CODE_COLUMNS.items():
+        if country in ("China", "Egypt"):
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            codes = ["0101.2100", "85%"] if country == "China" else ["0101210000", "8471300000"]
+            pd.DataFrame({"Other": ["x", "y"], column: codes}).to_csv(tmp_path / path, index=False)
+
+    index = load_country_index(tmp_path)
+    assert index.countries == ["China", "Egypt"]
+    assert index.lookup("0101.21.00") == (("China", 0), ("Egypt", 0))
+    assert index.lookup("8471.30") == (("Egypt", 1),)
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from http_cache import HTTPCache
+
+
+def make_response(url, status_code, content=b"", etag=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response._content = content
+    response.encoding = "utf-8"
+    response.headers = CaseInsensitiveDict({"ETag": etag} if etag else {})
+    return response
+
+
+class FakeSession:
+    """Answers like a server whose pages carry an ETag and never change."""
+
+    def __init__(self, size=100, on_conditional=None):
+        self.size = size
+        self.on_conditional = on_conditional
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        self.requests.append(dict(headers))
+        etag = '"v1"'
+        if headers.get("If-None-Match") == etag:
+            if self.on_conditional:
+                self.on_conditional(url)
+            return make_response(url, 304)
+        return make_response(url, 200, url.encode().ljust(self.size, b"."), etag)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HTTPCache(cache_dir=str(tmp_path), max_bytes=1000, session=FakeSession())
+
+
+def test_unchanged_page_is_served_from_disk(cache):
+    first = cache.get("http://example.test/a")
+    second = cache.get("http://example.test/a")
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert cache.session.requests[1]["If-None-Match"] == '"v1"'
+    assert (cache.not_modified, cache.downloaded) == (1, 1)
+
+
+def test_missing_body_after_304_is_fetched_again(cache):
+    cache.get("http://example.test/a")
+    # Another thread evicts the body between the conditional request and the read
+    cache.session.on_conditional = lambda url: os.remove(cache._paths(url)[0])
+    response = cache.get("http://example.test/a")
+    assert response.status_code == 200
+    assert response.content.startswith(b"http://example.test/a")
+    assert "If-None-Match" not in cache.session.requests[-1]
+
+
+def test_folder_is_only_scanned_when_over_the_limit(cache, monkeypatch):
+    scans = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, "listdir", lambda path: scans.append(path) or listdir(path))
+
+    for number in range(9):
+        cache.get(f"http://example.test/{number}")
+    assert scans == []
+    assert cache.total_bytes == 900
+
+    cache.get("http://example.test/9")
+    cache.get("http://example.test/10")
+    assert len(scans) == 1
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.total_bytes == sum(size for _, size, _ in cache._entries())
+
+
+def test_running_total_is_loaded_from_an_existing_folder(cache, tmp_path):
+    for number in range(3):
+        cache.get(f"http://example.test/{number}")
+    reopened = HTTPCache(cache_dir=str(tmp_path), max_bytes=1000, session=FakeSession())
+    assert reopened.total_bytes == 300
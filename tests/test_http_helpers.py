@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import http_helpers
+from http_helpers import HostRateLimiter, get_with_retries, get_with_retries_async
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers or {})
+    return response
+
+
+class ScriptedGet:
+    """Returns (or raises) the given answers in order and records the calls."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def __call__(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(http_helpers.time, "sleep", delays.append)
+
+    async def fake_async_sleep(delay):
+        delays.append(delay)
+    monkeypatch.setattr(http_helpers.asyncio, "sleep", fake_async_sleep)
+    return delays
+
+
+def test_retries_with_backoff_and_retry_after(sleeps):
+    get = ScriptedGet(make_response(503), make_response(429, {"Retry-After": "7"}),
+                      requests.ConnectionError(), make_response(200))
+    response = get_with_retries(get, "http://example.test/a", timeout=5)
+    assert response.status_code == 200
+    assert sleeps == [1.0, 7.0, 4.0]
+    assert all(kwargs == {"timeout": 5} for _, kwargs in get.calls)
+
+
+def test_last_answer_is_returned_or_raised(sleeps):
+    get = ScriptedGet(make_response(503), make_response(502))
+    assert get_with_retries(get, "http://example.test/a", max_retries=1).status_code == 502
+
+    get = ScriptedGet(requests.Timeout(), requests.Timeout())
+    with pytest.raises(requests.Timeout):
+        get_with_retries(get, "http://example.test/a", max_retries=1)
+
+
+def test_other_statuses_are_not_retried(sleeps):
+    get = ScriptedGet(make_response(404))
+    assert get_with_retries(get, "http://example.test/a").status_code == 404
+    assert sleeps == []
+
+
+def test_async_version_matches(sleeps):
+    get = ScriptedGet(make_response(500), requests.ConnectionError(), make_response(200))
+    response = asyncio.run(get_with_retries_async(get, "http://example.test/a", backoff_seconds=0.5))
+    assert response.status_code == 200
+    assert sleeps == [0.5, 1.0]
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    rate_limiter = HostRateLimiter(50)
+    start = time.monotonic()
+    for _ in range(5):
+        rate_limiter.wait("http://a.example.test/page")
+    # Four gaps of 20 ms for one host; another host does not wait
+    assert time.monotonic() - start >= 0.075
+    other = time.monotonic()
+    rate_limiter.wait("http://b.example.test/page")
+    assert time.monotonic() - other < 0.02
+
+
+def test_rate_limiter_is_disabled_by_zero():
+    rate_limiter = HostRateLimiter(0)
+    start = time.monotonic()
+    for _ in range(100):
+        rate_limiter.wait("http://a.example.test/page")
+    assert time.monotonic() - start < 0.05
@@ -0,0 +1,77 @@
+"""The Chinese VAT ETL's browser pool against the customs query stand-in.
+
+The end-to-end test needs playwright and an installed browser; the page check
+below keeps the stand-in in step with the selectors the ETL waits for.
+"""
+import asyncio
+import re
+
+import pytest
+import requests
+
+from conftest import REPO_ROOT, load_script
+from servers import serve
+from servers.customs_query import DETAIL_PATH, QUERY_PATH, CustomsQueryHandler, query_rows, vat_rate
+
+SCRIPT = "China_HS_code_and_tarrifs/VAT/VatETLSoftware/Chinese_VAT_Software_ETL_Solution.py"
+TAX_IDS = ["0101", "0102", "0201", "0299", "8471", "8517", "9999", "2710"]
+
+
+def expected_results(tax_ids):
+    results = {}
+    for tax_id in tax_ids:
+        rows = query_rows(tax_id)
+        results.update({row["code"]: vat_rate(row["code"]) for row in rows} if rows else {tax_id: "No data found"})
+    return results
+
+
+def test_stand_in_pages_carry_the_etl_selectors():
+    source = (REPO_ROOT / SCRIPT).read_text(encoding="utf-8")
+    with serve(CustomsQueryHandler) as server:
+        query_page = requests.get(server.url + QUERY_PATH).text
+        detail_page = requests.get(server.url + DETAIL_PATH + "?id=id-01011000").text
+        rows = requests.get(server.url + QUERY_PATH + "query.json", params={"code": "0101"}).json()
+        detail = requests.get(server.url + QUERY_PATH + "detail.json", params={"id": rows[0]["id"]}).json()
+
+    for element in ("input#dutySpa", "button#queryBtn", "div#result", "table#listData", "div#noResult"):
+        assert element in source
+        tag, element_id = element.split("#")
+        assert re.search(rf'<{tag} id="{element_id}"', query_page)
+    assert "a.showDetailA" in source and 'class="showDetailA"' in query_page
+    assert "进口消费税税率、增值税税率" in source and "进口消费税税率、增值税税率" in detail_page
+    assert "table.showTable tbody#add" in source and '<table class="showTable">' in detail_page
+    assert '<tbody id="add">' in detail_page
+    assert [row["code"] for row in rows] == ["01011000", "01019000"]
+    assert detail == {"vat": "13%"}
+
+
+@pytest.fixture
+def etl(tmp_path, monkeypatch):
+    pytest.importorskip("playwright.async_api")
+    namespace = load_script(SCRIPT)
+
+    async def launch():
+        async with namespace["async_playwright"]() as p:
+            browser = await p.chromium.launch(headless=True)
+            await browser.close()
+    try:
+        asyncio.run(launch())
+    except Exception as e:
+        pytest.skip(f"no browser for playwright: {e}")
+
+    # The results, journal and log files are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return namespace
+
+
+def test_pool_queries_every_tax_id(etl):
+    with serve(CustomsQueryHandler, latency=0.05) as server:
+        etl["QUERY_URL"] = server.url + QUERY_PATH
+        etl["DETAIL_BASE_URL"] = server.url + DETAIL_PATH
+        etl["REQUESTS_PER_SECOND"] = 0
+        etl["POOL_SIZE"] = 4
+        results = etl["run_async_code"](TAX_IDS)
+    assert results == expected_results(TAX_IDS)
+    # The contexts of the pool queried at the same time
+    assert server.most_in_flight > 1
+    assert etl["load_existing_results"]() == results
@@ -0,0 +1,61 @@
+"""The byte-level VAT cell search must agree with the BeautifulSoup lookup.
+
+tests/fixtures/transcustoms holds tariff pages with the VAT row in the layouts
+the fast search reads (plain, uppercase tags, markup and entities in the cell),
+the ones it hands over to the soup lookup (label wrapped in <b>, nested table
+in the rate cell, no VAT row) and a GB2312 page with Chinese text in the cell.
+"""
+import pytest
+import requests
+
+from conftest import FIXTURES_DIR, load_script
+
+SCRIPT = "China_HS_code_and_tarrifs/VAT/vat_auto_scraper.py"
+PAGES = sorted((FIXTURES_DIR / "transcustoms").glob("*.html"))
+GBK_PAGE = FIXTURES_DIR / "transcustoms" / "tariff_gbk.html"
+# The GBK page also as requests reads it when the Content-Type header has no charset
+ENCODINGS = [(path, "utf-8") for path in PAGES if path != GBK_PAGE] + [(GBK_PAGE, "gbk"), (GBK_PAGE, "iso-8859-1")]
+
+EXPECTED = {
+    "tariff_plain": "9%",
+    "tariff_uppercase_tags": "13%",
+    "tariff_nested_markup": "13%",
+    "tariff_entities": "9% & 13%",
+    "tariff_gbk": "13%（增值税）",
+    "tariff_label_in_bold": "9%",
+    "tariff_nested_table": "13%9% for listed goods",
+    "tariff_missing_vat_row": "Not Found",
+}
+SOUP_ONLY = {"tariff_label_in_bold", "tariff_nested_table", "tariff_missing_vat_row"}
+
+
+@pytest.fixture(scope="module")
+def scraper():
+    return load_script(SCRIPT)
+
+
+def page_response(content, encoding):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.encoding = encoding
+    return response
+
+
+@pytest.mark.parametrize("path,encoding", ENCODINGS, ids=[f"{path.stem}-{encoding}" for path, encoding in ENCODINGS])
+def test_fast_search_matches_soup(scraper, path, encoding):
+    content = path.read_bytes()
+    fast = scraper["extract_vat_rate_fast"](content, encoding)
+    soup = scraper["extract_vat_rate_soup"](content.decode(encoding))
+    if path.stem in SOUP_ONLY:
+        assert fast is None
+    else:
+        assert fast == soup
+
+
+@pytest.mark.parametrize("path", PAGES, ids=[path.stem for path in PAGES])
+def test_fetch_vat_rate_reads_each_layout(scraper, path, monkeypatch):
+    encoding = "gbk" if path == GBK_PAGE else "utf-8"
+    response = page_response(path.read_bytes(), encoding)
+    monkeypatch.setitem(scraper, "http_cache", type("Cache", (), {"get": staticmethod(lambda url, **kwargs: response)}))
+    assert scraper["fetch_vat_rate"]("0101210010") == EXPECTED[path.stem]
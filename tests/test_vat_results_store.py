@@ -0,0 +1,130 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from conftest import load_script
+
+
+@pytest.fixture
+def etl(tmp_path, monkeypatch):
+    namespace = load_script("China_HS_code_and_tarrifs/VAT/VatETLSoftware/Chinese_VAT_Software_ETL_Solution.py")
+    namespace["LOG_FILE"] = str(tmp_path / "scrape_progress.log")
+    return namespace
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "tax_id_VAT.json"), str(tmp_path / "tax_id_VAT.journal.jsonl")
+
+
+def failing_dump(*args, **kwargs):
+    raise OSError("No space left on device")
+
+
+def test_results_survive_a_failed_rewrite(etl, paths, monkeypatch):
+    results_file, journal_file = paths
+    store = etl["ResultsStore"](results_file, journal_file, flush_every=1)
+    store.update({"0101": "13%"})
+    store.update({"0102": "9%"})
+
+    monkeypatch.setattr(json, "dump", failing_dump)
+    store.close()
+    monkeypatch.undo()
+
+    with open(journal_file) as f:
+        assert len(f.read().splitlines()) == 2
+    assert etl["ResultsStore"](results_file, journal_file).results == {"0101": "13%", "0102": "9%"}
+
+
+def test_journal_is_emptied_once_the_rewrite_succeeds(etl, paths):
+    results_file, journal_file = paths
+    store = etl["ResultsStore"](results_file, journal_file, flush_every=1)
+    store.update({"0101": "13%"})
+    store.close()
+
+    with open(journal_file) as f:
+        assert f.read() == ""
+    assert etl["load_existing_results"](results_file) == {"0101": "13%"}
+
+
+def test_save_results_reports_failure(etl, paths, monkeypatch):
+    results_file, _ = paths
+    assert etl["save_results"]({"0101": "13%"}, results_file) is True
+    monkeypatch.setattr(json, "dump", failing_dump)
+    assert etl["save_results"]({"0101": "9%"}, results_file) is False
+    monkeypatch.undo()
+    assert etl["load_existing_results"](results_file) == {"0101": "13%"}
+
+
+def journal_entries(journal_file):
+    with open(journal_file) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_pending_results_are_flushed_on_time_without_new_results(etl, paths):
+    results_file, journal_file = paths
+    store = etl["ResultsStore"](results_file, journal_file, flush_every=50, flush_seconds=0.05)
+    store.update({"0101": "13%"})
+
+    async def wait_without_results():
+        flusher = asyncio.create_task(etl["flush_periodically"](store))
+        await asyncio.sleep(0.2)
+        flusher.cancel()
+
+    asyncio.run(wait_without_results())
+    assert journal_entries(journal_file) == [{"tax_id": "0101", "vat_rate": "13%"}]
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page, self.selector = page, selector
+        self.first = self
+
+    def row(self):
+        return int(re.search(r"nth-child\((\d+)\)", self.selector).group(1)) - 1
+
+    async def count(self):
+        return len(self.page.tax_ids)
+
+    async def text_content(self):
+        return self.page.tax_ids[self.row()]
+
+    async def wait_for(self, **kwargs):
+        pass
+
+    async def get_attribute(self, name):
+        return f"detail-{self.row()}"
+
+
+class FakeResultsPage:
+    """The results table of one query, one row per tax ID, each with a detail link"""
+    def __init__(self, tax_ids):
+        self.tax_ids = tax_ids
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+    async def goto(self, url, **kwargs):
+        pass
+
+
+def test_each_result_is_journaled_once(etl, paths, monkeypatch):
+    results_file, journal_file = paths
+    store = etl["ResultsStore"](results_file, journal_file, flush_every=1)
+    rates = {"01012100": "9%", "01012900": "13%", "01013010": "9%"}
+
+    async def detail_rate(page, tax_id, debug_mode=False):
+        return rates[tax_id]
+
+    monkeypatch.setitem(etl, "scrape_vat_rates_from_detail_page", detail_rate)
+    page = FakeResultsPage(list(rates))
+    results = asyncio.run(etl["process_results_table"](page, "0101", detail_page=page, results_store=store))
+    # The worker saves the whole query's results after process_results_table saved them row by row
+    store.update(results)
+
+    assert results == rates
+    assert journal_entries(journal_file) == [{"tax_id": tax_id, "vat_rate": rate} for tax_id, rate in rates.items()]
+    store.close()
+    assert etl["load_existing_results"](results_file) == rates
@@ -0,0 +1,90 @@
+"""vat_auto_scraper.py end to end against the transcustoms stand-in."""
+import csv
+import json
+import os
+
+import pytest
+
+from conftest import run_script
+from servers import serve
+from servers.transcustoms import HEADINGS, TranscustomsHandler, heading_codes, vat_rate
+
+SCRIPT = "China_HS_code_and_tarrifs/VAT/vat_auto_scraper.py"
+HEADING_SUBSET = HEADINGS[:20]
+
+
+def run_scraper(server, tmp_path, name, **constants):
+    workdir = tmp_path / name
+    workdir.mkdir()
+    replacements = [("https://www.transcustoms.com", server.url),
+                    ("http_cache = HTTPCache()", f"http_cache = HTTPCache(cache_dir={str(workdir / 'cache')!r})")]
+    settings = {"BACKOFF_SECONDS": 0.01, "REQUESTS_PER_SECOND": 0}
+    settings.update(constants)
+    namespace = run_script(SCRIPT, workdir, replacements, settings)
+    with open(workdir / "hs_codes_vat_rates.csv", newline="", encoding="utf-8") as f:
+        return namespace, list(csv.DictReader(f))
+
+
+def expected_rows():
+    codes = sorted(code for heading in HEADING_SUBSET for page in range(4) for code in heading_codes(heading, page))
+    return [{"HS_Code": code, "VAT_Rate": vat_rate(code)} for code in codes]
+
+
+def test_concurrent_crawl_reads_every_code(tmp_path):
+    with serve(TranscustomsHandler, latency=0.01, headings=HEADING_SUBSET) as server:
+        namespace, rows = run_scraper(server, tmp_path, "concurrent")
+    assert rows == expected_rows()
+    assert server.most_in_flight > 1
+    # The 429/503 answers were retried, and the finished run leaves no partial files behind
+    assert sorted(set(server.state["attempts"].values())) == [1, 2]
+    assert not os.path.exists(tmp_path / "concurrent" / "vat_progress.jsonl")
+    assert not os.path.exists(tmp_path / "concurrent" / "hs_codes_vat_rates.csv.partial")
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_sequential_and_concurrent_runs_agree(tmp_path, workers):
+    with serve(TranscustomsHandler, headings=HEADING_SUBSET, fail_first=False) as server:
+        _, rows = run_scraper(server, tmp_path, f"workers_{workers}",
+                              CONCURRENT=workers > 1, MAX_WORKERS=workers)
+    assert rows == expected_rows()
+
+
+# Stops the run like a Ctrl-C once some codes are written to the progress log
+INTERRUPT_AFTER = 25
+WRITE_ROW = '            writer.writerow({"HS_Code": code, "VAT_Rate": vat_rate})\n            out.flush()\n'
+INTERRUPT = WRITE_ROW + f"            if i == {INTERRUPT_AFTER}:\n                raise KeyboardInterrupt\n"
+
+
+def tariff_requests(server, start=0):
+    return [path.split("HS_Code=")[1] for path in server.requests[start:] if "China_Tariff.asp" in path]
+
+
+def test_rerun_after_an_interrupted_run_skips_the_finished_codes(tmp_path):
+    with serve(TranscustomsHandler, headings=HEADING_SUBSET, fail_first=False) as server:
+        _, uninterrupted = run_scraper(server, tmp_path, "uninterrupted")
+
+        workdir = tmp_path / "interrupted"
+        workdir.mkdir()
+        replacements = [("https://www.transcustoms.com", server.url),
+                        ("http_cache = HTTPCache()", f"http_cache = HTTPCache(cache_dir={str(workdir / 'cache')!r})"),
+                        (WRITE_ROW, INTERRUPT)]
+        with pytest.raises(KeyboardInterrupt):
+            run_script(SCRIPT, workdir, replacements, {"REQUESTS_PER_SECOND": 0})
+        assert not os.path.exists(workdir / "hs_codes_vat_rates.csv")
+        with open(workdir / "vat_progress.jsonl", encoding="utf-8") as f:
+            finished = [json.loads(line)["HS_Code"] for line in f]
+        assert len(finished) == INTERRUPT_AFTER
+        # A crash while writing leaves half a line behind
+        with open(workdir / "vat_progress.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"HS_Code": "01')
+
+        rerun_start = len(server.requests)
+        run_script(SCRIPT, workdir, replacements[:2], {"REQUESTS_PER_SECOND": 0})
+        rerun_codes = tariff_requests(server, rerun_start)
+
+    with open(workdir / "hs_codes_vat_rates.csv", newline="", encoding="utf-8") as f:
+        resumed = list(csv.DictReader(f))
+    assert resumed == uninterrupted == expected_rows()
+    assert not set(rerun_codes) & set(finished)
+    assert sorted(rerun_codes) == sorted(set(row["HS_Code"] for row in resumed) - set(finished))
+    assert not os.path.exists(workdir / "vat_progress.jsonl")